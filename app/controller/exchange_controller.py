@@ -1,72 +1,193 @@
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from starlette.responses import Response, StreamingResponse
 
-from app.entities.entity import User, CurrencyConversionTransaction
+from app.domain.repository.transaction_repository import TransactionRepository
+from app.domain.repository.user_repository import AuthenticatedUser
+from app.domain.service.rate_history_service import RateHistoryService
+from app.domain.service.rate_ticker_service import TICKER_MAX_PAIRS, event_stream, parse_pairs, rate_ticker
+from app.entities.entity import CurrencyConversionTransaction
 from app.gateways.database.connector import get_db
 from app.gateways.external_api.apilayer_gateway import fetch_exchange_rate
+from app.gateways.external_api.currency_registry import get_currency_registry
 from app.schemas.currency_conversion_response_schema import CurrencyConversionResponse
+from app.schemas.rate_history_schema import RateHistoryResponse
 from app.utils.auth_deps import get_current_user
 from app.utils.config.log import get_logger
+from app.utils.idempotency import (
+    IDEMPOTENCY_HEADER,
+    IDEMPOTENCY_TTL,
+    REPLAYED_HEADER,
+    idempotency_store,
+    key_reused,
+    validate_idempotency_key,
+)
+from app.utils.rate_limit import rate_limit
 
 exchange_router = APIRouter(prefix="/exchange", tags=["exchange"])
 
-valid_currencies = ["BRL", "USD", "EUR", "JPY"]
+CURRENCIES_MAX_AGE = 3600
 logger = get_logger(__name__)
 
 
-@exchange_router.get("/convert/{from_currency}/{to_currency}/{amount}", response_model=CurrencyConversionResponse)
-async def convert_currency(
-        from_currency: str,
-        to_currency: str,
-        amount: float,
-        current_user: User = Depends(get_current_user),
-        db: AsyncSession = Depends(get_db),
-):
-    if from_currency not in valid_currencies or to_currency not in valid_currencies:
+@exchange_router.get("/currencies")
+async def list_currencies(request: Request):
+    registry = get_currency_registry()
+    headers = {"ETag": registry.etag, "Cache-Control": f"public, max-age={CURRENCIES_MAX_AGE}"}
+    if registry.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=registry.body, media_type="application/json", headers=headers)
+
+
+def _conversion_response(transaction: CurrencyConversionTransaction) -> CurrencyConversionResponse:
+    return CurrencyConversionResponse(
+        transaction_id=transaction.transaction_id,
+        user_id=transaction.user_id,
+        from_currency=transaction.from_currency,
+        amount_from=transaction.amount_from,
+        to_currency=transaction.to_currency,
+        amount_to=transaction.amount_to,
+        exchange_rate=transaction.exchange_rate,
+        timestamp=transaction.timestamp.isoformat()
+    )
+
+
+async def _stored_conversion(db: AsyncSession, user_id: int, idempotency_key: str, fingerprint: tuple):
+    transaction = await TransactionRepository(db).find_by_idempotency_key(user_id, idempotency_key)
+    if transaction is None:
+        return None
+    if (transaction.from_currency, transaction.to_currency, transaction.amount_from) != fingerprint:
+        raise key_reused()
+
+    created_at = transaction.timestamp
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    if datetime.now(timezone.utc) - created_at > timedelta(seconds=IDEMPOTENCY_TTL):
         raise HTTPException(
-            status_code=400,
-            detail=f"Invalid currency. Valid currencies are: {', '.join(valid_currencies)}"
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{IDEMPOTENCY_HEADER} was used for a conversion that can no longer be replayed"
         )
-    if amount < 0:
-        raise HTTPException(status_code=400, detail="Amount must be non-negative")
+    return _conversion_response(transaction)
+
 
+async def _convert(db: AsyncSession, user: AuthenticatedUser, from_currency: str, to_currency: str, amount: float,
+                   idempotency_key: Optional[str] = None):
     try:
-        exchange_data = fetch_exchange_rate(from_currency, to_currency, amount)
+        exchange_data = await fetch_exchange_rate(from_currency, to_currency, amount)
         transaction = CurrencyConversionTransaction(
             transaction_id=str(uuid.uuid4()),
-            user_id=current_user.id,
+            user_id=user.id,
             from_currency=from_currency.upper(),
             amount_from=amount,
             to_currency=to_currency.upper(),
             amount_to=exchange_data['result'],
             exchange_rate=exchange_data['rate'],
-            timestamp=datetime.now(timezone.utc)
-        )
-        db.add(transaction)
-        await db.commit()
-        await db.refresh(transaction)
-        exchange = CurrencyConversionResponse(
-            transaction_id=transaction.transaction_id,
-            user_id=transaction.user_id,
-            from_currency=transaction.from_currency,
-            amount_from=transaction.amount_from,
-            to_currency=transaction.to_currency,
-            amount_to=transaction.amount_to,
-            exchange_rate=transaction.exchange_rate,
-            timestamp=transaction.timestamp.isoformat()
+            timestamp=datetime.now(timezone.utc),
+            idempotency_key=idempotency_key
         )
+        await TransactionRepository(db).add(transaction)
+        exchange = _conversion_response(transaction)
         logger.info(exchange)
 
-        return exchange
+        return exchange, False
 
     except HTTPException:
         raise
+    except IntegrityError:
+        if idempotency_key is None:
+            raise
+        # Another worker stored the same key first: answer with its result.
+        stored = await _stored_conversion(db, user.id, idempotency_key, (from_currency, to_currency, amount))
+        if stored is None:
+            raise
+        return stored, True
     except Exception as e:
         await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Conversion failed: {str(e)}"
         )
+
+
+@exchange_router.get("/convert/{from_currency}/{to_currency}/{amount}", response_model=CurrencyConversionResponse)
+async def convert_currency(
+        from_currency: str,
+        to_currency: str,
+        amount: float,
+        response: Response,
+        idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+        current_user: AuthenticatedUser = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db),
+        _: None = Depends(rate_limit("convert")),
+):
+    get_currency_registry().validate(from_currency, to_currency)
+    if amount < 0:
+        raise HTTPException(status_code=400, detail="Amount must be non-negative")
+
+    if idempotency_key is None:
+        exchange, _ = await _convert(db, current_user, from_currency, to_currency, amount)
+        return exchange
+
+    idempotency_key = validate_idempotency_key(idempotency_key)
+    fingerprint = (from_currency, to_currency, amount)
+
+    async def execute():
+        stored = await _stored_conversion(db, current_user.id, idempotency_key, fingerprint)
+        if stored is not None:
+            return stored, True
+        return await _convert(db, current_user, from_currency, to_currency, amount, idempotency_key)
+
+    exchange, replayed = await idempotency_store.run((current_user.id, idempotency_key), fingerprint, execute)
+    if replayed:
+        response.headers[REPLAYED_HEADER] = "true"
+    return exchange
+
+
+@exchange_router.get("/history/{from_currency}/{to_currency}", response_model=RateHistoryResponse)
+async def get_rate_history(
+        from_currency: str,
+        to_currency: str,
+        start: Optional[datetime] = Query(None),
+        end: Optional[datetime] = Query(None),
+        interval: Optional[str] = Query(None, description="Bar size such as 15m, 4h, 1d or 1w"),
+        current_user: AuthenticatedUser = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db),
+        _: None = Depends(rate_limit("rate_history")),
+):
+    get_currency_registry().validate(from_currency, to_currency)
+
+    return await RateHistoryService(db).get_history(from_currency, to_currency, start, end, interval)
+
+
+@exchange_router.get("/stream")
+async def stream_rates(
+        pairs: str = Query(..., description="Comma-separated pairs such as USD:BRL,EUR:USD"),
+        current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    requested = parse_pairs(pairs)
+    if not requested or len(requested) > TICKER_MAX_PAIRS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Subscribe to between 1 and {TICKER_MAX_PAIRS} pairs, e.g. pairs=USD:BRL,EUR:USD"
+        )
+    registry = get_currency_registry()
+    for from_currency, to_currency in requested:
+        registry.validate(from_currency, to_currency)
+    if rate_ticker.full:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many rate stream clients, retry later",
+            headers={"Retry-After": "5"}
+        )
+
+    return StreamingResponse(
+        event_stream(rate_ticker, requested),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
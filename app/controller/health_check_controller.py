@@ -1,6 +1,6 @@
 import os
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from fastapi.encoders import jsonable_encoder
 from starlette import status
 from starlette.responses import JSONResponse
@@ -14,3 +14,12 @@ health_path = os.getenv("HEALTH_CHECK", "health")
 def health_check():
     return JSONResponse(status_code=status.HTTP_200_OK,
                         content=jsonable_encoder({"message": "OK"}))
+
+
+@health_check_router.get('/ready')
+def readiness_check(request: Request):
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            content=jsonable_encoder({"message": "Warming up"}))
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content=jsonable_encoder({"message": "READY"}))
@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from starlette.responses import StreamingResponse
+
+from app.domain.repository.job_repository import JobRepository
+from app.domain.repository.user_repository import AuthenticatedUser
+from app.domain.service.conversion_job_service import (
+    JOBS_MAX_BYTES,
+    JOBS_MAX_ROWS,
+    conversion_job_runner,
+    count_rows,
+    job_results,
+)
+from app.gateways.database.connector import get_db
+from app.schemas.conversion_job_schema import ConversionJobResponse
+from app.utils.auth_deps import get_current_user
+from app.utils.rate_limit import rate_limit
+
+jobs_router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+CSV_CONTENT_TYPES = ("text/csv", "text/plain")
+
+
+async def _read_csv_body(request: Request) -> str:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in CSV_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload the conversions as text/csv"
+        )
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > JOBS_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"CSV is larger than {JOBS_MAX_BYTES} bytes"
+            )
+    try:
+        return body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV must be UTF-8")
+
+
+@jobs_router.post("/conversions", response_model=ConversionJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_conversion_job(
+        request: Request,
+        current_user: AuthenticatedUser = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db),
+        _: None = Depends(rate_limit("jobs")),
+):
+    text = await _read_csv_body(request)
+    total_rows = count_rows(text)
+    if total_rows == 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV has no conversion rows")
+    if total_rows > JOBS_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"CSV has {total_rows} rows, the maximum is {JOBS_MAX_ROWS}"
+        )
+
+    job = await JobRepository(db).create(current_user.id, text, total_rows)
+    conversion_job_runner.notify()
+    return job
+
+
+@jobs_router.get("/{job_id}", response_model=ConversionJobResponse)
+async def get_conversion_job(
+        job_id: str,
+        current_user: AuthenticatedUser = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db),
+):
+    return await JobRepository(db).find_for_user(job_id, current_user.id)
+
+
+@jobs_router.get("/{job_id}/result")
+async def download_conversion_job_result(
+        job_id: str,
+        current_user: AuthenticatedUser = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db),
+):
+    job = await JobRepository(db).find_for_user(job_id, current_user.id)
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job.status}, results are available once it has completed"
+        )
+
+    return StreamingResponse(
+        job_results(job),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="conversions-{job_id}.csv"'}
+    )
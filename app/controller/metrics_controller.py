@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from starlette.responses import PlainTextResponse
+
+from app.utils.config.metrics import REGISTRY
+
+metrics_router = APIRouter(tags=["metrics"])
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -3,12 +3,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from app.domain.repository.transaction_repository import TransactionRepository
-from app.entities.entity import User
+from app.domain.repository.user_repository import AuthenticatedUser
 from app.gateways.database.connector import get_db
 from app.schemas.currency_conversion_response_schema import CurrencyConversionResponse
 from app.schemas.pagination_schema import PaginatedResponse
 from app.utils.auth_deps import get_current_user
 from app.utils.config.log import current_user_id, current_username
+from app.utils.rate_limit import rate_limit
 
 transaction_router = APIRouter(prefix="/transaction", tags=["transaction"])
 
@@ -19,7 +20,8 @@ async def get_transactions(
         page: int = Query(1, ge=1),
         page_size: int = Query(10, ge=1, le=100),
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: AuthenticatedUser = Depends(get_current_user),
+        _: None = Depends(rate_limit("history")),
 ):
     if user_id != current_user.id:
         raise HTTPException(
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.domain.repository.user_repository import UserRepository
-from app.entities.entity import User
+from app.domain.repository.user_repository import AuthenticatedUser, UserRepository
+from app.domain.service import user_deletion_service
 from app.gateways.database.connector import get_db
 from app.schemas.user_schema import UserResponse, UserCreate, UserUpdate
 from app.utils.auth_deps import get_current_user
 from app.utils.config.log import current_user_id, current_username
+from app.utils.deadline import request_deadline
 
 user_router = APIRouter(prefix="/users", tags=["users"])
 
@@ -19,6 +20,8 @@ async def create_user(
     repo = UserRepository(db)
     try:
         return await repo.create(user_data.dict())
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -28,7 +31,7 @@ async def create_user(
 
 @user_router.get("/me", response_model=UserResponse)
 async def read_current_user(
-        current_user: User = Depends(get_current_user)
+        current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     return UserResponse(
         id=current_user.id,
@@ -43,7 +46,7 @@ async def update_user(
         user_id: int,
         user_data: UserUpdate,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     if user_id != current_user.id:
         raise HTTPException(
@@ -57,11 +60,20 @@ async def update_user(
     return await repo.update(user_id, user_data.dict())
 
 
+async def _delete_in_background(user_id: int):
+    # Runs after the response, so the request's deadline no longer applies.
+    request_deadline.set(None)
+    await user_deletion_service.delete_user(user_id)
+
+
 @user_router.delete("/{user_id}")
 async def delete_user(
         user_id: int,
+        response: Response,
+        background_tasks: BackgroundTasks,
+        background: bool = Query(False, description="Return 202 at once and delete the history afterwards"),
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     if user_id != current_user.id:
         raise HTTPException(
@@ -73,5 +85,11 @@ async def delete_user(
     current_username.set(current_user.username)
 
     repo = UserRepository(db)
+    if background:
+        await repo.deactivate(user_id)
+        background_tasks.add_task(_delete_in_background, user_id)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"message": "User deletion started"}
+
     await repo.delete(user_id)
     return {"message": "User deleted successfully"}
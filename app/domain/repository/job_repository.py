@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, bindparam, or_, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.entities.entity import ConversionJob
+
+FIND_JOB_STMT = select(ConversionJob).where(ConversionJob.job_id == bindparam("job_id"))
+FIND_USER_JOB_STMT = (
+    select(ConversionJob)
+    .where(ConversionJob.job_id == bindparam("job_id"), ConversionJob.user_id == bindparam("user_id"))
+)
+CLAIMABLE_JOBS_STMT = (
+    select(ConversionJob.job_id)
+    .where(or_(
+        ConversionJob.status == "queued",
+        and_(ConversionJob.status == "running", ConversionJob.lease_expires_at < bindparam("now"))
+    ))
+    .order_by(ConversionJob.created_at)
+    .limit(bindparam("limit"))
+)
+
+
+class JobRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, user_id: int, input_text: str, total_rows: int) -> ConversionJob:
+        job = ConversionJob(user_id=user_id, input=input_text, total_rows=total_rows, status="queued")
+        return await job.save(self.db)
+
+    async def find_for_user(self, job_id: str, user_id: int) -> ConversionJob:
+        try:
+            result = await self.db.execute(FIND_USER_JOB_STMT, {"job_id": job_id, "user_id": user_id})
+            job = result.scalars().first()
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=str(e)
+            )
+        if job is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        return job
+
+    async def claimable_job_ids(self, limit: int = 5) -> list[str]:
+        result = await self.db.execute(CLAIMABLE_JOBS_STMT, {"now": datetime.now(timezone.utc), "limit": limit})
+        return list(result.scalars().all())
+
+    async def claim(self, job_id: str, lease_seconds: float) -> bool:
+        # Conditional update: of all the workers racing for a job, only the
+        # one whose UPDATE matched the row gets it.
+        now = datetime.now(timezone.utc)
+        result = await self.db.execute(
+            update(ConversionJob)
+            .where(
+                ConversionJob.job_id == job_id,
+                or_(
+                    ConversionJob.status == "queued",
+                    and_(ConversionJob.status == "running", ConversionJob.lease_expires_at < now)
+                )
+            )
+            .values(status="running", lease_expires_at=now + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount == 1
+
+    async def get(self, job_id: str) -> Optional[ConversionJob]:
+        result = await self.db.execute(FIND_JOB_STMT, {"job_id": job_id})
+        return result.scalars().first()
+
+    async def save_progress(self, job_id: str, processed_rows: int, failed_rows: int, errors: str,
+                            lease_seconds: float):
+        await ConversionJob.bulk_update(
+            self.db,
+            ConversionJob.job_id == job_id,
+            processed_rows=processed_rows,
+            failed_rows=failed_rows,
+            errors=errors,
+            lease_expires_at=datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)
+        )
+
+    async def finish(self, job_id: str, job_status: str, error: Optional[str] = None):
+        await ConversionJob.bulk_update(
+            self.db,
+            ConversionJob.job_id == job_id,
+            status=job_status,
+            error=error,
+            lease_expires_at=None,
+            finished_at=datetime.now(timezone.utc)
+        )
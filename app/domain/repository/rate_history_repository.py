@@ -0,0 +1,127 @@
+from datetime import date, datetime, timezone
+from typing import Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import bindparam, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.entities.entity import ExchangeRateBar
+from app.gateways.database.database_gateway import BULK_CHUNK_SIZE, _chunks, upsert_insert
+
+BARS_IN_RANGE_STMT = (
+    select(
+        ExchangeRateBar.bucket_start,
+        ExchangeRateBar.open,
+        ExchangeRateBar.high,
+        ExchangeRateBar.low,
+        ExchangeRateBar.close,
+    )
+    .where(
+        ExchangeRateBar.from_currency == bindparam("from_currency"),
+        ExchangeRateBar.to_currency == bindparam("to_currency"),
+        ExchangeRateBar.interval == bindparam("interval"),
+        ExchangeRateBar.bucket_start >= bindparam("start"),
+        ExchangeRateBar.bucket_start < bindparam("end"),
+    )
+    .order_by(ExchangeRateBar.bucket_start)
+)
+BUCKETS_IN_RANGE_STMT = (
+    select(ExchangeRateBar.bucket_start)
+    .where(
+        ExchangeRateBar.from_currency == bindparam("from_currency"),
+        ExchangeRateBar.to_currency == bindparam("to_currency"),
+        ExchangeRateBar.interval == bindparam("interval"),
+        ExchangeRateBar.bucket_start >= bindparam("start"),
+        ExchangeRateBar.bucket_start < bindparam("end"),
+    )
+)
+
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite hands timestamps back without their zone; everything is stored in UTC.
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+class RateHistoryRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _params(self, from_currency: str, to_currency: str, interval: str, start: datetime, end: datetime):
+        return {
+            "from_currency": from_currency,
+            "to_currency": to_currency,
+            "interval": interval,
+            "start": start,
+            "end": end,
+        }
+
+    async def get_bars(self, from_currency: str, to_currency: str, interval: str, start: datetime, end: datetime):
+        try:
+            result = await self.db.execute(
+                BARS_IN_RANGE_STMT, self._params(from_currency, to_currency, interval, start, end)
+            )
+            return [(as_utc(row[0]), row[1], row[2], row[3], row[4]) for row in result.all()]
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=str(e)
+            )
+
+    async def existing_days(self, from_currency: str, to_currency: str, start: datetime, end: datetime) -> set[date]:
+        try:
+            result = await self.db.execute(
+                BUCKETS_IN_RANGE_STMT, self._params(from_currency, to_currency, "day", start, end)
+            )
+            return {as_utc(bucket_start).date() for bucket_start in result.scalars().all()}
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=str(e)
+            )
+
+    async def insert_missing(self, rows: Sequence[dict]) -> int:
+        # Backfilled bars never overwrite bars built from live samples.
+        return await ExchangeRateBar.upsert(self.db, rows, update_fields=[])
+
+    async def merge(self, rows: Sequence[dict], chunk_size: int = BULK_CHUNK_SIZE) -> int:
+        # Rows are partial bars for the same buckets: keep the first open,
+        # widen high/low, take the newer close and add up the samples.
+        if not rows:
+            return 0
+
+        dialect_insert = upsert_insert(self.db)
+        if self.db.bind.dialect.name == "postgresql":
+            greatest, least = func.greatest, func.least
+        else:
+            greatest, least = func.max, func.min
+        table = ExchangeRateBar.__table__
+        try:
+            merged = 0
+            for chunk in _chunks(rows, chunk_size):
+                stmt = dialect_insert(table).values(list(chunk))
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[column.name for column in table.primary_key],
+                    set_={
+                        "high": greatest(table.c.high, stmt.excluded.high),
+                        "low": least(table.c.low, stmt.excluded.low),
+                        "close": stmt.excluded.close,
+                        "samples": table.c.samples + stmt.excluded.samples,
+                    }
+                )
+                result = await self.db.execute(stmt)
+                merged += result.rowcount
+            await self.db.commit()
+            return merged
+        except SQLAlchemyError as ex:
+            await self.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Rate bar merge failed: {str(ex)}"
+            )
+
+    async def prune(self, interval: str, before: datetime) -> int:
+        return await ExchangeRateBar.bulk_delete(
+            self.db, ExchangeRateBar.interval == interval, ExchangeRateBar.bucket_start < before
+        )
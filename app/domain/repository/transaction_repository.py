@@ -1,32 +1,79 @@
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable, Sequence
+
 from fastapi import HTTPException, status
-from sqlalchemy import func
+from sqlalchemy import bindparam, func
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from app.entities.entity import CurrencyConversionTransaction
+from app.gateways.database.database_gateway import shard_session, sharding_enabled
+from app.gateways.journal.transaction_journal import journal_transactions
+from app.utils.deadline import deadline_stage
+
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "5000"))
+
+# History pages select just the columns the response needs: rows come back
+# as plain tuples, with no ORM instances to build or track.
+TRANSACTION_ROW_COLUMNS = (
+    CurrencyConversionTransaction.transaction_id,
+    CurrencyConversionTransaction.user_id,
+    CurrencyConversionTransaction.from_currency,
+    CurrencyConversionTransaction.amount_from,
+    CurrencyConversionTransaction.to_currency,
+    CurrencyConversionTransaction.amount_to,
+    CurrencyConversionTransaction.exchange_rate,
+    CurrencyConversionTransaction.timestamp,
+)
+USER_TRANSACTIONS_PAGE_STMT = (
+    select(*TRANSACTION_ROW_COLUMNS)
+    .filter(CurrencyConversionTransaction.user_id == bindparam("user_id"))
+    .order_by(CurrencyConversionTransaction.timestamp.desc())
+    .offset(bindparam("offset"))
+    .limit(bindparam("limit"))
+)
+USER_TRANSACTIONS_COUNT_STMT = (
+    select(func.count())
+    .select_from(CurrencyConversionTransaction)
+    .filter(CurrencyConversionTransaction.user_id == bindparam("user_id"))
+)
+TRANSACTION_BY_IDEMPOTENCY_KEY_STMT = (
+    select(CurrencyConversionTransaction)
+    .filter(
+        CurrencyConversionTransaction.user_id == bindparam("user_id"),
+        CurrencyConversionTransaction.idempotency_key == bindparam("idempotency_key")
+    )
+)
 
 
 class TransactionRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @asynccontextmanager
+    async def _session(self, user_id: int) -> AsyncIterator[AsyncSession]:
+        # With SHARD_URLS set a user's transactions live on their shard, not in
+        # the main database the request session is bound to.
+        if not sharding_enabled():
+            yield self.db
+            return
+        async with shard_session(user_id) as session:
+            yield session
+
     async def get_user_transactions(self, user_id: int, page: int = 1, page_size: int = 10):
         try:
             offset = (page - 1) * page_size
 
-            stmt = (
-                select(CurrencyConversionTransaction)
-                .filter(CurrencyConversionTransaction.user_id == user_id)
-                .order_by(CurrencyConversionTransaction.timestamp.desc())
-                .offset(offset)
-                .limit(page_size)
-            )
-            result = await self.db.execute(stmt)
-            transactions = result.scalars().all()
+            async with deadline_stage("db"), self._session(user_id) as db:
+                result = await db.execute(
+                    USER_TRANSACTIONS_PAGE_STMT,
+                    {"user_id": user_id, "offset": offset, "limit": page_size}
+                )
+                transactions = result.all()
 
-            count_stmt = select(func.count()).filter(CurrencyConversionTransaction.user_id == user_id)
-            total_result = await self.db.execute(count_stmt)
+                total_result = await db.execute(USER_TRANSACTIONS_COUNT_STMT, {"user_id": user_id})
             total = total_result.scalar_one()
 
             return transactions, total
@@ -36,3 +83,51 @@ class TransactionRepository:
                 detail=str(e)
             )
 
+    async def find_by_idempotency_key(self, user_id: int, idempotency_key: str):
+        try:
+            async with deadline_stage("db"), self._session(user_id) as db:
+                result = await db.execute(
+                    TRANSACTION_BY_IDEMPOTENCY_KEY_STMT,
+                    {"user_id": user_id, "idempotency_key": idempotency_key}
+                )
+                return result.scalars().first()
+        except SQLAlchemyError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=str(e)
+            )
+
+    async def add(self, transaction: CurrencyConversionTransaction) -> CurrencyConversionTransaction:
+        # IntegrityError is left to the caller, which decides whether it was a
+        # replayed Idempotency-Key.
+        async with deadline_stage("db"), self._session(transaction.user_id) as db:
+            try:
+                db.add(transaction)
+                await db.commit()
+                await db.refresh(transaction)
+            except Exception:
+                await db.rollback()
+                raise
+        await journal_transactions([transaction])
+        return transaction
+
+    async def insert_missing(self, user_id: int, rows: Sequence[dict]) -> int:
+        # Rows whose transaction_id is already stored are skipped. They are
+        # journaled again all the same, so journal consumers dedupe on
+        # transaction_id.
+        async with self._session(user_id) as db:
+            inserted = await CurrencyConversionTransaction.upsert(
+                db, rows, index_elements=["transaction_id"], update_fields=[]
+            )
+        await journal_transactions(rows)
+        return inserted
+
+    async def find_many(self, user_id: int, ids: Iterable[str]) -> list[CurrencyConversionTransaction]:
+        async with self._session(user_id) as db:
+            return await CurrencyConversionTransaction.find_many(db, ids)
+
+    async def delete_for_user(self, user_id: int, batch_size: int = DELETE_BATCH_SIZE) -> int:
+        async with self._session(user_id) as db:
+            return await CurrencyConversionTransaction.bulk_delete(
+                db, CurrencyConversionTransaction.user_id == user_id, batch_size=batch_size
+            )
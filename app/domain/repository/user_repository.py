@@ -1,15 +1,48 @@
 import logging
+from datetime import datetime, timezone
+from typing import NamedTuple
 
 from fastapi import HTTPException, status
+from sqlalchemy import bindparam
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.domain.repository.transaction_repository import TransactionRepository
 from app.entities.entity import User, UserSession
-from app.utils.password import hash_password
+from app.utils.password import hash_password, run_bcrypt
 
 logger = logging.getLogger(__name__)
 
+FIND_USER_BY_ID_STMT = select(User).where(User.id == bindparam("user_id"))
+FIND_USER_BY_USERNAME_STMT = select(User).where(User.username == bindparam("username"))
+USER_EXISTS_STMT = select(User.id).where(User.id == bindparam("user_id"))
+PENDING_DELETION_STMT = (
+    select(User.id)
+    .where(User.deletion_requested_at.is_not(None))
+    .order_by(User.deletion_requested_at)
+    .limit(bindparam("limit"))
+)
+FIND_SESSION_WITH_USER_STMT = (
+    select(UserSession, User)
+    .outerjoin(User, User.id == UserSession.user_id)
+    .where(UserSession.session_id == bindparam("session_id"))
+)
+# Authentication only needs these columns. Loading them as a tuple keeps
+# password_hash out of every request and skips building a tracked User.
+AUTHENTICATED_USER_STMT = (
+    select(UserSession.user_id, User.id, User.username, User.is_active, User.created_at)
+    .outerjoin(User, User.id == UserSession.user_id)
+    .where(UserSession.session_id == bindparam("session_id"))
+)
+
+
+class AuthenticatedUser(NamedTuple):
+    id: int
+    username: str
+    is_active: bool
+    created_at: datetime
+
 
 class UserRepository:
     def __init__(self, db: AsyncSession):
@@ -17,8 +50,7 @@ class UserRepository:
 
     async def find_by_id(self, id: int):
         try:
-            query = select(User).where(User.id == id)
-            result = await self.db.execute(query)
+            result = await self.db.execute(FIND_USER_BY_ID_STMT, {"user_id": id})
             user = result.scalars().first()
             if not user:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -32,12 +64,14 @@ class UserRepository:
         try:
             logger.info(f"Trying to create user with data: {user_data}")
 
-            existing_user = await self.db.execute(select(User).where(User.username == user_data["username"]))
+            existing_user = await self.db.execute(
+                FIND_USER_BY_USERNAME_STMT, {"username": user_data["username"]}
+            )
             if existing_user.scalars().first():
                 logger.warning(f"Username {user_data['username']} already exists.")
                 raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Username already exists")
 
-            user_data["password_hash"] = hash_password(user_data["password_hash"])
+            user_data["password_hash"] = await run_bcrypt(hash_password, user_data["password_hash"])
             logger.info(f"Password hashed: {user_data['password_hash'][:30]}...")
 
             user = User(**user_data)
@@ -68,22 +102,43 @@ class UserRepository:
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(ex)
             ) from ex
 
-    async def delete(self, id: int):
+    async def exists(self, id: int) -> bool:
         try:
-            user = await self.find_by_id(id)
-            await self.db.delete(user)
-            await self.db.commit()
-            return {"detail": "User: Deleted Success"}
+            result = await self.db.execute(USER_EXISTS_STMT, {"user_id": id})
+            return result.scalar() is not None
         except SQLAlchemyError as ex:
-            await self.db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(ex)
             ) from ex
 
+    async def deactivate(self, id: int):
+        # Locks the account out right away (no new logins, no live sessions)
+        # and marks it for deletion, so the sweep finishes it if the
+        # background task doesn't.
+        if not await User.bulk_update(
+            self.db, User.id == id, is_active=False, deletion_requested_at=datetime.now(timezone.utc)
+        ):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        await UserSession.bulk_delete(self.db, UserSession.user_id == id)
+
+    async def pending_deletions(self, limit: int = 100) -> list[int]:
+        result = await self.db.execute(PENDING_DELETION_STMT, {"limit": limit})
+        return list(result.scalars().all())
+
+    async def delete(self, id: int):
+        # Set-based: the transaction history goes in batches, then deleting the
+        # user row lets the database cascade to sessions and jobs. Nothing is
+        # loaded into the session, and a retry after a failure picks up where
+        # the last committed batch left off.
+        if not await self.exists(id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        await TransactionRepository(self.db).delete_for_user(id)
+        await User.bulk_delete(self.db, User.id == id)
+        return {"detail": "User: Deleted Success"}
+
     async def find_by_username(self, username: str):
         try:
-            query = select(User).where(User.username == username)
-            result = await self.db.execute(query)
+            result = await self.db.execute(FIND_USER_BY_USERNAME_STMT, {"username": username})
             user = result.scalars().first()
             if not user:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -95,18 +150,13 @@ class UserRepository:
 
     async def find_by_session(self, session_id: str):
         try:
-            session = await self.db.execute(
-                select(User)
-                .join(UserSession, User.id == UserSession.user_id)
-                .where(UserSession.session_id == session_id)
-            )
-            user_session = session.scalars().first()
-            user = await self.db.execute(select(User).filter(User.id == user_session.user_id))
-            user = user.scalars().first()
+            result = await self.db.execute(FIND_SESSION_WITH_USER_STMT, {"session_id": session_id})
+            row = result.first()
+            if not row:
+                raise HTTPException(status_code=401, detail="User session not found")
+            user_session, user = row
             if not user:
                 raise HTTPException(status_code=401, detail="User not found")
-            if not user_session:
-                raise HTTPException(status_code=401, detail="User session not found")
             if user_session.is_expired:
                 raise HTTPException(status_code=401, detail="Session expired")
 
@@ -2,13 +2,12 @@ import uuid
 from datetime import datetime, timedelta, timezone
 
 from fastapi import HTTPException, status, Response
-from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.domain.repository.user_repository import UserRepository
 from app.entities.entity import UserSession
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.utils.deadline import deadline_stage
+from app.utils.password import run_bcrypt, verify_password
 
 
 class AuthService:
@@ -17,8 +16,9 @@ class AuthService:
         self.user_repo = UserRepository(db)
 
     async def login(self, username: str, password: str, response: Response):
-        user = await self.user_repo.find_by_username(username)
-        if not user or not pwd_context.verify(password, user.password_hash):
+        async with deadline_stage("db"):
+            user = await self.user_repo.find_by_username(username)
+        if not user or not user.is_active or not await run_bcrypt(verify_password, password, user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials"
@@ -33,8 +33,9 @@ class AuthService:
         )
 
         self.db.add(user_session)
-        await self.db.commit()
-        await self.db.refresh(user_session)
+        async with deadline_stage("db"):
+            await self.db.commit()
+            await self.db.refresh(user_session)
 
         response.set_cookie(
             key="session_id",
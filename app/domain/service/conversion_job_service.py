@@ -0,0 +1,266 @@
+import asyncio
+import csv
+import io
+import json
+import logging
+import math
+import os
+import uuid
+from datetime import datetime, timezone
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator, Optional, Union
+
+from fastapi import HTTPException
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.domain.repository.job_repository import JobRepository
+from app.domain.repository.transaction_repository import TransactionRepository
+from app.entities.entity import ConversionJob
+from app.gateways.database.database_gateway import get_session_factory
+from app.gateways.external_api import apilayer_gateway
+from app.gateways.external_api.currency_registry import get_currency_registry
+from app.utils.config.metrics import Counter, Gauge
+
+JOBS_ENABLED = os.getenv("JOBS_ENABLED", "true").lower() == "true"
+JOBS_CONCURRENCY = int(os.getenv("JOBS_CONCURRENCY", "2"))
+JOBS_CHUNK_SIZE = int(os.getenv("JOBS_CHUNK_SIZE", "500"))
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "2"))
+JOBS_LEASE_SECONDS = float(os.getenv("JOBS_LEASE_SECONDS", "60"))
+JOBS_MAX_ROWS = int(os.getenv("JOBS_MAX_ROWS", "100000"))
+JOBS_MAX_BYTES = int(os.getenv("JOBS_MAX_BYTES", str(5 * 1024 * 1024)))
+JOBS_MAX_ERRORS = int(os.getenv("JOBS_MAX_ERRORS", "1000"))
+RESULT_HEADER = ("line", "from_currency", "to_currency", "amount", "amount_to", "exchange_rate",
+                 "transaction_id", "error")
+
+logger = logging.getLogger(__name__)
+
+jobs_running = Gauge("jobs_running", "Conversion jobs being processed by this worker")
+job_rows_total = Counter("job_rows_total", "Conversion job rows processed by outcome", ("outcome",))
+
+
+def data_rows(text: str) -> Iterator[tuple[int, list[str]]]:
+    # Line numbers are stable for a given input, which is what makes the
+    # transaction ids (and therefore resuming) deterministic.
+    for line, cells in enumerate(csv.reader(io.StringIO(text)), start=1):
+        if not any(cell.strip() for cell in cells):
+            continue
+        if line == 1 and cells[0].strip().lower() in ("from", "from_currency"):
+            continue
+        yield line, cells
+
+
+def count_rows(text: str) -> int:
+    return sum(1 for _ in data_rows(text))
+
+
+def parse_row(cells: list[str]) -> Union[tuple[str, str, float], str]:
+    if len(cells) < 3:
+        return "Expected from_currency,to_currency,amount"
+    from_currency, to_currency = cells[0].strip().upper(), cells[1].strip().upper()
+    registry = get_currency_registry()
+    if from_currency not in registry or to_currency not in registry:
+        return "Invalid currency"
+    try:
+        amount = float(cells[2])
+    except ValueError:
+        return "Invalid amount"
+    if not math.isfinite(amount) or amount < 0:
+        return "Amount must be non-negative"
+    return from_currency, to_currency, amount
+
+
+def transaction_id_for(job_id: str, line: int) -> str:
+    return str(uuid.uuid5(uuid.UUID(job_id), str(line)))
+
+
+def _batched(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+async def convert_chunk(session, job_id: str, user_id: int, rows: list[tuple[int, list[str]]],
+                        errors: dict[str, str]) -> int:
+    parsed = []
+    for line, cells in rows:
+        result = parse_row(cells)
+        if isinstance(result, str):
+            errors[str(line)] = result
+        else:
+            parsed.append((line, result))
+
+    pairs = list({(from_currency, to_currency) for _, (from_currency, to_currency, _) in parsed})
+    results = await asyncio.gather(
+        *(apilayer_gateway.fetch_exchange_rate(f, t, 1) for f, t in pairs), return_exceptions=True
+    )
+    rates = dict(zip(pairs, results))
+
+    now = datetime.now(timezone.utc)
+    transactions = []
+    for line, (from_currency, to_currency, amount) in parsed:
+        rate = rates[(from_currency, to_currency)]
+        if isinstance(rate, Exception):
+            errors[str(line)] = "Exchange rate unavailable"
+            continue
+        transactions.append({
+            "transaction_id": transaction_id_for(job_id, line),
+            "user_id": user_id,
+            "from_currency": from_currency,
+            "amount_from": amount,
+            "to_currency": to_currency,
+            "amount_to": round(amount * rate["rate"], 6),
+            "exchange_rate": rate["rate"],
+            "timestamp": now,
+        })
+
+    # Rows already written by an interrupted run are skipped, not duplicated.
+    await TransactionRepository(session).insert_missing(user_id, transactions)
+    job_rows_total.inc("converted", amount=len(transactions))
+    job_rows_total.inc("failed", amount=len(rows) - len(transactions))
+    return len(rows) - len(transactions)
+
+
+class ConversionJobRunner:
+    # Workers poll the jobs table and claim jobs with a conditional UPDATE
+    # plus a lease, so several processes can share the queue and a job whose
+    # worker died is picked up again once its lease runs out. Each chunk is
+    # converted in its own short session and committed together with the
+    # job's progress, which is where a resumed job starts from.
+
+    def __init__(self, concurrency: int = JOBS_CONCURRENCY, chunk_size: int = JOBS_CHUNK_SIZE,
+                 poll_interval: float = JOBS_POLL_INTERVAL, lease_seconds: float = JOBS_LEASE_SECONDS):
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._wake = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._running = 0
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        self._wake.set()
+
+    async def claim_next(self) -> Optional[str]:
+        async with get_session_factory()() as session:
+            repo = JobRepository(session)
+            for job_id in await repo.claimable_job_ids():
+                if await repo.claim(job_id, self.lease_seconds):
+                    return job_id
+        return None
+
+    async def _worker(self):
+        while True:
+            self._wake.clear()
+            try:
+                job_id = await self.claim_next()
+            except Exception as ex:
+                logger.warning(f"Could not claim a conversion job: {ex}")
+                job_id = None
+
+            if job_id is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._running += 1
+            jobs_running.set(self._running)
+            try:
+                await self.process(job_id)
+            except Exception as ex:
+                # The job keeps its lease and is claimed again once it runs out.
+                logger.error(f"Conversion job {job_id} could not be processed: {ex}")
+            finally:
+                self._running -= 1
+                jobs_running.set(self._running)
+
+    async def process(self, job_id: str):
+        async with get_session_factory()() as session:
+            job = await JobRepository(session).get(job_id)
+            if job is None:
+                return
+            user_id, text = job.user_id, job.input
+            processed, failed, errors = job.processed_rows, job.failed_rows, json.loads(job.errors)
+
+        if processed:
+            logger.info(f"Resuming conversion job {job_id} from row {processed}")
+        try:
+            for chunk in _batched(islice(data_rows(text), processed, None), self.chunk_size):
+                async with get_session_factory()() as session:
+                    chunk_errors = {}
+                    failed += await convert_chunk(session, job_id, user_id, chunk, chunk_errors)
+                    processed += len(chunk)
+                    for line, reason in chunk_errors.items():
+                        if len(errors) < JOBS_MAX_ERRORS:
+                            errors[line] = reason
+                    await JobRepository(session).save_progress(
+                        job_id, processed, failed, json.dumps(errors), self.lease_seconds
+                    )
+            async with get_session_factory()() as session:
+                await JobRepository(session).finish(job_id, "completed")
+            logger.info(f"Conversion job {job_id} completed: {processed} rows, {failed} failed")
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back so the next worker resumes it
+            # right away instead of waiting for the lease to expire.
+            await asyncio.shield(self._requeue(job_id))
+            raise
+        except (HTTPException, SQLAlchemyError, OSError, asyncio.TimeoutError) as ex:
+            # Database and network errors (the gateways raise the former as
+            # HTTPException): leave the job running so it is resumed from the
+            # last recorded chunk once its lease expires.
+            logger.warning(f"Conversion job {job_id} interrupted after {processed} rows, will resume: {ex}")
+        except Exception as ex:
+            logger.error(f"Conversion job {job_id} failed after {processed} rows: {ex}")
+            async with get_session_factory()() as session:
+                await JobRepository(session).finish(job_id, "failed", error=str(ex))
+
+    async def _requeue(self, job_id: str):
+        try:
+            async with get_session_factory()() as session:
+                await ConversionJob.bulk_update(
+                    session, ConversionJob.job_id == job_id, status="queued", lease_expires_at=None
+                )
+        except Exception as ex:
+            logger.warning(f"Could not requeue conversion job {job_id}: {ex}")
+
+
+async def job_results(job: ConversionJob, chunk_size: int = JOBS_CHUNK_SIZE) -> AsyncIterator[str]:
+    errors = json.loads(job.errors)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(RESULT_HEADER)
+
+    for chunk in _batched(data_rows(job.input), chunk_size):
+        ids = [transaction_id_for(job.job_id, line) for line, _ in chunk]
+        async with get_session_factory()() as session:
+            found = {
+                transaction.transaction_id: transaction
+                for transaction in await TransactionRepository(session).find_many(job.user_id, ids)
+            }
+        for (line, cells), transaction_id in zip(chunk, ids):
+            transaction = found.get(transaction_id)
+            if transaction is not None:
+                writer.writerow((line, transaction.from_currency, transaction.to_currency, transaction.amount_from,
+                                 transaction.amount_to, transaction.exchange_rate, transaction_id, ""))
+            else:
+                cells = (cells + ["", "", ""])[:3]
+                writer.writerow((line, *cells, "", "", "", errors.get(str(line), "Not converted")))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+conversion_job_runner = ConversionJobRunner()
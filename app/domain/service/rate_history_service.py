@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.repository.rate_history_repository import RateHistoryRepository, as_utc
+from app.gateways.database.database_gateway import get_session_factory
+from app.gateways.external_api.apilayer_gateway import fetch_rate_timeseries
+from app.utils.config.metrics import Counter
+
+RATE_HISTORY_FLUSH_INTERVAL = float(os.getenv("RATE_HISTORY_FLUSH_INTERVAL", "10"))
+RATE_HISTORY_MAX_POINTS = int(os.getenv("RATE_HISTORY_MAX_POINTS", "1000"))
+RATE_HISTORY_TARGET_POINTS = int(os.getenv("RATE_HISTORY_TARGET_POINTS", "400"))
+RATE_HISTORY_DEFAULT_DAYS = int(os.getenv("RATE_HISTORY_DEFAULT_DAYS", "30"))
+RATE_HISTORY_BACKFILL_MAX_DAYS = int(os.getenv("RATE_HISTORY_BACKFILL_MAX_DAYS", "365"))
+RATE_HISTORY_MINUTE_RETENTION_DAYS = int(os.getenv("RATE_HISTORY_MINUTE_RETENTION_DAYS", "7"))
+RATE_HISTORY_HOUR_RETENTION_DAYS = int(os.getenv("RATE_HISTORY_HOUR_RETENTION_DAYS", "180"))
+
+TIER_SECONDS = {"minute": 60, "hour": 3600, "day": 86400}
+INTERVAL_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+INTERVAL_PATTERN = re.compile(r"^(\d+)([mhdw])$")
+AUTO_INTERVALS = ("1m", "5m", "15m", "1h", "4h", "1d", "1w")
+PRUNE_EVERY_SECONDS = 3600
+
+logger = logging.getLogger(__name__)
+
+rate_history_backfilled_bars_total = Counter(
+    "rate_history_backfilled_bars_total", "Daily rate bars backfilled from upstream"
+)
+
+# (from, to, minute) -> [open, high, low, close, samples]
+_samples: dict[tuple[str, str, datetime], list] = {}
+_last_prune = 0.0
+
+
+def parse_interval(value: str) -> int:
+    match = INTERVAL_PATTERN.match(value or "")
+    seconds = int(match.group(1)) * INTERVAL_UNITS[match.group(2)] if match else 0
+    if seconds <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid interval {value!r}. Use a number followed by m, h, d or w, e.g. 15m, 4h, 1d"
+        )
+    return seconds
+
+
+def tier_for(interval_seconds: int) -> str:
+    # The coarsest stored resolution that still divides the requested one.
+    for tier in ("day", "hour", "minute"):
+        if interval_seconds % TIER_SECONDS[tier] == 0:
+            return tier
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Interval must be a whole number of minutes")
+
+
+def auto_interval(start: datetime, end: datetime) -> str:
+    span = (end - start).total_seconds()
+    for interval in AUTO_INTERVALS:
+        if span / parse_interval(interval) <= RATE_HISTORY_TARGET_POINTS:
+            return interval
+    return AUTO_INTERVALS[-1]
+
+
+def floor_time(value: datetime, seconds: int) -> datetime:
+    timestamp = value.timestamp()
+    return datetime.fromtimestamp(timestamp - timestamp % seconds, timezone.utc)
+
+
+def _fold(bars, seconds: int) -> list[tuple]:
+    # bars are (bucket_start, open, high, low, close) ordered by time.
+    folded = []
+    for bucket_start, open_, high, low, close in bars:
+        bucket = floor_time(bucket_start, seconds)
+        if folded and folded[-1][0] == bucket:
+            _, first_open, top, bottom, _ = folded[-1]
+            folded[-1] = (bucket, first_open, max(top, high), min(bottom, low), close)
+        else:
+            folded.append((bucket, open_, high, low, close))
+    return folded
+
+
+def record_rate_sample(from_currency: str, to_currency: str, rate: float, at: Optional[float] = None):
+    at = time.time() if at is None else at
+    key = (from_currency, to_currency, datetime.fromtimestamp(at - at % 60, timezone.utc))
+    bar = _samples.get(key)
+    if bar is None:
+        _samples[key] = [rate, rate, rate, rate, 1]
+    else:
+        bar[1] = max(bar[1], rate)
+        bar[2] = min(bar[2], rate)
+        bar[3] = rate
+        bar[4] += 1
+
+
+def _rollup(minute_rows: list[dict], tier: str) -> list[dict]:
+    seconds = TIER_SECONDS[tier]
+    rolled: dict[tuple, dict] = {}
+    for row in minute_rows:
+        key = (row["from_currency"], row["to_currency"], floor_time(row["bucket_start"], seconds))
+        bar = rolled.get(key)
+        if bar is None:
+            rolled[key] = {**row, "interval": tier, "bucket_start": key[2]}
+        else:
+            bar["high"] = max(bar["high"], row["high"])
+            bar["low"] = min(bar["low"], row["low"])
+            bar["close"] = row["close"]
+            bar["samples"] += row["samples"]
+    return list(rolled.values())
+
+
+async def flush_rate_samples(db: AsyncSession) -> int:
+    global _samples
+
+    if not _samples:
+        return 0
+    samples, _samples = _samples, {}
+
+    minute_rows = [
+        {
+            "from_currency": from_currency,
+            "to_currency": to_currency,
+            "interval": "minute",
+            "bucket_start": bucket_start,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "samples": count,
+        }
+        for (from_currency, to_currency, bucket_start), (open_, high, low, close, count)
+        in sorted(samples.items(), key=lambda item: item[0][2])
+    ]
+    rows = minute_rows + _rollup(minute_rows, "hour") + _rollup(minute_rows, "day")
+    try:
+        await RateHistoryRepository(db).merge(rows)
+    except BaseException:
+        _restore_samples(samples)
+        raise
+    return len(minute_rows)
+
+
+def _restore_samples(samples: dict[tuple[str, str, datetime], list]):
+    # The merge rolled back: put the bars back for the next flush, in front
+    # of anything sampled while it ran.
+    for key, (open_, high, low, close, count) in samples.items():
+        newer = _samples.get(key)
+        if newer is None:
+            _samples[key] = [open_, high, low, close, count]
+        else:
+            _samples[key] = [open_, max(high, newer[1]), min(low, newer[2]), newer[3], count + newer[4]]
+
+
+async def prune_rate_history(db: AsyncSession, now: Optional[datetime] = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    repo = RateHistoryRepository(db)
+    pruned = await repo.prune("minute", now - timedelta(days=RATE_HISTORY_MINUTE_RETENTION_DAYS))
+    pruned += await repo.prune("hour", now - timedelta(days=RATE_HISTORY_HOUR_RETENTION_DAYS))
+    return pruned
+
+
+async def run_rate_history_flusher(interval: float = RATE_HISTORY_FLUSH_INTERVAL):
+    global _last_prune
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with get_session_factory()() as session:
+                flushed = await flush_rate_samples(session)
+                if time.monotonic() - _last_prune >= PRUNE_EVERY_SECONDS:
+                    _last_prune = time.monotonic()
+                    await prune_rate_history(session)
+            logger.debug(f"Flushed {flushed} minute rate bars")
+        except Exception as ex:
+            logger.warning(f"Rate history flush failed: {ex}")
+
+
+class RateHistoryService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repo = RateHistoryRepository(db)
+
+    async def get_history(self, from_currency: str, to_currency: str, start: Optional[datetime] = None,
+                          end: Optional[datetime] = None, interval: Optional[str] = None) -> dict:
+        end = as_utc(end) if end else datetime.now(timezone.utc)
+        start = as_utc(start) if start else end - timedelta(days=RATE_HISTORY_DEFAULT_DAYS)
+        if start >= end:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+
+        interval = interval or auto_interval(start, end)
+        seconds = parse_interval(interval)
+        points = (end - start).total_seconds() / seconds
+        if points > RATE_HISTORY_MAX_POINTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Range would return {int(points)} points, the maximum is {RATE_HISTORY_MAX_POINTS}. "
+                       f"Use a coarser interval."
+            )
+
+        tier = tier_for(seconds)
+        tier_start = floor_time(start, TIER_SECONDS[tier])
+        if tier == "day":
+            await self.backfill_days(from_currency, to_currency, tier_start.date(),
+                                     (end - timedelta(microseconds=1)).date())
+
+        bars = await self.repo.get_bars(from_currency, to_currency, tier, tier_start, end)
+        if seconds != TIER_SECONDS[tier]:
+            bars = _fold(bars, seconds)
+
+        return {
+            "from_currency": from_currency,
+            "to_currency": to_currency,
+            "interval": interval,
+            "tier": tier,
+            "start": start,
+            "end": end,
+            "points": [
+                {"timestamp": bucket_start, "open": open_, "high": high, "low": low, "close": close}
+                for bucket_start, open_, high, low, close in bars
+            ],
+        }
+
+    async def backfill_days(self, from_currency: str, to_currency: str, first: date, last: date) -> int:
+        # Upstream only has daily history; minute and hour bars come from
+        # the rates this service fetches live.
+        last = min(last, datetime.now(timezone.utc).date())
+        if first > last:
+            return 0
+
+        existing = await self.repo.existing_days(
+            from_currency, to_currency,
+            datetime.combine(first, datetime.min.time(), timezone.utc),
+            datetime.combine(last + timedelta(days=1), datetime.min.time(), timezone.utc)
+        )
+        inserted = 0
+        for range_start, range_end in _missing_ranges(first, last, existing):
+            try:
+                rates = await fetch_rate_timeseries(from_currency, to_currency, range_start, range_end)
+            except HTTPException as ex:
+                logger.warning(f"Backfill {from_currency}->{to_currency} {range_start}..{range_end} failed: "
+                               f"{ex.detail}")
+                continue
+
+            rows = [
+                {
+                    "from_currency": from_currency,
+                    "to_currency": to_currency,
+                    "interval": "day",
+                    "bucket_start": datetime.combine(day, datetime.min.time(), timezone.utc),
+                    "open": rate,
+                    "high": rate,
+                    "low": rate,
+                    "close": rate,
+                    "samples": 1,
+                }
+                for day, rate in sorted(rates.items())
+                if range_start <= day <= range_end
+            ]
+            inserted += await self.repo.insert_missing(rows)
+            rate_history_backfilled_bars_total.inc(amount=len(rows))
+        return inserted
+
+
+def _missing_ranges(first: date, last: date, existing: set[date]) -> list[tuple[date, date]]:
+    ranges = []
+    day = first
+    while day <= last:
+        if day in existing:
+            day += timedelta(days=1)
+            continue
+        range_start = day
+        while (day + timedelta(days=1) <= last and day + timedelta(days=1) not in existing
+               and (day - range_start).days + 1 < RATE_HISTORY_BACKFILL_MAX_DAYS):
+            day += timedelta(days=1)
+        ranges.append((range_start, day))
+        day += timedelta(days=1)
+    return ranges
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Iterable, Optional
+
+from app.gateways.external_api import apilayer_gateway
+from app.utils.config.metrics import Counter, Gauge
+
+TICKER_POLL_INTERVAL = float(os.getenv("TICKER_POLL_INTERVAL", "2"))
+TICKER_HEARTBEAT_INTERVAL = float(os.getenv("TICKER_HEARTBEAT_INTERVAL", "15"))
+TICKER_MAX_PAIRS = int(os.getenv("TICKER_MAX_PAIRS", "20"))
+TICKER_MAX_CLIENTS = int(os.getenv("TICKER_MAX_CLIENTS", "5000"))
+TICKER_RETRY_MS = 3000
+
+logger = logging.getLogger(__name__)
+
+ticker_clients = Gauge("ticker_clients", "Clients connected to the rate stream")
+ticker_polls_total = Counter("ticker_polls_total", "Rate lookups made by the shared ticker poller")
+ticker_ticks_dropped_total = Counter(
+    "ticker_ticks_dropped_total", "Ticks replaced by a newer one before a slow client read them"
+)
+
+
+class TickerSubscription:
+    # Holds at most one pending tick per pair: a newer tick replaces the one
+    # a slow client hasn't read yet, so memory per client is bounded by the
+    # number of pairs and the poller never waits on a client.
+
+    def __init__(self, pairs: Iterable[tuple[str, str]]):
+        self.pairs = frozenset(pairs)
+        self._pending: dict[tuple[str, str], dict] = {}
+        self._event = asyncio.Event()
+        self.closed = False
+
+    def offer(self, pair: tuple[str, str], tick: dict):
+        if pair in self._pending:
+            ticker_ticks_dropped_total.inc()
+        self._pending[pair] = tick
+        self._event.set()
+
+    def close(self):
+        self.closed = True
+        self._event.set()
+
+    async def next_ticks(self, timeout: float) -> list[dict]:
+        if not self._pending and not self.closed:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._event.clear()
+        ticks, self._pending = list(self._pending.values()), {}
+        return ticks
+
+
+class RateTicker:
+    # One poller per worker, whatever the number of clients: each interval it
+    # looks up every pair someone is subscribed to once (through the shared
+    # table and rate cache) and fans changed rates out to the subscriptions.
+
+    def __init__(self, interval: float = TICKER_POLL_INTERVAL):
+        self.interval = interval
+        self._subscriptions: dict[tuple[str, str], set[TickerSubscription]] = {}
+        self._latest: dict[tuple[str, str], dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.clients = 0
+
+    @property
+    def full(self) -> bool:
+        return self.clients >= TICKER_MAX_CLIENTS
+
+    def subscribe(self, pairs: Iterable[tuple[str, str]]) -> TickerSubscription:
+        subscription = TickerSubscription(pairs)
+        for pair in subscription.pairs:
+            self._subscriptions.setdefault(pair, set()).add(subscription)
+            if pair in self._latest:
+                subscription.offer(pair, self._latest[pair])
+        self.clients += 1
+        ticker_clients.set(self.clients)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: TickerSubscription):
+        for pair in subscription.pairs:
+            subscribers = self._subscriptions.get(pair)
+            if subscribers is None or subscription not in subscribers:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscriptions[pair]
+        self.clients -= 1
+        ticker_clients.set(self.clients)
+
+        if not self._subscriptions and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def publish(self, from_currency: str, to_currency: str, rate: float, timestamp: Optional[float] = None):
+        pair = (from_currency, to_currency)
+        latest = self._latest.get(pair)
+        if latest is not None and latest["rate"] == rate:
+            return
+        tick = {
+            "from": from_currency,
+            "to": to_currency,
+            "rate": rate,
+            "timestamp": int(timestamp if timestamp is not None else time.time())
+        }
+        self._latest[pair] = tick
+        for subscription in self._subscriptions.get(pair, ()):
+            subscription.offer(pair, tick)
+
+    async def poll_once(self) -> int:
+        pairs = list(self._subscriptions)
+        results = await asyncio.gather(
+            *(apilayer_gateway.fetch_exchange_rate(f, t, 1) for f, t in pairs),
+            return_exceptions=True
+        )
+        ticker_polls_total.inc(amount=len(pairs))
+
+        published = 0
+        for (from_currency, to_currency), result in zip(pairs, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Ticker could not fetch {from_currency}->{to_currency}: {result}")
+                continue
+            self.publish(from_currency, to_currency, result["rate"], result.get("info", {}).get("timestamp"))
+            published += 1
+        return published
+
+    async def _run(self):
+        while self._subscriptions:
+            try:
+                await self.poll_once()
+            except Exception as ex:
+                logger.warning(f"Ticker poll failed: {ex}")
+            await asyncio.sleep(self.interval)
+
+    async def close(self):
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in subscriptions:
+                subscription.close()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+def parse_pairs(value: str) -> list[tuple[str, str]]:
+    pairs = []
+    for item in value.split(","):
+        from_currency, _, to_currency = item.strip().upper().partition(":")
+        if from_currency and to_currency and (from_currency, to_currency) not in pairs:
+            pairs.append((from_currency, to_currency))
+    return pairs
+
+
+async def event_stream(ticker: RateTicker, pairs: list[tuple[str, str]],
+                       heartbeat: float = TICKER_HEARTBEAT_INTERVAL):
+    # Subscribing inside the generator ties the subscription to the
+    # response body: it's released in finally when the client goes away.
+    subscription = ticker.subscribe(pairs)
+    try:
+        yield f"retry: {TICKER_RETRY_MS}\n\n"
+        while not subscription.closed:
+            ticks = await subscription.next_ticks(heartbeat)
+            if ticks:
+                yield "".join(f"event: rate\ndata: {json.dumps(tick)}\n\n" for tick in ticks)
+            elif not subscription.closed:
+                yield ": keepalive\n\n"
+    finally:
+        ticker.unsubscribe(subscription)
+
+
+rate_ticker = RateTicker()
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import os
+
+from fastapi import HTTPException, status
+
+from app.domain.repository.user_repository import UserRepository
+from app.gateways.database.database_gateway import get_session_factory
+
+USER_DELETION_RETRIES = int(os.getenv("USER_DELETION_RETRIES", "3"))
+USER_DELETION_RETRY_DELAY = float(os.getenv("USER_DELETION_RETRY_DELAY", "1"))
+USER_DELETION_SWEEP_INTERVAL = float(os.getenv("USER_DELETION_SWEEP_INTERVAL", "300"))
+
+logger = logging.getLogger(__name__)
+
+
+async def delete_user(user_id: int, retries: int = USER_DELETION_RETRIES) -> bool:
+    # Each attempt resumes from the last committed batch. A user that is gone
+    # already counts as deleted.
+    for attempt in range(1, retries + 1):
+        try:
+            async with get_session_factory()() as session:
+                await UserRepository(session).delete(user_id)
+            logger.info(f"User {user_id} deleted in the background")
+            return True
+        except HTTPException as ex:
+            if ex.status_code == status.HTTP_404_NOT_FOUND:
+                return True
+            error = ex.detail
+        except Exception as ex:
+            error = ex
+        logger.warning(f"Deleting user {user_id} failed (attempt {attempt}/{retries}): {error}")
+        if attempt < retries:
+            await asyncio.sleep(USER_DELETION_RETRY_DELAY * attempt)
+    logger.error(f"Could not delete user {user_id}; the deletion sweep will retry it")
+    return False
+
+
+async def delete_pending_users(limit: int = 100) -> int:
+    async with get_session_factory()() as session:
+        user_ids = await UserRepository(session).pending_deletions(limit)
+    deleted = 0
+    for user_id in user_ids:
+        deleted += await delete_user(user_id, retries=1)
+    return deleted
+
+
+async def run_user_deletion_sweeper(interval: float = USER_DELETION_SWEEP_INTERVAL):
+    # Picks up deletions whose background task failed or was lost to a
+    # restart. The user can't log in to ask again, so only the marker left
+    # by the request brings them back here.
+    while True:
+        try:
+            deleted = await delete_pending_users()
+            if deleted:
+                logger.info(f"Deletion sweep removed {deleted} deactivated users")
+        except Exception as ex:
+            logger.warning(f"User deletion sweep failed: {ex}")
+        await asyncio.sleep(interval)
@@ -1,18 +1,19 @@
-from sqlalchemy import Column, ForeignKey, DateTime, Integer, String, Float, Boolean
+from sqlalchemy import Column, ForeignKey, DateTime, Integer, String, Float, Boolean, Index, Text, UniqueConstraint
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 from sqlalchemy.sql import func
 from datetime import datetime, timedelta, timezone
-from passlib.context import CryptContext
+from typing import Optional
 import uuid
 
-Base = declarative_base()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.gateways.database.database_gateway import Base
 
 
 class CurrencyConversionTransaction(Base):
     __tablename__ = 'currency_conversion_transactions'
+    __table_args__ = (
+        UniqueConstraint('user_id', 'idempotency_key', name='uq_transactions_user_idempotency_key'),
+    )
 
     transaction_id: Mapped[str] = mapped_column(
         String(36),
@@ -22,7 +23,7 @@ class CurrencyConversionTransaction(Base):
     )
     user_id: Mapped[int] = mapped_column(
         Integer,
-        ForeignKey('users.id'),
+        ForeignKey('users.id', ondelete="CASCADE"),
         nullable=False,
         index=True
     )
@@ -36,6 +37,7 @@ class CurrencyConversionTransaction(Base):
         server_default=func.now(),
         nullable=False
     )
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
     user: Mapped["User"] = relationship("User", back_populates="transactions")
 
@@ -68,15 +70,25 @@ class User(Base):
         server_default=func.now(),
         nullable=False
     )
+    # Set when the user asks for their account to be deleted; cleared only by
+    # the deletion itself.
+    deletion_requested_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
 
+    # The database deletes a user's rows (ON DELETE CASCADE); passive_deletes
+    # keeps the ORM from loading them first.
     sessions: Mapped[list["UserSession"]] = relationship(
         "UserSession",
         back_populates="user",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     transactions: Mapped[list["CurrencyConversionTransaction"]] = relationship(
         "CurrencyConversionTransaction",
-        back_populates="user"
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
 
     def __repr__(self):
@@ -113,7 +125,10 @@ class UserSession(Base):
     @property
     def is_expired(self):
         if self.expires_at:
-            return datetime.now(timezone.utc) > self.expires_at
+            expires_at = self.expires_at
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            return datetime.now(timezone.utc) > expires_at
         return False
 
     @staticmethod
@@ -125,3 +140,61 @@ class UserSession(Base):
         )
         db.add(session)
         return session
+
+
+class ExchangeRateBar(Base):
+    __tablename__ = 'exchange_rate_bars'
+    __table_args__ = (
+        Index('ix_exchange_rate_bars_interval_bucket', 'interval', 'bucket_start'),
+    )
+
+    from_currency: Mapped[str] = mapped_column(String(3), primary_key=True)
+    to_currency: Mapped[str] = mapped_column(String(3), primary_key=True)
+    interval: Mapped[str] = mapped_column(String(6), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    open: Mapped[float] = mapped_column(Float, nullable=False)
+    high: Mapped[float] = mapped_column(Float, nullable=False)
+    low: Mapped[float] = mapped_column(Float, nullable=False)
+    close: Mapped[float] = mapped_column(Float, nullable=False)
+    samples: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return (f"<ExchangeRateBar({self.from_currency}->{self.to_currency}, {self.interval}, "
+                f"{self.bucket_start}, o={self.open}, h={self.high}, l={self.low}, c={self.close})>")
+
+
+class ConversionJob(Base):
+    __tablename__ = 'conversion_jobs'
+    __table_args__ = (
+        Index('ix_conversion_jobs_status_created_at', 'status', 'created_at'),
+    )
+
+    job_id: Mapped[str] = mapped_column(
+        String(36),
+        primary_key=True,
+        default=lambda: str(uuid.uuid4())
+    )
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey('users.id', ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="queued")
+    input: Mapped[str] = mapped_column(Text, nullable=False)
+    total_rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    processed_rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failed_rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    errors: Mapped[str] = mapped_column(Text, nullable=False, default="{}")
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return (f"<ConversionJob(job_id={self.job_id}, user_id={self.user_id}, status={self.status}, "
+                f"processed_rows={self.processed_rows}/{self.total_rows})>")
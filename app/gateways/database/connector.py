@@ -1,25 +1,123 @@
+import hashlib
 import logging
+from contextlib import AsyncExitStack
 from typing import AsyncGenerator
 
 from fastapi import HTTPException
-from sqlalchemy import inspect
+from sqlalchemy import Column, Integer, MetaData, String, Table, UniqueConstraint, inspect, select, text
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from starlette import status
 
-from app.gateways.database.database_gateway import engine, Base, SessionFactory
+from app.entities import entity  # noqa: F401 - registers the models on Base.metadata
+from app.gateways.database.database_gateway import (
+    DB_POOL_SIZE,
+    Base,
+    get_engine,
+    get_session_factory,
+    get_shard_engine,
+    get_shard_urls,
+)
 
 logger = logging.getLogger(__name__)
 
+# Kept out of Base.metadata so it doesn't take part in its own fingerprint.
+schema_version_table = Table(
+    "schema_version",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("version", String(64), nullable=False),
+)
 
-async def init_db():
+
+def schema_fingerprint() -> str:
+    parts = []
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        columns = ",".join(f"{column.name}:{column.type}" for column in table.columns)
+        parts.append(f"{table.name}({columns})")
+    # A new shard list also needs its tables checked.
+    parts.append(f"shards({','.join(get_shard_urls())})")
+    return hashlib.sha256(";".join(parts).encode()).hexdigest()
+
+
+def migrate_table(connection, inspector, table: Table) -> int:
+    # create_all skips tables that exist, so columns, indexes and unique
+    # constraints added to a model later are applied here. Additive only:
+    # new columns must be nullable or have a server default.
+    existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+    existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+    existing_indexes |= {constraint["name"] for constraint in inspector.get_unique_constraints(table.name)}
+    preparer = connection.dialect.identifier_preparer
+    table_name = preparer.format_table(table)
+
+    statements = []
+    for column in table.columns:
+        if column.name not in existing_columns:
+            ddl = CreateColumn(column).compile(dialect=connection.dialect)
+            statements.append(text(f"ALTER TABLE {table_name} ADD COLUMN {ddl}"))
+    for index in table.indexes:
+        if index.name not in existing_indexes:
+            statements.append(CreateIndex(index))
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint) and constraint.name and constraint.name not in existing_indexes:
+            # A unique index works everywhere; SQLite can't ALTER TABLE ADD CONSTRAINT.
+            columns = ", ".join(preparer.quote(column.name) for column in constraint.columns)
+            name = preparer.quote(constraint.name)
+            statements.append(text(f"CREATE UNIQUE INDEX {name} ON {table_name} ({columns})"))
+
+    for statement in statements:
+        logger.info(f"Migrating {table.name}: {statement}")
+        connection.execute(statement)
+    return len(statements)
+
+
+async def create_transactions_table(engine: AsyncEngine) -> bool:
+    # Shards hold only the transactions table. Users live in the main
+    # database, so the foreign key to users can't be created there.
+    table = entity.CurrencyConversionTransaction.__table__
     async with engine.begin() as conn:
+        def sync_migrate(connection):
+            inspector = inspect(connection)
+            if table.name not in inspector.get_table_names():
+                return False
+            migrate_table(connection, inspector, table)
+            return True
+
+        if await conn.run_sync(sync_migrate):
+            return False
+        await conn.execute(CreateTable(table, include_foreign_key_constraints=[]))
+        for index in table.indexes:
+            await conn.execute(CreateIndex(index))
+    return True
+
+
+async def init_shards() -> int:
+    for index in range(len(get_shard_urls())):
+        if await create_transactions_table(get_shard_engine(index)):
+            logger.info(f"Created the transactions table on shard {index}")
+    return len(get_shard_urls())
+
+
+async def init_db():
+    version = schema_fingerprint()
+    async with get_engine().begin() as conn:
         try:
-            def sync_inspect(connection):
+            await conn.run_sync(schema_version_table.create, checkfirst=True)
+            stored = (await conn.execute(select(schema_version_table.c.version))).scalar()
+            if stored == version:
+                logger.info("Schema version is current, skipping table checks.")
+                return
+
+            def sync_migrate(connection):
                 inspector = inspect(connection)
-                return inspector.get_table_names()
+                existing = inspector.get_table_names()
+                for table in Base.metadata.sorted_tables:
+                    if table.name in existing:
+                        migrate_table(connection, inspector, table)
+                return existing
 
-            existing_tables = await conn.run_sync(sync_inspect)
+            existing_tables = await conn.run_sync(sync_migrate)
             required_tables = [table.name for table in Base.metadata.tables.values()]
 
             if any(table not in existing_tables for table in required_tables):
@@ -27,14 +125,29 @@ async def init_db():
                 await conn.run_sync(Base.metadata.create_all)
             else:
                 logger.info("All tables are found.")
+
+            await init_shards()
+            await conn.execute(schema_version_table.delete())
+            await conn.execute(schema_version_table.insert().values(id=1, version=version))
         except SQLAlchemyError as ex:
             logger.error(f"Database creation error: {ex}")
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                                 detail="Database initialization error")
 
 
+async def warm_pool(connections: int) -> int:
+    # Connections are held together so the pool really opens that many,
+    # instead of handing the same one back each time.
+    connections = min(connections, DB_POOL_SIZE)
+    async with AsyncExitStack() as stack:
+        for _ in range(connections):
+            conn = await stack.enter_async_context(get_engine().connect())
+            await conn.execute(text("SELECT 1"))
+    return connections
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with SessionFactory() as session:
+    async with get_session_factory()() as session:
         try:
             yield session
         finally:
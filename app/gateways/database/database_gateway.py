@@ -1,10 +1,11 @@
 import os
-from typing import Any, Type, TypeVar, Optional
-from dotenv import load_dotenv
+import zlib
+from typing import Any, AsyncIterator, Iterable, Iterator, Optional, Sequence, Type, TypeVar
 from fastapi import HTTPException, status
-from sqlalchemy import select, update, delete
+from sqlalchemy import event, select, update, delete, insert
 from sqlalchemy.ext.asyncio import (
     AsyncAttrs,
+    AsyncEngine,
     async_sessionmaker,
     create_async_engine,
     AsyncSession,
@@ -13,10 +14,39 @@ from sqlalchemy.exc import SQLAlchemyError, IntegrityError, NoResultFound
 from sqlalchemy.orm import DeclarativeBase, declared_attr
 from contextlib import asynccontextmanager
 
-load_dotenv()
+from app.gateways.database.query_instrumentation import install_query_instrumentation
+from app.utils.config.metrics import Gauge
 
 T = TypeVar('T', bound='Base')
 
+BULK_CHUNK_SIZE = int(os.getenv("DB_BULK_CHUNK_SIZE", "500"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Comma-separated database URLs; when set, conversion transactions are
+# spread over them by user and the main database keeps everything else.
+SHARD_URLS = os.getenv("SHARD_URLS", "")
+SHARD_POOL_SIZE = int(os.getenv("SHARD_POOL_SIZE", "5"))
+
+
+def _chunks(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def upsert_insert(db: AsyncSession):
+    # INSERT ... ON CONFLICT lives in the dialect modules.
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Upsert is not supported for dialect {dialect}"
+        )
+    return dialect_insert
+
 
 class Base(AsyncAttrs, DeclarativeBase):
     @declared_attr
@@ -26,7 +56,7 @@ class Base(AsyncAttrs, DeclarativeBase):
     @classmethod
     @asynccontextmanager
     async def get_session(cls):
-        async with SessionFactory() as session:
+        async with get_session_factory()() as session:
             try:
                 yield session
             except SQLAlchemyError as ex:
@@ -106,6 +136,155 @@ class Base(AsyncAttrs, DeclarativeBase):
                 detail=f"Delete failed: {str(ex)}"
             )
 
+    @classmethod
+    async def bulk_insert(
+            cls,
+            db: AsyncSession,
+            rows: Sequence[dict],
+            chunk_size: int = BULK_CHUNK_SIZE
+    ) -> int:
+        if not rows:
+            return 0
+        try:
+            inserted = 0
+            for chunk in _chunks(rows, chunk_size):
+                result = await db.execute(insert(cls.__table__), chunk)
+                inserted += result.rowcount
+            await db.commit()
+            return inserted
+        except IntegrityError as ex:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Integrity error: {str(ex)}"
+            )
+        except SQLAlchemyError as ex:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Bulk insert failed: {str(ex)}"
+            )
+
+    @classmethod
+    async def upsert(
+            cls,
+            db: AsyncSession,
+            rows: Sequence[dict],
+            index_elements: Optional[Sequence[str]] = None,
+            update_fields: Optional[Sequence[str]] = None,
+            chunk_size: int = BULK_CHUNK_SIZE
+    ) -> int:
+        if not rows:
+            return 0
+
+        dialect_insert = upsert_insert(db)
+        if index_elements is None:
+            index_elements = [column.name for column in cls.__table__.primary_key]
+        if update_fields is None:
+            update_fields = [key for key in rows[0] if key not in index_elements]
+
+        try:
+            affected = 0
+            for chunk in _chunks(rows, chunk_size):
+                stmt = dialect_insert(cls.__table__).values(list(chunk))
+                if update_fields:
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=index_elements,
+                        set_={field: stmt.excluded[field] for field in update_fields}
+                    )
+                else:
+                    stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+                result = await db.execute(stmt)
+                affected += result.rowcount
+            await db.commit()
+            return affected
+        except SQLAlchemyError as ex:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Upsert failed: {str(ex)}"
+            )
+
+    @classmethod
+    async def find_many(
+            cls: Type[T],
+            db: AsyncSession,
+            ids: Iterable[Any],
+            chunk_size: int = BULK_CHUNK_SIZE
+    ) -> list[T]:
+        primary_key = cls.__mapper__.primary_key[0]
+        unique_ids = list(dict.fromkeys(ids))
+        try:
+            found = []
+            for chunk in _chunks(unique_ids, chunk_size):
+                result = await db.execute(select(cls).where(primary_key.in_(chunk)))
+                found.extend(result.scalars().all())
+            return found
+        except SQLAlchemyError as ex:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Database error: {str(ex)}"
+            )
+
+    @classmethod
+    async def bulk_update(cls, db: AsyncSession, *where, **values) -> int:
+        if not where:
+            raise ValueError("bulk_update requires at least one predicate")
+        try:
+            result = await db.execute(
+                update(cls)
+                .where(*where)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            return result.rowcount
+        except IntegrityError as ex:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Integrity error: {str(ex)}"
+            )
+        except SQLAlchemyError as ex:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Bulk update failed: {str(ex)}"
+            )
+
+    @classmethod
+    async def bulk_delete(cls, db: AsyncSession, *where, batch_size: Optional[int] = None) -> int:
+        # With batch_size, rows go batch_size at a time, each batch in its own
+        # transaction, so a huge delete doesn't hold locks or grow the WAL in
+        # one go.
+        if not where:
+            raise ValueError("bulk_delete requires at least one predicate")
+        try:
+            if batch_size is None:
+                result = await db.execute(
+                    delete(cls)
+                    .where(*where)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+                return result.rowcount
+
+            primary_key = cls.__mapper__.primary_key[0]
+            batch = delete(cls).where(primary_key.in_(select(primary_key).where(*where).limit(batch_size)))
+            deleted = 0
+            while True:
+                result = await db.execute(batch.execution_options(synchronize_session=False))
+                await db.commit()
+                deleted += result.rowcount
+                if result.rowcount < batch_size:
+                    return deleted
+        except SQLAlchemyError as ex:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Bulk delete failed: {str(ex)}"
+            )
+
 
 USE_SQLITE = os.getenv("USE_SQLITE", "false").lower() == "true"
 DB_ENGINE = os.getenv("DB_ENGINE", "postgresql").lower()
@@ -125,18 +304,150 @@ else:
 
     DB_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-engine = create_async_engine(
-    DB_URL,
-    echo=False,
-    pool_size=20,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=3600
-)
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
 
-SessionFactory = async_sessionmaker(
-    bind=engine,
-    autoflush=False,
-    expire_on_commit=False,
-    class_=AsyncSession
-)
+
+def enable_sqlite_foreign_keys(engine: AsyncEngine):
+    # SQLite ignores foreign keys, ON DELETE CASCADE included, unless each
+    # connection turns them on.
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _foreign_keys(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def get_engine() -> AsyncEngine:
+    # Built on first use so importing the app doesn't load the DB driver.
+    global _engine
+
+    if _engine is None:
+        _engine = create_async_engine(
+            DB_URL,
+            echo=False,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=30,
+            pool_recycle=3600
+        )
+        install_query_instrumentation(_engine)
+        enable_sqlite_foreign_keys(_engine)
+    return _engine
+
+
+def get_session_factory() -> async_sessionmaker:
+    global _session_factory
+
+    if _session_factory is None:
+        _session_factory = async_sessionmaker(
+            bind=get_engine(),
+            autoflush=False,
+            expire_on_commit=False,
+            class_=AsyncSession
+        )
+    return _session_factory
+
+
+async def dispose_engine():
+    global _engine, _session_factory
+
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        _session_factory = None
+    await dispose_shard_engines()
+
+
+def parse_shard_urls(value: str) -> list[str]:
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+_shard_urls: list[str] = parse_shard_urls(SHARD_URLS)
+_shard_engines: dict[int, AsyncEngine] = {}
+_shard_session_factories: dict[int, async_sessionmaker] = {}
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    # Jump consistent hash (Lamping & Veach): going from N to N+1 buckets
+    # moves only 1/(N+1) of the keys, so adding a shard is a small rebalance.
+    bucket, candidate = -1, 0
+    while candidate < buckets:
+        bucket = candidate
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        candidate = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_for_user(user_id: int, shards: Optional[int] = None) -> int:
+    shards = len(_shard_urls) if shards is None else shards
+    return jump_hash(zlib.crc32(str(user_id).encode()), shards)
+
+
+def get_shard_urls() -> list[str]:
+    return list(_shard_urls)
+
+
+def sharding_enabled() -> bool:
+    return bool(_shard_urls)
+
+
+async def set_shard_urls(urls: Sequence[str]):
+    global _shard_urls
+
+    await dispose_shard_engines()
+    _shard_urls = list(urls)
+
+
+def get_shard_engine(index: int) -> AsyncEngine:
+    engine = _shard_engines.get(index)
+    if engine is None:
+        engine = _shard_engines[index] = create_async_engine(
+            _shard_urls[index],
+            echo=False,
+            pool_size=SHARD_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=30,
+            pool_recycle=3600
+        )
+        install_query_instrumentation(engine)
+    return engine
+
+
+def get_shard_session_factory(index: int) -> async_sessionmaker:
+    factory = _shard_session_factories.get(index)
+    if factory is None:
+        factory = _shard_session_factories[index] = async_sessionmaker(
+            bind=get_shard_engine(index),
+            autoflush=False,
+            expire_on_commit=False,
+            class_=AsyncSession
+        )
+    return factory
+
+
+@asynccontextmanager
+async def shard_session(user_id: int) -> AsyncIterator[AsyncSession]:
+    async with get_shard_session_factory(shard_for_user(user_id))() as session:
+        yield session
+
+
+async def dispose_shard_engines():
+    engines = list(_shard_engines.values())
+    _shard_engines.clear()
+    _shard_session_factories.clear()
+    for engine in engines:
+        await engine.dispose()
+
+
+def _pool_stat(name: str):
+    stat = getattr(_engine.pool, name, None) if _engine is not None else None
+    return stat() if callable(stat) else 0
+
+
+Gauge("db_pool_size", "Configured DB pool size", callback=lambda: _pool_stat("size"))
+Gauge("db_pool_checked_out", "DB connections currently checked out", callback=lambda: _pool_stat("checkedout"))
+Gauge("db_pool_overflow", "DB connections opened beyond the pool size", callback=lambda: _pool_stat("overflow"))
@@ -0,0 +1,89 @@
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.utils.config.log import get_logger
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+
+logger = get_logger(__name__)
+
+
+class QueryStats:
+    __slots__ = ("count", "total_time", "slowest_time", "slowest_statement", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        self.statements[statement] += 1
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(statement, count) for statement, count in self.statements.items() if count > threshold]
+
+
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar('query_stats', default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started_at
+
+    stats = query_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning(f"Slow query ({elapsed * 1000:.1f} ms): {statement}")
+
+
+def install_query_instrumentation(engine: AsyncEngine):
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def start_request_stats() -> QueryStats:
+    stats = QueryStats()
+    query_stats.set(stats)
+    return stats
+
+
+def finish_request_stats(stats: QueryStats, request: Request, response: Response):
+    route = f"{request.method} {request.url.path}"
+
+    for statement, count in stats.repeated(N_PLUS_ONE_THRESHOLD):
+        logger.warning(f"Possible N+1 in {route}: statement executed {count} times: {statement}")
+
+    if stats.count:
+        logger.debug(
+            f"{route} ran {stats.count} queries in {stats.total_time * 1000:.1f} ms "
+            f"(slowest {stats.slowest_time * 1000:.1f} ms: {stats.slowest_statement})"
+        )
+
+    if DEBUG:
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = f"{stats.total_time * 1000:.2f}"
+        response.headers["X-DB-Slowest-Ms"] = f"{stats.slowest_time * 1000:.2f}"
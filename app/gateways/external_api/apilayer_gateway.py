@@ -1,33 +1,185 @@
+import asyncio
 import logging
 import os
+import time
+from datetime import date, datetime, timezone
+from typing import TYPE_CHECKING, Callable, Optional
 
-import requests
-from dotenv import load_dotenv
 from fastapi import HTTPException
 
-load_dotenv()
+from app.gateways.external_api.shared_rate_table import SharedRateTable
+from app.utils.config.metrics import Counter, Gauge, Histogram
+from app.utils.deadline import deadline_stage
+
+if TYPE_CHECKING:
+    import httpx
+
 APIKEY = os.getenv("APIKEY")
 API_URL = os.getenv("API_URL")
+# apilayer serves /timeseries next to /convert.
+API_TIMESERIES_URL = os.getenv("API_TIMESERIES_URL") or (f"{API_URL.rsplit('/', 1)[0]}/timeseries" if API_URL else None)
+API_SYMBOLS_URL = os.getenv("API_SYMBOLS_URL") or (f"{API_URL.rsplit('/', 1)[0]}/symbols" if API_URL else None)
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "10"))
+RATE_CACHE_TTL = float(os.getenv("RATE_CACHE_TTL", "60"))
+SHARED_RATE_TABLE_PATH = os.getenv("SHARED_RATE_TABLE_PATH", "")
+SHARED_RATE_REFRESH_INTERVAL = float(os.getenv("SHARED_RATE_REFRESH_INTERVAL", "30"))
+SHARED_RATE_MAX_AGE = float(os.getenv("SHARED_RATE_MAX_AGE", str(SHARED_RATE_REFRESH_INTERVAL * 3)))
+# Two intervals, so a lookup made while the last refresh was running still counts.
+SHARED_RATE_DEMAND_WINDOW = float(os.getenv("SHARED_RATE_DEMAND_WINDOW", str(SHARED_RATE_REFRESH_INTERVAL * 2)))
+
+SUPPORTED_CURRENCIES = ("BRL", "USD", "EUR", "JPY")
 
 logger = logging.getLogger(__name__)
 
+upstream_request_duration_seconds = Histogram(
+    "upstream_request_duration_seconds", "apilayer request latency", ("endpoint",)
+)
+upstream_errors_total = Counter("upstream_errors_total", "apilayer request errors", ("endpoint", "reason"))
+rate_cache_requests_total = Counter("rate_cache_requests_total", "Exchange rate cache lookups", ("result",))
+shared_rate_writer = Gauge("shared_rate_writer", "1 when this worker refreshes the shared rate table")
+
+_client: Optional["httpx.AsyncClient"] = None
+# (from, to) -> (expires_at, rate, info, date); rates don't depend on the amount.
+_rate_cache: dict[tuple[str, str], tuple[float, float, dict, str]] = {}
+_shared_table: Optional[SharedRateTable] = None
+_rate_listeners: list[Callable[[str, str, float], None]] = []
+
+
+def get_http_client() -> "httpx.AsyncClient":
+    # httpx pulls in its CLI dependencies on import, so load it with the first client.
+    import httpx
+
+    global _client
+
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(timeout=UPSTREAM_TIMEOUT)
+    return _client
+
+
+async def close_http_client():
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def add_rate_listener(listener: Callable[[str, str, float], None]):
+    if listener not in _rate_listeners:
+        _rate_listeners.append(listener)
+
+
+def remove_rate_listener(listener: Callable[[str, str, float], None]):
+    if listener in _rate_listeners:
+        _rate_listeners.remove(listener)
+
+
+def _notify_rate(from_currency: str, to_currency: str, rate: float):
+    for listener in _rate_listeners:
+        try:
+            listener(from_currency, to_currency, rate)
+        except Exception as ex:
+            logger.warning(f"Rate listener failed for {from_currency}->{to_currency}: {ex}")
+
+
+def clear_rate_cache():
+    _rate_cache.clear()
+
+
+def open_shared_rate_table() -> Optional[SharedRateTable]:
+    global _shared_table
+
+    if SHARED_RATE_TABLE_PATH and _shared_table is None:
+        _shared_table = SharedRateTable(SHARED_RATE_TABLE_PATH, SUPPORTED_CURRENCIES)
+        shared_rate_writer.set(0)
+    return _shared_table
+
+
+def close_shared_rate_table():
+    global _shared_table
+
+    if _shared_table is not None:
+        _shared_table.close()
+        _shared_table = None
+        shared_rate_writer.set(0)
+
+
+def _shared_rate(from_currency: str, to_currency: str, amount: float):
+    entry = _shared_table.read(from_currency, to_currency)
+    if entry is None or time.time() - entry[1] > SHARED_RATE_MAX_AGE:
+        return None
+
+    rate, updated_at = entry
+    return {
+        "rate": rate,
+        "result": round(amount * rate, 6),
+        "query": {"from": from_currency, "to": to_currency, "amount": amount},
+        "info": {"rate": rate, "timestamp": int(updated_at)},
+        "date": datetime.fromtimestamp(updated_at, timezone.utc).date().isoformat()
+    }
+
+
+def _cached_rate(from_currency: str, to_currency: str, amount: float):
+    entry = _rate_cache.get((from_currency, to_currency))
+    if entry is None or entry[0] <= time.monotonic():
+        return None
+
+    _, rate, info, date = entry
+    return {
+        "rate": rate,
+        "result": round(amount * rate, 6),
+        "query": {"from": from_currency, "to": to_currency, "amount": amount},
+        "info": info,
+        "date": date
+    }
+
+
+async def fetch_exchange_rate(from_currency: str, to_currency: str, amount: float):
+    if _shared_table is not None:
+        _shared_table.mark_requested(from_currency, to_currency)
+        shared = _shared_rate(from_currency, to_currency, amount)
+        if shared:
+            rate_cache_requests_total.inc("shared_hit")
+            return shared
+
+    if RATE_CACHE_TTL > 0:
+        cached = _cached_rate(from_currency, to_currency, amount)
+        rate_cache_requests_total.inc("hit" if cached else "miss")
+        if cached:
+            return cached
+
+    return await _request_rate(from_currency, to_currency, amount)
+
+
+async def _request_rate(from_currency: str, to_currency: str, amount: float):
+    import httpx
 
-def fetch_exchange_rate(from_currency: str, to_currency: str, amount: float):
     url = f"{API_URL}?from={from_currency}&to={to_currency}&amount={amount}"
     headers = {
-        'apikey': APIKEY
+        'apikey': APIKEY or ""
     }
 
     try:
-        response = requests.get(url, headers=headers)
+        started_at = time.perf_counter()
+        try:
+            async with deadline_stage("upstream"):
+                response = await get_http_client().get(url, headers=headers)
+        finally:
+            upstream_request_duration_seconds.observe(time.perf_counter() - started_at, "convert")
 
         if response.status_code != 200:
             logger.error(f"Error response from API: {response.status_code} - {response.text}")
+            upstream_errors_total.inc("convert", f"status_{response.status_code}")
             raise HTTPException(status_code=response.status_code, detail="Error fetching exchange rate")
 
         data = response.json()
 
         if data.get("success"):
+            _notify_rate(from_currency, to_currency, data["info"]["rate"])
+            if RATE_CACHE_TTL > 0:
+                _rate_cache[(from_currency, to_currency)] = (
+                    time.monotonic() + RATE_CACHE_TTL, data["info"]["rate"], data["info"], data["date"]
+                )
             return {
                 "rate": data["info"]["rate"],
                 "result": data["result"],
@@ -36,12 +188,152 @@ def fetch_exchange_rate(from_currency: str, to_currency: str, amount: float):
                 "date": data["date"]
             }
         else:
+            upstream_errors_total.inc("convert", "unsuccessful_response")
             raise HTTPException(status_code=400, detail="Failed to fetch valid exchange rate")
 
-    except requests.exceptions.RequestException as e:
+    except HTTPException:
+        raise
+
+    except httpx.HTTPError as e:
         logger.error(f"Request error: {str(e)}")
+        upstream_errors_total.inc("convert", "request_error")
         raise HTTPException(status_code=500, detail=f"Request error: {str(e)}")
 
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
+        upstream_errors_total.inc("convert", "unexpected")
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+async def fetch_rate_timeseries(
+        from_currency: str,
+        to_currency: str,
+        start_date: date,
+        end_date: date
+) -> dict[date, float]:
+    import httpx
+
+    params = {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "base": from_currency,
+        "symbols": to_currency
+    }
+    try:
+        started_at = time.perf_counter()
+        try:
+            async with deadline_stage("upstream"):
+                response = await get_http_client().get(
+                    API_TIMESERIES_URL, params=params, headers={'apikey': APIKEY or ""}
+                )
+        finally:
+            upstream_request_duration_seconds.observe(time.perf_counter() - started_at, "timeseries")
+
+        if response.status_code != 200:
+            logger.error(f"Error response from API: {response.status_code} - {response.text}")
+            upstream_errors_total.inc("timeseries", f"status_{response.status_code}")
+            raise HTTPException(status_code=response.status_code, detail="Error fetching exchange rate history")
+
+        data = response.json()
+        if not data.get("success"):
+            upstream_errors_total.inc("timeseries", "unsuccessful_response")
+            raise HTTPException(status_code=400, detail="Failed to fetch valid exchange rate history")
+
+        return {
+            date.fromisoformat(day): rates[to_currency]
+            for day, rates in data.get("rates", {}).items()
+            if to_currency in rates
+        }
+
+    except HTTPException:
+        raise
+
+    except httpx.HTTPError as e:
+        logger.error(f"Request error: {str(e)}")
+        upstream_errors_total.inc("timeseries", "request_error")
+        raise HTTPException(status_code=500, detail=f"Request error: {str(e)}")
+
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        upstream_errors_total.inc("timeseries", "unexpected")
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+async def fetch_currency_symbols() -> dict[str, str]:
+    import httpx
+
+    try:
+        started_at = time.perf_counter()
+        try:
+            response = await get_http_client().get(API_SYMBOLS_URL, headers={'apikey': APIKEY or ""})
+        finally:
+            upstream_request_duration_seconds.observe(time.perf_counter() - started_at, "symbols")
+
+        if response.status_code != 200:
+            logger.error(f"Error response from API: {response.status_code} - {response.text}")
+            upstream_errors_total.inc("symbols", f"status_{response.status_code}")
+            raise HTTPException(status_code=response.status_code, detail="Error fetching currency symbols")
+
+        data = response.json()
+        if not data.get("success") or not data.get("symbols"):
+            upstream_errors_total.inc("symbols", "unsuccessful_response")
+            raise HTTPException(status_code=400, detail="Failed to fetch valid currency symbols")
+        return data["symbols"]
+
+    except HTTPException:
+        raise
+
+    except httpx.HTTPError as e:
+        logger.error(f"Request error: {str(e)}")
+        upstream_errors_total.inc("symbols", "request_error")
+        raise HTTPException(status_code=500, detail=f"Request error: {str(e)}")
+
+
+async def prime_rate_cache(pairs: list[tuple[str, str]]) -> int:
+    results = await asyncio.gather(
+        *(fetch_exchange_rate(from_currency, to_currency, 1) for from_currency, to_currency in pairs),
+        return_exceptions=True
+    )
+    for (from_currency, to_currency), result in zip(pairs, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Could not prime rate {from_currency}->{to_currency}: {result}")
+    return sum(not isinstance(result, Exception) for result in results)
+
+
+async def refresh_shared_rates(table: SharedRateTable, demand_window: float = SHARED_RATE_DEMAND_WINDOW) -> int:
+    # Only pairs some worker looked up recently: refreshing every pair on
+    # every cycle would spend the upstream quota on rates nobody reads. The
+    # others are fetched on demand (and cached) like without the table.
+    since = time.time() - demand_window
+    pairs = [
+        (f, t) for f in table.currencies for t in table.currencies
+        if f != t and table.requested_at(f, t) >= since
+    ]
+    results = await asyncio.gather(*(_request_rate(f, t, 1) for f, t in pairs), return_exceptions=True)
+
+    updated_at = time.time()
+    for currency in table.currencies:
+        table.write(currency, currency, 1.0, updated_at)
+    refreshed = 0
+    for (from_currency, to_currency), result in zip(pairs, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Could not refresh shared rate {from_currency}->{to_currency}: {result}")
+            continue
+        table.write(from_currency, to_currency, result["rate"], updated_at)
+        refreshed += 1
+    return refreshed
+
+
+async def run_shared_rate_refresher(table: SharedRateTable, interval: float = SHARED_RATE_REFRESH_INTERVAL):
+    # Every worker runs this loop, but only the one holding the file lock
+    # calls upstream; the others keep trying so one of them takes over if
+    # the writer exits.
+    while True:
+        if table.try_become_writer():
+            shared_rate_writer.set(1)
+            try:
+                refreshed = await refresh_shared_rates(table)
+                logger.debug(f"Refreshed {refreshed} shared rates")
+            except Exception as ex:
+                logger.warning(f"Shared rate refresh failed: {ex}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.gateways.external_api import apilayer_gateway
+from app.gateways.external_api.apilayer_gateway import SUPPORTED_CURRENCIES
+from app.utils.config.metrics import Gauge
+
+CURRENCY_REGISTRY_REFRESH_INTERVAL = float(os.getenv("CURRENCY_REGISTRY_REFRESH_INTERVAL", "86400"))
+CURRENCY_REGISTRY_RETRY_INTERVAL = float(os.getenv("CURRENCY_REGISTRY_RETRY_INTERVAL", "300"))
+# Error messages list every code only while the list is short enough to read.
+INLINE_CURRENCY_LIST_LIMIT = 10
+CURRENCY_CODE = re.compile(r"^[A-Z]{3}$")
+
+FALLBACK_SYMBOLS = {
+    "BRL": "Brazilian Real",
+    "EUR": "Euro",
+    "JPY": "Japanese Yen",
+    "USD": "United States Dollar",
+}
+
+logger = logging.getLogger(__name__)
+
+currency_registry_size = Gauge("currency_registry_size", "Currencies accepted by the API")
+
+
+class CurrencyRegistry:
+    # Immutable snapshot: a refresh builds a new one and swaps the reference,
+    # so readers never see a half-updated registry and need no lock.
+    __slots__ = ("symbols", "codes", "index", "source", "loaded_at", "etag", "body", "invalid_detail")
+
+    def __init__(self, symbols: dict[str, str], source: str):
+        self.symbols = dict(sorted(symbols.items()))
+        self.codes = frozenset(self.symbols)
+        self.index = {code: i for i, code in enumerate(self.symbols)}
+        self.source = source
+        self.loaded_at = time.time()
+        self.body = json.dumps({
+            "source": source,
+            "currencies": [{"code": code, "name": name} for code, name in self.symbols.items()]
+        }, separators=(",", ":")).encode()
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        if len(self.symbols) <= INLINE_CURRENCY_LIST_LIMIT:
+            self.invalid_detail = f"Invalid currency. Valid currencies are: {', '.join(self.symbols)}"
+        else:
+            self.invalid_detail = "Invalid currency. Valid currencies are listed at /exchange/currencies"
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def index_of(self, code: str) -> Optional[int]:
+        return self.index.get(code)
+
+    def validate(self, *codes: str):
+        for code in codes:
+            if code not in self.codes:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=self.invalid_detail)
+
+
+def _fallback() -> CurrencyRegistry:
+    symbols = {code: FALLBACK_SYMBOLS.get(code, code) for code in SUPPORTED_CURRENCIES}
+    return CurrencyRegistry(symbols, "fallback")
+
+
+_registry = _fallback()
+currency_registry_size.set(len(_registry))
+
+
+def get_currency_registry() -> CurrencyRegistry:
+    return _registry
+
+
+def set_currency_registry(registry: CurrencyRegistry):
+    global _registry
+
+    _registry = registry
+    currency_registry_size.set(len(registry))
+
+
+async def refresh_currency_registry() -> int:
+    if not apilayer_gateway.API_SYMBOLS_URL:
+        return len(_registry)
+
+    symbols = await apilayer_gateway.fetch_currency_symbols()
+    symbols = {code: name for code, name in symbols.items() if CURRENCY_CODE.match(code)}
+    # The currencies the rest of the service is built around stay valid even
+    # if upstream drops one of them.
+    for code in SUPPORTED_CURRENCIES:
+        symbols.setdefault(code, FALLBACK_SYMBOLS.get(code, code))
+
+    registry = CurrencyRegistry(symbols, "upstream")
+    if registry.etag != _registry.etag:
+        set_currency_registry(registry)
+        logger.info(f"Currency registry loaded {len(registry)} currencies")
+    return len(registry)
+
+
+async def run_currency_registry_refresher(interval: float = CURRENCY_REGISTRY_REFRESH_INTERVAL):
+    # Warm-up does the first load; until upstream answers, the fallback
+    # list stays in place and the refresh is retried sooner.
+    while True:
+        await asyncio.sleep(interval if _registry.source == "upstream" else CURRENCY_REGISTRY_RETRY_INTERVAL)
+        try:
+            await refresh_currency_registry()
+        except Exception as ex:
+            logger.warning(f"Currency registry refresh failed, keeping {_registry.source} list: {ex}")
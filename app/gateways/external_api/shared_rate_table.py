@@ -0,0 +1,130 @@
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# Layout: a header identifying the currency list, then one slot per
+# (from, to) pair. Each slot is a seqlock: the writer makes the sequence odd,
+# writes the payload and makes it even again; readers retry when the
+# sequence was odd or changed while they copied the payload. After the slots
+# comes one "last requested" timestamp per pair, which any worker may stamp
+# so the writer knows which pairs are worth refreshing.
+HEADER = struct.Struct("<4sI64s")
+SLOT = struct.Struct("<Qdd")
+SEQUENCE = struct.Struct("<Q")
+PAYLOAD = struct.Struct("<dd")
+DEMAND = struct.Struct("<d")
+MAGIC = b"EXRT"
+LAYOUT_VERSION = 2
+READ_RETRIES = 100
+
+
+class SharedRateTable:
+    def __init__(self, path: str, currencies: Sequence[str]):
+        self.path = Path(path)
+        self.currencies = tuple(currencies)
+        self._index = {currency: i for i, currency in enumerate(self.currencies)}
+        self._header = HEADER.pack(MAGIC, LAYOUT_VERSION, ",".join(self.currencies).encode())
+        self._demand_offset = HEADER.size + SLOT.size * len(self.currencies) ** 2
+        self._size = self._demand_offset + DEMAND.size * len(self.currencies) ** 2
+        self._lock_fd: Optional[int] = None
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < self._size:
+                os.ftruncate(fd, self._size)
+            self._mm = mmap.mmap(fd, self._size)
+        finally:
+            os.close(fd)
+
+    @property
+    def is_writer(self) -> bool:
+        return self._lock_fd is not None
+
+    def try_become_writer(self) -> bool:
+        if self._lock_fd is not None:
+            return True
+        if fcntl is None:
+            return False
+
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        self._lock_fd = fd
+        if self._mm[:HEADER.size] != self._header:
+            # Left over from a different currency list: start from empty slots.
+            self._mm[:] = bytes(self._size)
+            self._mm[:HEADER.size] = self._header
+        return True
+
+    def _pair(self, from_currency: str, to_currency: str) -> Optional[int]:
+        i = self._index.get(from_currency)
+        j = self._index.get(to_currency)
+        if i is None or j is None:
+            return None
+        return i * len(self.currencies) + j
+
+    def _offset(self, from_currency: str, to_currency: str) -> Optional[int]:
+        pair = self._pair(from_currency, to_currency)
+        return None if pair is None else HEADER.size + SLOT.size * pair
+
+    def mark_requested(self, from_currency: str, to_currency: str, at: Optional[float] = None):
+        # Last stamp wins; an aligned 8-byte store, so readers never see half of one.
+        pair = self._pair(from_currency, to_currency)
+        if pair is not None and self._mm[:HEADER.size] == self._header:
+            DEMAND.pack_into(self._mm, self._demand_offset + DEMAND.size * pair, time.time() if at is None else at)
+
+    def requested_at(self, from_currency: str, to_currency: str) -> float:
+        pair = self._pair(from_currency, to_currency)
+        if pair is None:
+            return 0.0
+        return DEMAND.unpack_from(self._mm, self._demand_offset + DEMAND.size * pair)[0]
+
+    def write(self, from_currency: str, to_currency: str, rate: float, updated_at: Optional[float] = None):
+        if not self.is_writer:
+            raise RuntimeError("Only the elected writer may update the shared rate table")
+        offset = self._offset(from_currency, to_currency)
+        if offset is None:
+            raise KeyError(f"{from_currency}->{to_currency} is not in the shared rate table")
+
+        sequence = SEQUENCE.unpack_from(self._mm, offset)[0]
+        if sequence % 2:
+            sequence += 1  # a previous writer died mid-update
+        SEQUENCE.pack_into(self._mm, offset, sequence + 1)
+        PAYLOAD.pack_into(self._mm, offset + SEQUENCE.size, rate,
+                          updated_at if updated_at is not None else time.time())
+        SEQUENCE.pack_into(self._mm, offset, sequence + 2)
+
+    def read(self, from_currency: str, to_currency: str) -> Optional[tuple[float, float]]:
+        offset = self._offset(from_currency, to_currency)
+        if offset is None or self._mm[:HEADER.size] != self._header:
+            return None
+
+        for _ in range(READ_RETRIES):
+            before, rate, updated_at = SLOT.unpack_from(self._mm, offset)
+            if before % 2:
+                continue
+            if SEQUENCE.unpack_from(self._mm, offset)[0] != before:
+                continue
+            if not updated_at:
+                return None
+            return rate, updated_at
+        return None
+
+    def close(self):
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+        self._mm.close()
@@ -0,0 +1,360 @@
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from app.utils.config.metrics import Counter
+
+TRANSACTION_JOURNAL_DIR = os.getenv("TRANSACTION_JOURNAL_DIR", "")
+JOURNAL_SEGMENT_RECORDS = int(os.getenv("JOURNAL_SEGMENT_RECORDS", str(1 << 20)))
+JOURNAL_MAX_SEGMENTS = int(os.getenv("JOURNAL_MAX_SEGMENTS", "0"))
+JOURNAL_FSYNC = os.getenv("JOURNAL_FSYNC", "false").lower() == "true"
+
+# Layout: segment files named after the offset of their first record, each
+# preallocated to JOURNAL_SEGMENT_RECORDS fixed-width slots. A slot is a
+# (magic, crc32) header followed by the payload. The writer packs the payload
+# first and the header last, so readers stop at the first slot without the
+# magic and never see half a record. Fixed-width slots make the offset index
+# arithmetic: the sorted segment bases locate the file, and
+# (offset - base) * RECORD_SIZE is the position inside it.
+HEADER = struct.Struct("<II")
+PAYLOAD = struct.Struct("<Qdq36s3s3sddd6x")
+RECORD_SIZE = HEADER.size + PAYLOAD.size
+MAGIC = 0x4A585845  # "EXXJ"
+SEGMENT_SUFFIX = ".seg"
+
+logger = logging.getLogger(__name__)
+
+# One thread does every append, in order: the flock, new segments and fsync
+# all block, and they stay off the event loop.
+journal_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal")
+
+journal_records_total = Counter("journal_records_total", "Transactions appended to the journal by outcome",
+                                ("outcome",))
+
+_U64 = struct.Struct("<Q")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+
+
+def _segment_name(base: int) -> str:
+    return f"{base:020d}{SEGMENT_SUFFIX}"
+
+
+def _segment_bases(directory: Path) -> list[int]:
+    return sorted(int(path.stem) for path in directory.glob(f"*{SEGMENT_SUFFIX}") if path.stem.isdigit())
+
+
+def _epoch(timestamp) -> float:
+    if timestamp is None:
+        return time.time()
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp.timestamp()
+    return float(timestamp)
+
+
+def _text(value: bytes) -> str:
+    return value.rstrip(b"\0").decode()
+
+
+class JournalRecord:
+    # A view over one slot of a mapped segment: fields are decoded on access
+    # and nothing is copied. Valid while its reader is open.
+    __slots__ = ("view",)
+
+    def __init__(self, view: memoryview):
+        self.view = view
+
+    @property
+    def offset(self) -> int:
+        return _U64.unpack_from(self.view, 8)[0]
+
+    @property
+    def timestamp(self) -> float:
+        return _F64.unpack_from(self.view, 16)[0]
+
+    @property
+    def user_id(self) -> int:
+        return _I64.unpack_from(self.view, 24)[0]
+
+    @property
+    def transaction_id(self) -> str:
+        return _text(bytes(self.view[32:68]))
+
+    @property
+    def from_currency(self) -> str:
+        return _text(bytes(self.view[68:71]))
+
+    @property
+    def to_currency(self) -> str:
+        return _text(bytes(self.view[71:74]))
+
+    @property
+    def amount_from(self) -> float:
+        return _F64.unpack_from(self.view, 74)[0]
+
+    @property
+    def amount_to(self) -> float:
+        return _F64.unpack_from(self.view, 82)[0]
+
+    @property
+    def exchange_rate(self) -> float:
+        return _F64.unpack_from(self.view, 90)[0]
+
+    def as_dict(self) -> dict:
+        offset, timestamp, user_id, transaction_id, from_currency, to_currency, amount_from, amount_to, rate = (
+            PAYLOAD.unpack_from(self.view, HEADER.size)
+        )
+        return {
+            "offset": offset,
+            "timestamp": timestamp,
+            "user_id": user_id,
+            "transaction_id": _text(transaction_id),
+            "from_currency": _text(from_currency),
+            "to_currency": _text(to_currency),
+            "amount_from": amount_from,
+            "amount_to": amount_to,
+            "exchange_rate": rate,
+        }
+
+
+class TransactionJournal:
+    # Appends are serialized across workers with a file lock; under it the
+    # writer finds the end of the active segment by binary search, since
+    # slots are always filled in order.
+
+    def __init__(self, directory: str, segment_records: int = JOURNAL_SEGMENT_RECORDS,
+                 max_segments: int = JOURNAL_MAX_SEGMENTS, fsync: bool = JOURNAL_FSYNC):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_records = segment_records
+        self.max_segments = max_segments
+        self.fsync = fsync
+        self._lock_fd = os.open(self.directory / "journal.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        self._base: Optional[int] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._capacity = 0
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _map(self, base: int):
+        if self._mm is not None:
+            self._mm.close()
+        path = self.directory / _segment_name(base)
+        if not path.exists():
+            # Sized before it becomes visible, so readers never map a short file.
+            staging = path.with_suffix(".tmp")
+            fd = os.open(staging, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                os.ftruncate(fd, self.segment_records * RECORD_SIZE)
+            finally:
+                os.close(fd)
+            os.replace(staging, path)
+            self._prune()
+        fd = os.open(path, os.O_RDWR)
+        try:
+            size = os.fstat(fd).st_size
+            self._mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._base, self._capacity = base, size // RECORD_SIZE
+
+    def _prune(self):
+        if self.max_segments <= 0:
+            return
+        for base in _segment_bases(self.directory)[:-self.max_segments]:
+            (self.directory / _segment_name(base)).unlink(missing_ok=True)
+
+    def _used_slots(self) -> int:
+        low, high = 0, self._capacity
+        while low < high:
+            middle = (low + high) // 2
+            if HEADER.unpack_from(self._mm, middle * RECORD_SIZE)[0] == MAGIC:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _tail(self) -> int:
+        # Another worker may have rotated since our last append.
+        if self._base is None or (self.directory / _segment_name(self._base + self._capacity)).exists():
+            bases = _segment_bases(self.directory)
+            self._map(bases[-1] if bases else 0)
+        slot = self._used_slots()
+        if slot == self._capacity:
+            self._map(self._base + self._capacity)
+            slot = 0
+        return slot
+
+    def append(self, records: Iterable[tuple]) -> Optional[int]:
+        # records: (timestamp, user_id, transaction_id, from, to, amount_from,
+        # amount_to, exchange_rate). Returns the offset of the first one.
+        first = None
+        with self._locked():
+            slot = self._tail()
+            for timestamp, user_id, transaction_id, from_currency, to_currency, amount_from, amount_to, rate in records:
+                if slot == self._capacity:
+                    self._flush()
+                    self._map(self._base + self._capacity)
+                    slot = 0
+                offset = self._base + slot
+                position = slot * RECORD_SIZE
+                PAYLOAD.pack_into(
+                    self._mm, position + HEADER.size, offset, _epoch(timestamp), user_id,
+                    transaction_id.encode(), from_currency.encode(), to_currency.encode(), amount_from, amount_to, rate
+                )
+                crc = zlib.crc32(self._mm[position + HEADER.size:position + RECORD_SIZE])
+                HEADER.pack_into(self._mm, position, MAGIC, crc)
+                first = offset if first is None else first
+                slot += 1
+            self._flush()
+        return first
+
+    def _flush(self):
+        if self.fsync and self._mm is not None:
+            self._mm.flush()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        os.close(self._lock_fd)
+
+
+class JournalReader:
+    # Read side for consumers in any process: maps segments read-only and
+    # yields JournalRecord views. Keep next_offset to resume later.
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.next_offset = 0
+        self._maps: dict[int, tuple[mmap.mmap, memoryview]] = {}
+
+    def _view(self, base: int) -> Optional[memoryview]:
+        entry = self._maps.get(base)
+        if entry is None:
+            try:
+                with open(self.directory / _segment_name(base), "rb") as file:
+                    mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError):
+                return None  # pruned in the meantime
+            entry = self._maps[base] = (mm, memoryview(mm))
+        return entry[1]
+
+    def read(self, from_offset: Optional[int] = None, limit: Optional[int] = None) -> Iterator[JournalRecord]:
+        offset = self.next_offset if from_offset is None else from_offset
+        bases = _segment_bases(self.directory)
+        if not bases:
+            return
+        index = max(bisect_right(bases, offset) - 1, 0)
+        offset = max(offset, bases[0])  # older records were pruned
+        for base in self._forget(bases)[index:]:
+            view = self._view(base)
+            if view is None:
+                continue
+            offset = max(offset, base)
+            for position in range((offset - base) * RECORD_SIZE, len(view) - RECORD_SIZE + 1, RECORD_SIZE):
+                magic, crc = HEADER.unpack_from(view, position)
+                if magic != MAGIC:
+                    return
+                record = view[position:position + RECORD_SIZE]
+                offset += 1
+                self.next_offset = offset
+                if zlib.crc32(record[HEADER.size:]) != crc:
+                    logger.warning(f"Skipping corrupt journal record at offset {offset - 1}")
+                    continue
+                yield JournalRecord(record)
+                if limit is not None:
+                    limit -= 1
+                    if limit <= 0:
+                        return
+
+    def _forget(self, bases: list[int]) -> list[int]:
+        for base in set(self._maps) - set(bases):
+            self._release(base)
+        return bases
+
+    def _release(self, base: int):
+        mm, view = self._maps.pop(base)
+        view.release()
+        try:
+            mm.close()
+        except BufferError:
+            pass  # a caller still holds record views; closed when they go away
+
+    def close(self):
+        for base in list(self._maps):
+            self._release(base)
+
+
+_journal: Optional[TransactionJournal] = None
+
+
+def open_transaction_journal() -> Optional[TransactionJournal]:
+    global _journal
+
+    if TRANSACTION_JOURNAL_DIR and _journal is None:
+        _journal = TransactionJournal(TRANSACTION_JOURNAL_DIR)
+    return _journal
+
+
+def close_transaction_journal():
+    global _journal
+
+    if _journal is not None:
+        # Behind any appends still queued on the writer thread.
+        journal_executor.submit(_journal.close).result()
+        _journal = None
+
+
+async def journal_transactions(transactions: Iterable) -> Optional[int]:
+    # Called after the commit. The database stays the source of truth, so a
+    # failed append is logged and counted rather than failing the request.
+    journal = _journal
+    if journal is None:
+        return None
+    records = [
+        (
+            _value(transaction, "timestamp"), _value(transaction, "user_id"), _value(transaction, "transaction_id"),
+            _value(transaction, "from_currency"), _value(transaction, "to_currency"),
+            _value(transaction, "amount_from"), _value(transaction, "amount_to"),
+            _value(transaction, "exchange_rate"),
+        )
+        for transaction in transactions
+    ]
+    try:
+        first = await asyncio.get_running_loop().run_in_executor(journal_executor, journal.append, records)
+    except Exception as ex:
+        journal_records_total.inc("failed", amount=len(records))
+        logger.warning(f"Could not append {len(records)} transactions to the journal: {ex}")
+        return None
+    journal_records_total.inc("appended", amount=len(records))
+    return first
+
+
+def _value(transaction, field: str):
+    return transaction[field] if isinstance(transaction, dict) else getattr(transaction, field)
@@ -1,5 +1,6 @@
 import asyncio
-import uvicorn
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 
@@ -8,65 +9,131 @@ import os
 
 from app.controller.exchange_controller import exchange_router
 from app.controller.health_check_controller import health_check_router
+from app.controller.jobs_controller import jobs_router
 from app.controller.login_controller import login_router
+from app.controller.metrics_controller import metrics_router
 from app.controller.transactions_controller import transaction_router
 from app.controller.user_controller import user_router
-from app.gateways.database.connector import init_db
-from app.utils.config.log import setup_logging
+from app.domain.service.conversion_job_service import JOBS_ENABLED, conversion_job_runner
+from app.domain.service.rate_history_service import (
+    flush_rate_samples,
+    record_rate_sample,
+    run_rate_history_flusher,
+)
+from app.domain.service.rate_ticker_service import rate_ticker
+from app.domain.service.user_deletion_service import run_user_deletion_sweeper
+from app.gateways.database.database_gateway import dispose_engine, get_session_factory
+from app.gateways.external_api.apilayer_gateway import (
+    add_rate_listener,
+    close_http_client,
+    close_shared_rate_table,
+    get_http_client,
+    open_shared_rate_table,
+    remove_rate_listener,
+    run_shared_rate_refresher,
+)
+from app.gateways.external_api.currency_registry import run_currency_registry_refresher
+from app.gateways.journal.transaction_journal import close_transaction_journal, open_transaction_journal
+from app.utils.config.concurrency_limit_middleware import concurrency_limit_middleware
+from app.utils.config.deadline_middleware import deadline_middleware
+from app.utils.config.log import get_logger, setup_logging
+from app.utils.config.loop_monitor import LOOP_MONITOR_ENABLED, LoopMonitor
 from app.utils.config.logging_middleware import logging_middleware
+from app.utils.config.metrics_middleware import metrics_middleware
+from app.utils.config.profiling_middleware import profiling_middleware
+from app.utils.config.warmup import WARMUP_TIMEOUT, warm_up
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-logger = setup_logging()
+logger = get_logger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    app.state.ready = False
+    get_http_client()
+    loop_monitor = LoopMonitor() if LOOP_MONITOR_ENABLED else None
+    if loop_monitor:
+        loop_monitor.start()
+
+    shared_rates = open_shared_rate_table()
+    open_transaction_journal()
+    refresher_task = asyncio.create_task(run_shared_rate_refresher(shared_rates)) if shared_rates else None
+    add_rate_listener(record_rate_sample)
+    history_task = asyncio.create_task(run_rate_history_flusher())
+    currencies_task = asyncio.create_task(run_currency_registry_refresher())
+
+    warmup_task = asyncio.create_task(warm_up(app))
+    deletion_task = None
+    try:
+        try:
+            await asyncio.wait_for(asyncio.shield(warmup_task), WARMUP_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Warm-up still running after {WARMUP_TIMEOUT}s, serving as not ready")
+        if JOBS_ENABLED:
+            # After warm-up, so the tables and the currency list are in place.
+            conversion_job_runner.start()
+        deletion_task = asyncio.create_task(run_user_deletion_sweeper())
+        yield
+    finally:
+        background_tasks = [
+            task for task in (warmup_task, refresher_task, history_task, currencies_task, deletion_task) if task
+        ]
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        remove_rate_listener(record_rate_sample)
+        await rate_ticker.close()
+        await conversion_job_runner.stop()
+        try:
+            async with get_session_factory()() as session:
+                await flush_rate_samples(session)
+        except Exception as ex:
+            logger.warning(f"Could not flush rate history on shutdown: {ex}")
+        if loop_monitor:
+            await loop_monitor.stop()
+        close_shared_rate_table()
+        close_transaction_journal()
+        await close_http_client()
+        await dispose_engine()
 
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title="Exchange API",
+        lifespan=lifespan,
         version="1.0.0",
         openapi_tags=[
             {"name": "health_check", "description": "System health check operations"},
             {"name": "users", "description": "Users routes"},
             {"name": "auth", "description": "Authorization routes"},
             {"name": "exchange", "description": "Currency conversion operations"},
-            {"name": "transaction", "description": "Get conversion operations in a List"}
+            {"name": "transaction", "description": "Get conversion operations in a List"},
+            {"name": "jobs", "description": "Bulk conversions from CSV files"},
+            {"name": "metrics", "description": "Prometheus metrics"}
         ]
     )
 
+    app.middleware("http")(profiling_middleware)
     app.middleware("http")(logging_middleware)
+    app.middleware("http")(concurrency_limit_middleware)
+    app.middleware("http")(deadline_middleware)
+    app.middleware("http")(metrics_middleware)
     app.include_router(health_check_router)
+    app.include_router(metrics_router)
     app.include_router(exchange_router)
     app.include_router(user_router)
     app.include_router(login_router)
     app.include_router(transaction_router)
+    app.include_router(jobs_router)
 
     return app
 
 
-async def start_application():
-    logger.info("Starting application initialization")
-    await init_db()
-
-    config = uvicorn.Config(
-        "main:app",
-        host="localhost",
-        port=8081,
-        reload=True,
-        log_config=None
-    )
-
-    server = uvicorn.Server(config)
-    logger.info("Application started successfully")
-    await server.serve()
-
-
 app = create_app()
 
 if __name__ == "__main__":
-    try:
-        asyncio.run(start_application())
-    except KeyboardInterrupt:
-        logger.info("Application shutdown by user")
-    except Exception as e:
-        logger.critical(f"Application failed to start: {str(e)}")
-        raise
+    from app.server import run
+
+    run()
@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ConversionJobResponse(BaseModel):
+    job_id: str
+    status: str
+    total_rows: int
+    processed_rows: int
+    failed_rows: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
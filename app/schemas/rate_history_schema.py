@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import List
+
+from pydantic import BaseModel
+
+
+class RateBar(BaseModel):
+    timestamp: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+
+
+class RateHistoryResponse(BaseModel):
+    from_currency: str
+    to_currency: str
+    interval: str
+    tier: str
+    start: datetime
+    end: datetime
+    points: List[RateBar]
@@ -0,0 +1,83 @@
+import asyncio
+import importlib.util
+import os
+import tempfile
+from pathlib import Path
+
+import uvicorn
+
+from app.gateways.database.connector import init_db
+from app.gateways.database.database_gateway import dispose_engine
+from app.utils.config.log import setup_logging
+
+
+def _module_available(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+def server_settings() -> dict:
+    app_env = os.getenv("APP_ENV", "development").lower()
+    reload = os.getenv("RELOAD", "false").lower() == "true" and app_env != "production"
+    workers = 1 if reload else int(os.getenv("WEB_CONCURRENCY", os.getenv("WORKERS", "1")))
+
+    return {
+        "app": "app.main:app",
+        "host": os.getenv("HOST", "0.0.0.0"),
+        "port": int(os.getenv("PORT", "8081")),
+        "workers": workers,
+        "reload": reload,
+        "loop": "uvloop" if _module_available("uvloop") else "asyncio",
+        "http": "httptools" if _module_available("httptools") else "h11",
+        "backlog": int(os.getenv("BACKLOG", "2048")),
+        "timeout_keep_alive": int(os.getenv("KEEP_ALIVE_TIMEOUT", "65")),
+        "timeout_graceful_shutdown": int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "30")),
+        "limit_max_requests": int(os.getenv("MAX_REQUESTS_PER_WORKER", "0")) or None,
+        "proxy_headers": True,
+        "forwarded_allow_ips": os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        "access_log": os.getenv("ACCESS_LOG", "false").lower() == "true",
+        "log_config": None,
+    }
+
+
+async def _init_db():
+    # The engines' pooled connections belong to this loop, which is closed
+    # before uvicorn starts its own; a single worker would otherwise reuse them.
+    try:
+        await init_db()
+    finally:
+        await dispose_engine()
+
+
+def run():
+    logger = setup_logging()
+    settings = server_settings()
+
+    if os.getenv("RELOAD", "false").lower() == "true" and not settings["reload"]:
+        logger.warning("RELOAD is ignored when APP_ENV=production")
+
+    logger.info("Starting application initialization")
+    asyncio.run(_init_db())
+    # Workers inherit the environment, so their lifespan warm-up skips init_db.
+    os.environ["INIT_DB_ON_STARTUP"] = "false"
+
+    logger.info(
+        f"Starting {settings['workers']} worker(s) on {settings['host']}:{settings['port']} "
+        f"(loop={settings['loop']}, http={settings['http']}, reload={settings['reload']})"
+    )
+    shared_rates = None
+    if settings["workers"] > 1 and not os.getenv("SHARED_RATE_TABLE_PATH"):
+        # One rate table per launcher, shared by its workers.
+        shm = Path("/dev/shm")
+        shared_rates = (shm if shm.is_dir() else Path(tempfile.gettempdir())) / f"exchange-rates-{os.getpid()}.bin"
+        os.environ["SHARED_RATE_TABLE_PATH"] = str(shared_rates)
+
+    try:
+        uvicorn.run(**settings)
+    finally:
+        if shared_rates is not None:
+            for path in (shared_rates, Path(f"{shared_rates}.lock")):
+                path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    run()
@@ -1,42 +1,34 @@
 from fastapi import Depends, HTTPException, status, Cookie
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.entities.entity import User, UserSession
+from app.domain.repository.user_repository import AUTHENTICATED_USER_STMT, AuthenticatedUser
 from app.gateways.database.connector import get_db
-from sqlalchemy.future import select
+from app.utils.deadline import deadline_stage
 
 
 async def get_current_user(
         session_id: str = Cookie(None),
         db: AsyncSession = Depends(get_db)
-) -> User:
+) -> AuthenticatedUser:
     if not session_id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
 
-    result = await db.execute(
-        select(UserSession)
-        .filter(UserSession.session_id == session_id)
-    )
-    user_session = result.scalars().first()
+    async with deadline_stage("auth"):
+        result = await db.execute(AUTHENTICATED_USER_STMT, {"session_id": session_id})
+        row = result.first()
 
-    if not user_session:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid session"
         )
 
-    result = await db.execute(
-        select(User)
-        .filter(User.id == user_session.user_id)
-    )
-    user = result.scalars().first()
-
-    if not user:
+    if row.id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
-    return user
+    return AuthenticatedUser(row.id, row.username, row.is_active, row.created_at)
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import time
+from collections import deque
+
+from fastapi import Request
+from starlette import status
+from starlette.responses import JSONResponse
+
+from app.utils.config.log import get_logger
+from app.utils.config.metrics import Counter, Gauge
+from app.utils.deadline import remaining
+
+CONCURRENCY_LIMIT_ENABLED = os.getenv("CONCURRENCY_LIMIT_ENABLED", "true").lower() == "true"
+CONCURRENCY_INITIAL_LIMIT = float(os.getenv("CONCURRENCY_INITIAL_LIMIT", "20"))
+CONCURRENCY_MIN_LIMIT = float(os.getenv("CONCURRENCY_MIN_LIMIT", "2"))
+CONCURRENCY_MAX_LIMIT = float(os.getenv("CONCURRENCY_MAX_LIMIT", "100"))
+CONCURRENCY_ROUTE_LIMITS = os.getenv("CONCURRENCY_ROUTE_LIMITS", "auth:16")
+CONCURRENCY_GROUPS = frozenset(
+    group.strip() for group in os.getenv("CONCURRENCY_GROUPS", "exchange,auth,users,transaction,jobs").split(",")
+    if group.strip()
+)
+CONCURRENCY_LATENCY_TOLERANCE = float(os.getenv("CONCURRENCY_LATENCY_TOLERANCE", "2.0"))
+CONCURRENCY_BACKOFF = float(os.getenv("CONCURRENCY_BACKOFF", "0.9"))
+CONCURRENCY_QUEUE_SIZE = int(os.getenv("CONCURRENCY_QUEUE_SIZE", "50"))
+CONCURRENCY_QUEUE_TIMEOUT = float(os.getenv("CONCURRENCY_QUEUE_TIMEOUT", "0.5"))
+CONCURRENCY_RETRY_AFTER = int(os.getenv("CONCURRENCY_RETRY_AFTER", "1"))
+CONCURRENCY_EXEMPT_PATHS = tuple(
+    path.strip() for path in os.getenv("CONCURRENCY_EXEMPT_PATHS", "/health,/metrics,/exchange/stream").split(",") if path.strip()
+)
+SHORT_RTT_ALPHA = 0.1
+LONG_RTT_ALPHA = 0.002
+LIMIT_SMOOTHING = 0.2
+
+logger = get_logger(__name__)
+
+concurrency_limit = Gauge("concurrency_limit", "Current adaptive concurrency limit", ("group",))
+concurrency_inflight = Gauge("concurrency_inflight", "Requests currently admitted", ("group",))
+requests_shed_total = Counter("requests_shed_total", "Requests rejected by admission control", ("group",))
+
+
+def _parse_route_limits(value: str) -> dict[str, float]:
+    limits = {}
+    for item in value.split(","):
+        group, _, limit = item.partition(":")
+        if group.strip() and limit.strip():
+            limits[group.strip()] = float(limit)
+    return limits
+
+
+class AdaptiveLimiter:
+    # Gradient limiter: compares the recent latency (short EWMA) with the
+    # long-term one. While they match the limit grows by sqrt(limit) headroom;
+    # once queueing makes recent latency exceed tolerance x long-term, the
+    # limit shrinks in proportion. 5xx responses back off the limit at most
+    # once per round trip. Requests over the limit wait in a short bounded
+    # queue so bursts are absorbed; only what can't be served soon is shed.
+
+    def __init__(self, group: str, initial: float = CONCURRENCY_INITIAL_LIMIT, minimum: float = CONCURRENCY_MIN_LIMIT,
+                 maximum: float = CONCURRENCY_MAX_LIMIT, queue_size: int = CONCURRENCY_QUEUE_SIZE,
+                 queue_timeout: float = CONCURRENCY_QUEUE_TIMEOUT):
+        self.group = group
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.limit = min(max(initial, minimum), self.maximum)
+        self.inflight = 0
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._waiters: deque[asyncio.Future] = deque()
+        self.short_rtt = None
+        self.long_rtt = None
+        self._last_decrease = 0.0
+        concurrency_limit.set(self.limit, group)
+
+    def try_acquire(self) -> bool:
+        if self.inflight >= int(self.limit) or self._waiters:
+            return False
+        self.inflight += 1
+        concurrency_inflight.set(self.inflight, self.group)
+        return True
+
+    async def acquire(self) -> bool:
+        if self.try_acquire():
+            return True
+        # Never queue longer than the request has left to live.
+        budget = remaining()
+        queue_timeout = self.queue_timeout if budget is None else min(self.queue_timeout, budget)
+        if len(self._waiters) >= self.queue_size or queue_timeout <= 0:
+            requests_shed_total.inc(self.group)
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            requests_shed_total.inc(self.group)
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The client went away right after being handed a slot.
+                self.inflight -= 1
+                self._wake_waiters()
+            else:
+                self._discard(waiter)
+            raise
+        return True
+
+    def _discard(self, waiter: asyncio.Future):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _wake_waiters(self):
+        while self._waiters and self.inflight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot is handed over directly so a new arrival can't take it.
+                self.inflight += 1
+                waiter.set_result(None)
+        concurrency_inflight.set(self.inflight, self.group)
+
+    def release(self, latency: float, failed: bool, inflight_at_start: int):
+        self.inflight -= 1
+        try:
+            self._update_limit(latency, failed, inflight_at_start)
+        finally:
+            self._wake_waiters()
+
+    def _update_limit(self, latency: float, failed: bool, inflight_at_start: int):
+        if failed:
+            now = time.monotonic()
+            if now - self._last_decrease >= latency:
+                self._last_decrease = now
+                self._set_limit(self.limit * CONCURRENCY_BACKOFF)
+            return
+
+        if self.short_rtt is None:
+            self.short_rtt = self.long_rtt = latency
+            return
+        self.short_rtt += (latency - self.short_rtt) * SHORT_RTT_ALPHA
+        self.long_rtt += (latency - self.long_rtt) * LONG_RTT_ALPHA
+        if self.long_rtt > self.short_rtt * 2:
+            # Load dropped a lot: let the long-term latency catch up quickly.
+            self.long_rtt *= 0.95
+
+        gradient = max(0.5, min(1.0, CONCURRENCY_LATENCY_TOLERANCE * self.long_rtt / self.short_rtt))
+        if gradient == 1.0 and inflight_at_start * 2 < self.limit:
+            return  # the limit isn't what's holding traffic back, don't grow it
+        target = self.limit * gradient + self.limit ** 0.5
+        self._set_limit(self.limit + (target - self.limit) * LIMIT_SMOOTHING)
+
+    def _set_limit(self, limit: float):
+        self.limit = max(self.minimum, min(self.maximum, limit))
+        concurrency_limit.set(self.limit, self.group)
+
+
+_route_limits = _parse_route_limits(CONCURRENCY_ROUTE_LIMITS)
+_limiters: dict[str, AdaptiveLimiter] = {}
+
+
+def _group_for(path: str) -> str:
+    # Only the known router prefixes get their own limiter (and metric
+    # labels); anything else, unknown paths included, shares one.
+    group = path.strip("/").split("/", 1)[0]
+    return group if group in CONCURRENCY_GROUPS else "other"
+
+
+def get_limiter(group: str) -> AdaptiveLimiter:
+    limiter = _limiters.get(group)
+    if limiter is None:
+        maximum = _route_limits.get(group, CONCURRENCY_MAX_LIMIT)
+        limiter = _limiters[group] = AdaptiveLimiter(group, maximum=maximum)
+    return limiter
+
+
+async def concurrency_limit_middleware(request: Request, call_next):
+    path = request.url.path
+    if not CONCURRENCY_LIMIT_ENABLED or path.startswith(CONCURRENCY_EXEMPT_PATHS):
+        return await call_next(request)
+
+    limiter = get_limiter(_group_for(path))
+    if not await limiter.acquire():
+        logger.warning(f"Shedding {request.method} {path}: {limiter.inflight} in flight, limit {int(limiter.limit)}")
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "Server is overloaded, retry later"},
+            headers={"Retry-After": str(CONCURRENCY_RETRY_AFTER)}
+        )
+
+    inflight_at_start = limiter.inflight
+    started_at = time.perf_counter()
+    failed = True
+    try:
+        response = await call_next(request)
+        failed = response.status_code >= 500
+        return response
+    finally:
+        limiter.release(time.perf_counter() - started_at, failed, inflight_at_start)
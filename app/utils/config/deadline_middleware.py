@@ -0,0 +1,23 @@
+import os
+import time
+
+from fastapi import Request
+
+from app.utils.deadline import REQUEST_TIMEOUT_HEADER, request_deadline, request_timeout
+
+DEADLINE_EXEMPT_PATHS = tuple(
+    path.strip() for path in os.getenv("DEADLINE_EXEMPT_PATHS", "/health,/metrics,/exchange/stream").split(",")
+    if path.strip()
+)
+
+
+async def deadline_middleware(request: Request, call_next):
+    if request.url.path.startswith(DEADLINE_EXEMPT_PATHS):
+        return await call_next(request)
+
+    timeout = request_timeout(request.headers.get(REQUEST_TIMEOUT_HEADER))
+    token = request_deadline.set(time.monotonic() + timeout if timeout is not None else None)
+    try:
+        return await call_next(request)
+    finally:
+        request_deadline.reset(token)
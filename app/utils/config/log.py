@@ -1,13 +1,26 @@
+import atexit
 import logging
+import os
+import queue
+import threading
 from contextvars import ContextVar
+from logging.handlers import QueueHandler
 from typing import Optional
 import uuid
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 
 current_user_id: ContextVar[Optional[str]] = ContextVar('current_user_id', default="system")
 current_username: ContextVar[Optional[str]] = ContextVar('current_username', default="system")
 correlation_id: ContextVar[str] = ContextVar('correlation_id', default=str(uuid.uuid4()))
+current_route: ContextVar[str] = ContextVar('current_route', default="-")
+
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+LOG_SAMPLE_WATERMARK = float(os.getenv("LOG_SAMPLE_WATERMARK", "0.8"))
+LOG_SAMPLE_RATE = max(int(os.getenv("LOG_SAMPLE_RATE", "10")), 1)
+
+_listener: Optional["BatchingQueueListener"] = None
 
 
 class ContextFilter(logging.Filter):
@@ -19,7 +32,152 @@ class ContextFilter(logging.Filter):
         return True
 
 
+class _BatchFlushMixin:
+    def flush(self):
+        # Flushed once per batch by BatchingQueueListener instead of once per record.
+        pass
+
+    def flush_batch(self):
+        try:
+            super().flush()
+        except (OSError, ValueError):
+            # Same as logging.shutdown: the stream may already be closed at exit.
+            pass
+
+    def close(self):
+        self.flush_batch()
+        super().close()
+
+
+class BufferedStreamHandler(_BatchFlushMixin, logging.StreamHandler):
+    pass
+
+
+class DailyFileHandler(_BatchFlushMixin, logging.FileHandler):
+    def __init__(self, log_dir: Path, prefix: str = "exchange", encoding: str = "utf-8"):
+        self.log_dir = log_dir
+        self.prefix = prefix
+        now = datetime.now()
+        super().__init__(self._filename_for(now), encoding=encoding, delay=True)
+        self._next_rollover = self._next_midnight(now)
+
+    def _filename_for(self, moment: datetime) -> Path:
+        return self.log_dir / f"{self.prefix}_{moment.strftime('%Y-%m-%d')}.log"
+
+    @staticmethod
+    def _next_midnight(moment: datetime) -> float:
+        midnight = datetime.combine(moment.date() + timedelta(days=1), datetime.min.time())
+        return midnight.timestamp()
+
+    def emit(self, record):
+        if record.created >= self._next_rollover:
+            self.rollover(datetime.fromtimestamp(record.created))
+        super().emit(record)
+
+    def rollover(self, moment: datetime):
+        if self.stream:
+            self.flush_batch()
+            self.stream.close()
+            self.stream = None
+        self.baseFilename = os.path.abspath(self._filename_for(moment))
+        self._next_rollover = self._next_midnight(moment)
+
+
+class DroppingQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._sampled = 0
+        self._watermark = int(log_queue.maxsize * LOG_SAMPLE_WATERMARK) if log_queue.maxsize else 0
+
+    def prepare(self, record):
+        # Records stay in-process, so only the message needs merging; the
+        # final formatting (including tracebacks) happens on the writer thread.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self._watermark and record.levelno < logging.WARNING and self.queue.qsize() >= self._watermark:
+            self._sampled += 1
+            if self._sampled % LOG_SAMPLE_RATE:
+                self.dropped += 1
+                return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingQueueListener:
+    _sentinel = None
+
+    def __init__(self, log_queue: queue.Queue, handlers, queue_handler: DroppingQueueHandler,
+                 batch_size: int = LOG_BATCH_SIZE):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.queue_handler = queue_handler
+        self.batch_size = batch_size
+        self._reported_dropped = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self.queue.put(self._sentinel)
+        self._thread.join()
+        self._thread = None
+        for handler in self.handlers:
+            handler.close()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = False
+            for record in batch:
+                if record is self._sentinel:
+                    stopping = True
+                    continue
+                self._handle(record)
+            self._report_dropped()
+            for handler in self.handlers:
+                handler.flush_batch()
+
+            if stopping:
+                return
+
+    def _handle(self, record):
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _report_dropped(self):
+        dropped = self.queue_handler.dropped
+        if dropped != self._reported_dropped:
+            record = logging.LogRecord(
+                "app.utils.config.log", logging.WARNING, __file__, 0,
+                f"Log queue overloaded, dropped {dropped - self._reported_dropped} records", None, None
+            )
+            record.correlation_id = "-"
+            record.user_id = "system"
+            record.username = "system"
+            self._reported_dropped = dropped
+            self._handle(record)
+
+
 def setup_logging():
+    global _listener
+
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
 
@@ -29,24 +187,26 @@ def setup_logging():
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
         handler.close()
+    if _listener is not None:
+        _listener.stop()
 
     log_format = ('%(asctime)s.%(msecs)03d | %(levelname)-8s | CID:%(correlation_id)s | User:%(username)-15s | %('
                   'message)s')
     formatter = logging.Formatter(log_format, datefmt='%Y-%m-%d %H:%M:%S')
 
-    file_handler = logging.FileHandler(
-        filename=log_dir / f"exchange_{datetime.now().strftime('%Y-%m-%d')}.log",
-        encoding='utf-8'
-    )
+    file_handler = DailyFileHandler(log_dir)
     file_handler.setFormatter(formatter)
-    file_handler.addFilter(ContextFilter())
 
-    console_handler = logging.StreamHandler()
+    console_handler = BufferedStreamHandler()
     console_handler.setFormatter(formatter)
-    console_handler.addFilter(ContextFilter())
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    _listener = BatchingQueueListener(log_queue, [file_handler, console_handler], queue_handler)
+    _listener.start()
+    logger.addHandler(queue_handler)
 
     logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
     logging.getLogger('passlib').setLevel(logging.CRITICAL)
@@ -55,6 +215,17 @@ def setup_logging():
     return logger
 
 
+def stop_logging():
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     logger.addFilter(ContextFilter())
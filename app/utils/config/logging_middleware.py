@@ -1,18 +1,21 @@
 import uuid
 from fastapi import Request
-from app.utils.config.log import correlation_id, current_user_id, current_username, get_logger
-from app.gateways.database.connector import SessionFactory
+from app.utils.config.log import correlation_id, current_route, current_user_id, current_username, get_logger
+from app.gateways.database.database_gateway import get_session_factory
 from app.domain.repository.user_repository import UserRepository
+from app.gateways.database.query_instrumentation import start_request_stats, finish_request_stats
 
 logger = get_logger(__name__)
 
 
 async def logging_middleware(request: Request, call_next):
     correlation_id.set(str(uuid.uuid4()))
+    current_route.set(f"{request.method} {request.url.path}")
+    stats = start_request_stats()
 
     if current_user_id.get() == "system" and request.cookies.get("session_id"):
         try:
-            async with SessionFactory() as session:
+            async with get_session_factory()() as session:
                 user_repo = UserRepository(session)
                 user = await user_repo.find_by_session(request.cookies.get("session_id"))
                 if user:
@@ -23,6 +26,7 @@ async def logging_middleware(request: Request, call_next):
             logger.warning(f"Failed to set user context: {str(e)}")
 
     response = await call_next(request)
+    finish_request_stats(stats, request, response)
 
     current_user_id.set("system")
     current_username.set("system")
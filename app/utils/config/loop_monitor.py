@@ -0,0 +1,121 @@
+import asyncio
+import contextvars
+import os
+import sys
+import threading
+import time
+import traceback
+import weakref
+from typing import Optional
+
+from app.utils.config.log import correlation_id, current_route, get_logger
+from app.utils.config.metrics import Counter, Histogram, Summary
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.1"))
+LOOP_STALL_THRESHOLD = float(os.getenv("LOOP_STALL_THRESHOLD", "0.25"))
+
+logger = get_logger(__name__)
+
+event_loop_lag_seconds = Histogram(
+    "event_loop_lag_seconds", "Event loop scheduling lag",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+event_loop_lag_quantiles_seconds = Summary("event_loop_lag_quantiles_seconds", "Recent event loop lag percentiles")
+event_loop_stalls_total = Counter("event_loop_stalls_total", "Event loop stalls above the threshold")
+
+# Python 3.11 tasks do not expose their context, so the monitor installs a task
+# factory that remembers it; on 3.12+ Task.get_context() is used instead.
+_task_contexts: "weakref.WeakKeyDictionary[asyncio.Task, contextvars.Context]" = weakref.WeakKeyDictionary()
+
+
+def _context_task_factory(loop, coro, context=None):
+    context = context if context is not None else contextvars.copy_context()
+    task = asyncio.Task(coro, loop=loop, context=context)
+    _task_contexts[task] = context
+    return task
+
+
+def _task_context(task: asyncio.Task) -> Optional[contextvars.Context]:
+    get_context = getattr(task, "get_context", None)
+    if get_context is not None:
+        return get_context()
+    return _task_contexts.get(task)
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold: float = LOOP_STALL_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._last_beat = time.monotonic()
+        self._reported_beat = 0.0
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if not hasattr(asyncio.Task, "get_context") and self._loop.get_task_factory() is None:
+            self._loop.set_task_factory(_context_task_factory)
+
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            self._watchdog.join()
+        if self._loop is not None and self._loop.get_task_factory() is _context_task_factory:
+            self._loop.set_task_factory(None)
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected, 0.0)
+            self._last_beat = time.monotonic()
+
+            event_loop_lag_seconds.observe(lag)
+            event_loop_lag_quantiles_seconds.observe(lag)
+            if lag >= self.threshold:
+                event_loop_stalls_total.inc()
+
+    def _watch(self):
+        poll = min(self.interval, self.threshold / 2)
+        while not self._stopped.wait(poll):
+            last_beat = self._last_beat
+            stalled_for = time.monotonic() - last_beat
+            if stalled_for >= self.threshold and last_beat != self._reported_beat:
+                self._reported_beat = last_beat
+                self._report_stall(stalled_for)
+
+    def _report_stall(self, stalled_for: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = "".join(traceback.format_stack(frame))
+
+        request_id, route = "-", "-"
+        task = asyncio.tasks._current_tasks.get(self._loop)
+        context = _task_context(task) if task is not None else None
+        if context is not None:
+            request_id = context.get(correlation_id, "-")
+            route = context.get(current_route, "-")
+
+        logger.warning(
+            f"Event loop blocked for {stalled_for * 1000:.0f} ms "
+            f"(CID:{request_id} route:{route}); blocking stack:\n{stack}"
+        )
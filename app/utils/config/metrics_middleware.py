@@ -0,0 +1,26 @@
+import time
+
+from fastapi import Request
+
+from app.utils.config.metrics import Counter, Histogram
+
+http_requests_total = Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+
+
+async def metrics_middleware(request: Request, call_next):
+    started_at = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        http_request_duration_seconds.observe(time.perf_counter() - started_at, request.method, route_path)
+        http_requests_total.inc(request.method, route_path, str(status_code))
@@ -0,0 +1,90 @@
+import asyncio
+import hmac
+import io
+import os
+import random
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from fastapi import Request
+
+from app.gateways.database.query_instrumentation import query_stats
+from app.utils.config.log import correlation_id, get_logger
+
+if TYPE_CHECKING:
+    import cProfile
+
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile")
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "logs/profiles"))
+
+logger = get_logger(__name__)
+
+# cProfile hooks the whole thread, so only one request is profiled at a time.
+_profiling = False
+
+
+def _should_profile(request: Request) -> bool:
+    if PROFILE_TOKEN:
+        token = request.headers.get(PROFILE_HEADER)
+        if token and hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode()):
+            return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _write_profile(profiler: "cProfile.Profile", profile_id: str, summary: str) -> Path:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(PROFILE_DIR / f"{profile_id}.prof")
+
+    import pstats
+
+    report = io.StringIO()
+    report.write(summary)
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(40)
+
+    report_path = PROFILE_DIR / f"{profile_id}.txt"
+    report_path.write_text(report.getvalue(), encoding="utf-8")
+    return report_path
+
+
+async def profiling_middleware(request: Request, call_next):
+    global _profiling
+
+    if _profiling or not _should_profile(request):
+        return await call_next(request)
+
+    import cProfile  # only loaded once a request is actually profiled
+
+    _profiling = True
+    profiler = cProfile.Profile()
+    started_at = time.perf_counter()
+    profiler.enable()
+    try:
+        response = await call_next(request)
+    finally:
+        profiler.disable()
+        _profiling = False
+    elapsed = time.perf_counter() - started_at
+
+    profile_id = correlation_id.get()
+    stats = query_stats.get()
+    db_queries = stats.count if stats else 0
+    db_time = stats.total_time if stats else 0.0
+    summary = (
+        f"{request.method} {request.url.path} -> {response.status_code}\n"
+        f"correlation_id: {profile_id}\n"
+        f"wall time: {elapsed * 1000:.2f} ms\n"
+        f"db: {db_queries} queries, {db_time * 1000:.2f} ms\n"
+        f"note: the profiler samples the whole event loop thread, so concurrent requests may appear\n\n"
+    )
+
+    try:
+        report_path = await asyncio.to_thread(_write_profile, profiler, profile_id, summary)
+        logger.info(f"Request profile written to {report_path}")
+        response.headers["X-Profile-Id"] = profile_id
+    except OSError as e:
+        logger.warning(f"Failed to write request profile: {str(e)}")
+
+    return response
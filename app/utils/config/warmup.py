@@ -0,0 +1,85 @@
+import os
+import time
+
+from fastapi import FastAPI
+
+from app.domain.repository.transaction_repository import (
+    USER_TRANSACTIONS_COUNT_STMT,
+    USER_TRANSACTIONS_PAGE_STMT,
+)
+from app.domain.repository.user_repository import (
+    AUTHENTICATED_USER_STMT,
+    FIND_USER_BY_ID_STMT,
+    FIND_USER_BY_USERNAME_STMT,
+)
+from app.gateways.database.connector import init_db, warm_pool
+from app.gateways.database.database_gateway import get_session_factory
+from app.gateways.external_api.apilayer_gateway import prime_rate_cache
+from app.gateways.external_api.currency_registry import refresh_currency_registry
+from app.utils.config.log import get_logger
+from app.utils.config.metrics import Gauge
+
+INIT_DB_ON_STARTUP = os.getenv("INIT_DB_ON_STARTUP", "true").lower() == "true"
+WARMUP_DB_CONNECTIONS = int(os.getenv("WARMUP_DB_CONNECTIONS", "5"))
+WARMUP_RATE_PAIRS = os.getenv("WARMUP_RATE_PAIRS", "")
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "30"))
+
+logger = get_logger(__name__)
+
+warmup_duration_seconds = Gauge("warmup_duration_seconds", "Time spent warming up the worker at startup")
+
+# Hot-path statements with parameters that match nothing: executing them once
+# fills SQLAlchemy's compiled cache (and the driver's statement cache).
+WARMUP_STATEMENTS = (
+    (AUTHENTICATED_USER_STMT, {"session_id": ""}),
+    (FIND_USER_BY_ID_STMT, {"user_id": 0}),
+    (FIND_USER_BY_USERNAME_STMT, {"username": ""}),
+    (USER_TRANSACTIONS_PAGE_STMT, {"user_id": 0, "offset": 0, "limit": 1}),
+    (USER_TRANSACTIONS_COUNT_STMT, {"user_id": 0}),
+)
+
+
+def parse_rate_pairs(value: str) -> list[tuple[str, str]]:
+    pairs = []
+    for item in value.split(","):
+        from_currency, _, to_currency = item.strip().upper().partition(":")
+        if from_currency and to_currency:
+            pairs.append((from_currency, to_currency))
+    return pairs
+
+
+async def warm_statements() -> int:
+    async with get_session_factory()() as session:
+        for stmt, params in WARMUP_STATEMENTS:
+            (await session.execute(stmt, params)).all()
+    return len(WARMUP_STATEMENTS)
+
+
+async def _step(name: str, coro):
+    started_at = time.perf_counter()
+    try:
+        result = await coro
+    except Exception as ex:
+        logger.warning(f"Warm-up step {name} failed: {ex}")
+        return
+    logger.info(f"Warm-up step {name} done ({result}) in {(time.perf_counter() - started_at) * 1000:.1f} ms")
+
+
+async def warm_up(app: FastAPI):
+    started_at = time.perf_counter()
+
+    if INIT_DB_ON_STARTUP:
+        await init_db()
+
+    await _step("db_pool", warm_pool(WARMUP_DB_CONNECTIONS))
+    await _step("statements", warm_statements())
+    await _step("currencies", refresh_currency_registry())
+
+    pairs = parse_rate_pairs(WARMUP_RATE_PAIRS)
+    if pairs:
+        await _step("rate_cache", prime_rate_cache(pairs))
+
+    elapsed = time.perf_counter() - started_at
+    warmup_duration_seconds.set(elapsed)
+    app.state.ready = True
+    logger.info(f"Warm-up finished in {elapsed * 1000:.1f} ms, ready to serve")
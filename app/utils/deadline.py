@@ -0,0 +1,72 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException, status
+
+from app.utils.config.metrics import Counter, Histogram
+
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "15"))
+REQUEST_TIMEOUT_MAX = float(os.getenv("REQUEST_TIMEOUT_MAX", "60"))
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+
+# time.monotonic() by which the current request has to be answered; None
+# outside requests (background tasks, warm-up) and when timeouts are off.
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+request_stage_duration_seconds = Histogram(
+    "request_stage_duration_seconds", "Time spent in each stage of the request path", ("stage",)
+)
+deadline_exceeded_total = Counter("deadline_exceeded_total", "Requests that ran out of time by stage", ("stage",))
+
+
+def request_timeout(header: Optional[str]) -> Optional[float]:
+    # Clients may ask for a shorter (or, up to REQUEST_TIMEOUT_MAX, longer)
+    # budget than the default; anything unparseable falls back to it.
+    timeout = REQUEST_TIMEOUT
+    if header:
+        try:
+            requested = float(header)
+        except ValueError:
+            requested = 0
+        if requested > 0:
+            timeout = requested
+    if timeout <= 0:
+        return None
+    return min(timeout, REQUEST_TIMEOUT_MAX)
+
+
+def remaining() -> Optional[float]:
+    deadline = request_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def deadline_exceeded(stage: str) -> HTTPException:
+    deadline_exceeded_total.inc(stage)
+    return HTTPException(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        detail=f"Request deadline exceeded during {stage}"
+    )
+
+
+@asynccontextmanager
+async def deadline_stage(stage: str) -> AsyncIterator[None]:
+    # Bounds the block by what is left of the request's budget and records
+    # how long it took. A block that starts after the deadline fails at once
+    # instead of taking a pool connection or an upstream call.
+    budget = remaining()
+    if budget is not None and budget <= 0:
+        raise deadline_exceeded(stage)
+    started_at = time.perf_counter()
+    try:
+        async with asyncio.timeout(budget):
+            yield
+    except TimeoutError:
+        if budget is None or remaining() > 0:
+            raise  # a timeout of the block's own, not ours
+        raise deadline_exceeded(stage) from None
+    finally:
+        request_stage_duration_seconds.observe(time.perf_counter() - started_at, stage)
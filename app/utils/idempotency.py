@@ -0,0 +1,123 @@
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from fastapi import HTTPException, status
+
+from app.utils.config.metrics import Counter
+
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENCY_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_\-:.]{1,64}$")
+
+idempotent_requests_total = Counter(
+    "idempotent_requests_total", "Requests carrying an Idempotency-Key by outcome", ("outcome",)
+)
+
+
+def validate_idempotency_key(value: str) -> str:
+    if not IDEMPOTENCY_KEY_PATTERN.match(value):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{IDEMPOTENCY_HEADER} must be 1-64 characters of letters, digits, '-', '_', ':' or '.'"
+        )
+    return value
+
+
+def key_reused():
+    idempotent_requests_total.inc("mismatch")
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=f"{IDEMPOTENCY_HEADER} was already used with different parameters"
+    )
+
+
+class IdempotencyStore:
+    # Completed responses live in an LRU bounded by size and age; requests
+    # still running are tracked as futures so a concurrent duplicate waits
+    # for the original instead of running again. The database constraint
+    # covers what this process can't see: other workers and restarts.
+
+    def __init__(self, max_entries: int = IDEMPOTENCY_CACHE_SIZE, ttl: float = IDEMPOTENCY_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._responses: OrderedDict[Hashable, tuple[float, Hashable, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, tuple[Hashable, asyncio.Future]] = {}
+
+    def __len__(self):
+        return len(self._responses)
+
+    def get(self, key: Hashable, fingerprint: Hashable) -> Optional[Any]:
+        entry = self._responses.get(key)
+        if entry is None:
+            return None
+        expires_at, stored_fingerprint, response = entry
+        if expires_at <= time.monotonic():
+            del self._responses[key]
+            return None
+        if stored_fingerprint != fingerprint:
+            raise key_reused()
+        self._responses.move_to_end(key)
+        return response
+
+    def put(self, key: Hashable, fingerprint: Hashable, response: Any):
+        self._responses[key] = (time.monotonic() + self.ttl, fingerprint, response)
+        self._responses.move_to_end(key)
+        while len(self._responses) > self.max_entries:
+            self._responses.popitem(last=False)
+
+    async def run(
+            self,
+            key: Hashable,
+            fingerprint: Hashable,
+            execute: Callable[[], Awaitable[tuple[Any, bool]]]
+    ) -> tuple[Any, bool]:
+        # execute returns (response, replayed); replayed is True when it found
+        # the original in the database.
+        while True:
+            cached = self.get(key, fingerprint)
+            if cached is not None:
+                idempotent_requests_total.inc("replayed")
+                return cached, True
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            inflight_fingerprint, future = inflight
+            if inflight_fingerprint != fingerprint:
+                raise key_reused()
+            try:
+                response = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    continue  # the original went away before finishing; run it ourselves
+                raise
+            idempotent_requests_total.inc("joined")
+            return response, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (fingerprint, future)
+        try:
+            response, replayed = await execute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as ex:
+            future.set_exception(ex)
+            future.exception()  # waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        self.put(key, fingerprint, response)
+        future.set_result(response)
+        idempotent_requests_total.inc("replayed" if replayed else "executed")
+        return response, replayed
+
+
+idempotency_store = IdempotencyStore()
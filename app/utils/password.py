@@ -1,7 +1,58 @@
-import bcrypt
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from app.utils.config.metrics import Histogram
+from app.utils.deadline import deadline_exceeded, deadline_stage, request_deadline
+
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "4"))
+
+bcrypt_queue_seconds = Histogram("bcrypt_queue_seconds", "Time bcrypt work waits for a pool thread")
+bcrypt_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+
+
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    # passlib is only needed once someone logs in; keep it out of the import path.
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    return get_pwd_context().verify(password, password_hash)
 
 
 def hash_password(password: str) -> str:
+    import bcrypt
+
     salt = bcrypt.gensalt()
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
+
+
+class _DeadlinePassed(Exception):
+    def __init__(self, queued: float):
+        self.queued = queued
+
+
+async def run_bcrypt(func, *args):
+    submitted_at = time.perf_counter()
+    deadline = request_deadline.get()
+
+    def timed_call():
+        queued = time.perf_counter() - submitted_at
+        if deadline is not None and time.monotonic() >= deadline:
+            raise _DeadlinePassed(queued)  # the request gave up while this sat in the queue; don't burn a thread on it
+        return queued, func(*args)
+
+    async with deadline_stage("bcrypt"):
+        try:
+            queued, result = await asyncio.get_running_loop().run_in_executor(bcrypt_executor, timed_call)
+        except _DeadlinePassed as ex:
+            bcrypt_queue_seconds.observe(ex.queued)
+            raise deadline_exceeded("bcrypt") from None
+    bcrypt_queue_seconds.observe(queued)
+    return result
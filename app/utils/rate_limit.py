@@ -0,0 +1,144 @@
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional, Protocol
+
+from fastapi import Depends, HTTPException, Response, status
+
+from app.domain.repository.user_repository import AuthenticatedUser
+from app.utils.auth_deps import get_current_user
+from app.utils.config.metrics import Counter
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# <name>:<requests>/<seconds>, e.g. "convert:30/60,history:120/60"
+RATE_LIMITS = os.getenv("RATE_LIMITS", "convert:30/60,history:120/60,rate_history:60/60,jobs:10/60")
+RATE_LIMIT_SWEEP_EVERY = int(os.getenv("RATE_LIMIT_SWEEP_EVERY", "1024"))
+
+rate_limited_total = Counter("rate_limited_total", "Requests rejected by the per-user rate limiter", ("limit",))
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    requests: int
+    seconds: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.requests / self.seconds
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float
+
+
+class RateLimitBackend(Protocol):
+    async def hit(self, key: tuple, rule: RateLimitRule, cost: int = 1) -> RateLimitResult:
+        ...
+
+
+class InMemoryRateLimitBackend:
+    # Token bucket per key: O(1) time and two floats per active key. Buckets
+    # that have refilled completely are equivalent to missing ones, so a sweep
+    # every RATE_LIMIT_SWEEP_EVERY hits drops them and memory follows the
+    # number of recently active users.
+
+    def __init__(self, sweep_every: int = RATE_LIMIT_SWEEP_EVERY):
+        self._buckets: dict[tuple, list[float]] = {}
+        self._sweep_every = sweep_every
+        self._hits = 0
+
+    def __len__(self):
+        return len(self._buckets)
+
+    async def hit(self, key: tuple, rule: RateLimitRule, cost: int = 1) -> RateLimitResult:
+        now = time.monotonic()
+        self._hits += 1
+        if self._hits % self._sweep_every == 0:
+            self._sweep(now)
+
+        refill = rule.refill_per_second
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = float(rule.requests)
+        else:
+            tokens = min(float(rule.requests), bucket[0] + (now - bucket[1]) * refill)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        # [tokens, updated_at, full_at]
+        self._buckets[key] = [tokens, now, now + (rule.requests - tokens) / refill]
+
+        return RateLimitResult(
+            allowed=allowed,
+            limit=rule.requests,
+            remaining=int(tokens),
+            reset_after=(rule.requests - tokens) / refill,
+            retry_after=0.0 if allowed else (cost - tokens) / refill
+        )
+
+    def _sweep(self, now: float):
+        for key in [key for key, bucket in self._buckets.items() if bucket[2] <= now]:
+            del self._buckets[key]
+
+
+def parse_rate_limits(value: str) -> dict[str, RateLimitRule]:
+    rules = {}
+    for item in value.split(","):
+        name, _, spec = item.strip().partition(":")
+        requests, _, seconds = spec.partition("/")
+        if name and requests and seconds:
+            rules[name] = RateLimitRule(int(requests), float(seconds))
+    return rules
+
+
+_rules = parse_rate_limits(RATE_LIMITS)
+_backend: RateLimitBackend = InMemoryRateLimitBackend()
+
+
+def set_rate_limit_backend(backend: RateLimitBackend):
+    # A backend shared between workers (Redis, memcached...) only needs to
+    # implement hit(); the dependency and headers stay the same.
+    global _backend
+    _backend = backend
+
+
+def get_rate_limit_rule(name: str) -> Optional[RateLimitRule]:
+    return _rules.get(name)
+
+
+def _headers(result: RateLimitResult) -> dict:
+    headers = {
+        "RateLimit-Limit": str(result.limit),
+        "RateLimit-Remaining": str(result.remaining),
+        "RateLimit-Reset": str(math.ceil(result.reset_after)),
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(result.retry_after)))
+    return headers
+
+
+def rate_limit(name: str):
+    async def dependency(response: Response, current_user: AuthenticatedUser = Depends(get_current_user)):
+        rule = get_rate_limit_rule(name)
+        if not RATE_LIMIT_ENABLED or rule is None:
+            return
+
+        result = await _backend.hit((current_user.id, name), rule)
+        headers = _headers(result)
+        if not result.allowed:
+            rate_limited_total.inc(name)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers=headers
+            )
+        response.headers.update(headers)
+
+    return dependency
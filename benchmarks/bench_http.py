@@ -0,0 +1,285 @@
+"""HTTP load benchmark for the core endpoints.
+
+Boots the real app with uvicorn against a temporary SQLite database and a local
+apilayer stub, drives each scenario at fixed concurrency levels and reports
+req/s, latency percentiles and DB queries per request.
+
+Usage:
+    python -m benchmarks.bench_http --output bench_results.json
+    python -m benchmarks.bench_http --baseline bench_results.json --tolerance 0.15
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PASSWORD = "bench-password"
+
+
+@dataclass
+class ScenarioResult:
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    duration: float
+    latencies: list = field(default_factory=list)
+    db_queries: list = field(default_factory=list)
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return 0.0
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def summary(self) -> dict:
+        return {
+            "scenario": self.scenario,
+            "concurrency": self.concurrency,
+            "requests": self.requests,
+            "errors": self.errors,
+            "rps": round(self.requests / self.duration, 2) if self.duration else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 2),
+            "p95_ms": round(self.percentile(0.95) * 1000, 2),
+            "p99_ms": round(self.percentile(0.99) * 1000, 2),
+            "db_queries_per_request": (
+                round(sum(self.db_queries) / len(self.db_queries), 2) if self.db_queries else None
+            ),
+        }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+class BenchEnvironment:
+    def __init__(self, upstream_latency_ms: float):
+        self.upstream_latency_ms = upstream_latency_ms
+        self.workdir = tempfile.TemporaryDirectory(prefix="exchange-bench-")
+        self.app_port = free_port()
+        self.stub_port = free_port()
+        self.processes = []
+        self.env = {
+            **os.environ,
+            "PYTHONPATH": str(REPO_ROOT),
+            "USE_SQLITE": "true",
+            "DB_ENGINE": "sqlite",
+            "DB_NAME": "bench",
+            "DEBUG": "true",
+            # the scenarios replay the same few users far above the per-user limits
+            "RATE_LIMIT_ENABLED": "false",
+            "APIKEY": "bench",
+            "API_URL": f"http://127.0.0.1:{self.stub_port}/convert",
+        }
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.app_port}"
+
+    def _spawn(self, *args):
+        process = subprocess.Popen(
+            [sys.executable, *args], cwd=self.workdir.name, env=self.env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        self.processes.append(process)
+        return process
+
+    def start(self):
+        self._spawn("-m", "benchmarks.upstream_stub", "--port", str(self.stub_port),
+                    "--latency-ms", str(self.upstream_latency_ms))
+        subprocess.run(
+            [sys.executable, "-c",
+             "import asyncio; from app.gateways.database.connector import init_db; asyncio.run(init_db())"],
+            cwd=self.workdir.name, env=self.env, check=True, stdout=subprocess.DEVNULL
+        )
+        self._spawn("-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+                    "--port", str(self.app_port), "--log-level", "warning")
+        wait_for(f"http://127.0.0.1:{self.stub_port}/convert")
+        wait_for(f"{self.base_url}/health")
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.workdir.cleanup()
+
+
+async def seed_users(client: httpx.AsyncClient, count: int) -> list[dict]:
+    users = []
+    for i in range(count):
+        username = f"bench_user_{i}"
+        await client.post("/users/", json={"username": username, "password_hash": PASSWORD})
+        response = await client.post("/auth/login", json={"username": username, "password": PASSWORD})
+        response.raise_for_status()
+        users.append({
+            "id": response.json()["user_id"],
+            "username": username,
+            "headers": {"Cookie": f"session_id={response.cookies['session_id']}"},
+        })
+        for _ in range(30):
+            await client.get("/exchange/convert/USD/BRL/10", headers=users[-1]["headers"])
+    return users
+
+
+def login(user, rng):
+    return "POST", "/auth/login", {"json": {"username": user["username"], "password": PASSWORD}}
+
+
+def convert(user, rng):
+    from_currency, to_currency = rng.sample(["USD", "BRL", "EUR", "JPY"], 2)
+    return "GET", f"/exchange/convert/{from_currency}/{to_currency}/{rng.randint(1, 1000)}", {
+        "headers": user["headers"]
+    }
+
+
+def history(user, rng):
+    return "GET", f"/transaction/{user['id']}?page={rng.randint(1, 3)}&page_size=10", {
+        "headers": user["headers"]
+    }
+
+
+def me(user, rng):
+    return "GET", "/users/me", {"headers": user["headers"]}
+
+
+SCENARIOS = {
+    "login": [(login, 1)],
+    "convert": [(convert, 1)],
+    "history": [(history, 1)],
+    "me": [(me, 1)],
+    "mixed": [(me, 40), (history, 30), (convert, 25), (login, 5)],
+}
+
+
+async def run_scenario(client, users, name, concurrency, total_requests, seed) -> ScenarioResult:
+    rng = random.Random(seed)
+    actions, weights = zip(*SCENARIOS[name])
+    plan = [(rng.choice(users), rng.choices(actions, weights)[0]) for _ in range(total_requests)]
+    result = ScenarioResult(scenario=name, concurrency=concurrency, requests=total_requests, errors=0, duration=0.0)
+    queue = iter(plan)
+
+    async def worker():
+        worker_rng = random.Random(rng.random())
+        for user, action in queue:
+            method, url, kwargs = action(user, worker_rng)
+            started_at = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                if response.status_code >= 400:
+                    result.errors += 1
+                db_queries = response.headers.get("X-DB-Query-Count")
+                if db_queries is not None:
+                    result.db_queries.append(int(db_queries))
+            except httpx.HTTPError:
+                result.errors += 1
+            result.latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.duration = time.perf_counter() - started_at
+    return result
+
+
+async def run_suite(base_url, scenarios, concurrency_levels, total_requests, user_count, seed):
+    limits = httpx.Limits(max_connections=max(concurrency_levels), max_keepalive_connections=max(concurrency_levels))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        users = await seed_users(client, user_count)
+        results = []
+        for name in scenarios:
+            for concurrency in concurrency_levels:
+                result = await run_scenario(client, users, name, concurrency, total_requests, seed)
+                results.append(result.summary())
+                print(format_row(results[-1]), flush=True)
+        return results
+
+
+def format_row(row: dict) -> str:
+    db = row["db_queries_per_request"]
+    return (f"{row['scenario']:<10}{row['concurrency']:>6}{row['rps']:>10.1f}{row['p50_ms']:>10.1f}"
+            f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['errors']:>8}{db if db is not None else '-':>8}")
+
+
+def compare_with_baseline(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    expected = {(row["scenario"], row["concurrency"]): row for row in baseline}
+    regressions = []
+    for row in results:
+        reference = expected.get((row["scenario"], row["concurrency"]))
+        if reference is None:
+            continue
+        key = f"{row['scenario']}@{row['concurrency']}"
+        if row["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {row['p95_ms']} ms > baseline {reference['p95_ms']} ms")
+        if row["rps"] < reference["rps"] * (1 - tolerance):
+            regressions.append(f"{key}: {row['rps']} req/s < baseline {reference['rps']} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=300, help="requests per scenario and concurrency level")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--upstream-latency-ms", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="fail if results regress against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    concurrency_levels = [int(level) for level in args.concurrency.split(",")]
+
+    environment = BenchEnvironment(args.upstream_latency_ms)
+    environment.start()
+    try:
+        print(f"{'scenario':<10}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+              f"{'errors':>8}{'db/req':>8}")
+        results = asyncio.run(run_suite(
+            environment.base_url, scenarios, concurrency_levels, args.requests, args.users, args.seed
+        ))
+    finally:
+        environment.stop()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"results": results}, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["results"]
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Import-time report for the application entry point.
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters and
+reports the median cost of importing the app, the heaviest top-level packages
+and the modules that are expected to stay lazy. Use --budget-ms to fail when
+the import gets slower than the agreed budget.
+
+Usage:
+    python -m benchmarks.bench_import --runs 7
+    python -m benchmarks.bench_import --budget-ms 600 --output import_times.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+TARGET = "app.main"
+# Only needed once a request or startup step uses them.
+LAZY_MODULES = ("aiosqlite", "asyncpg", "passlib", "bcrypt", "httpx", "cProfile", "pstats")
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def run_once(target: str) -> tuple[float, dict, set]:
+    code = f"import sys, {target}; print(','.join(sys.modules))"
+    env = {**os.environ, "PYTHONPATH": str(REPO_ROOT), "USE_SQLITE": os.getenv("USE_SQLITE", "true")}
+    started_at = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    wall = time.perf_counter() - started_at
+
+    self_us = defaultdict(int)
+    cumulative_us = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        own, cumulative, _, name = match.groups()
+        self_us[name.split(".")[0]] += int(own)
+        cumulative_us[name] = int(cumulative)
+
+    return wall, {"target_us": cumulative_us.get(target, 0), "packages_us": dict(self_us)}, set(
+        result.stdout.strip().split(",")
+    )
+
+
+def run(target: str, runs: int) -> dict:
+    walls, targets, packages = [], [], defaultdict(list)
+    loaded = set()
+    for _ in range(runs):
+        wall, timings, modules = run_once(target)
+        walls.append(wall)
+        targets.append(timings["target_us"])
+        for package, us in timings["packages_us"].items():
+            packages[package].append(us)
+        loaded = modules
+
+    return {
+        "target": target,
+        "runs": runs,
+        "import_ms": round(statistics.median(targets) / 1000, 1),
+        "interpreter_ms": round(statistics.median(walls) * 1000, 1),
+        "packages_ms": {
+            package: round(statistics.median(values) / 1000, 1)
+            for package, values in sorted(packages.items(), key=lambda item: -statistics.median(item[1]))
+        },
+        "eager_lazy_modules": [module for module in LAZY_MODULES if module in loaded],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default=TARGET)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="number of packages to list")
+    parser.add_argument("--budget-ms", type=float, help="fail if the median import time exceeds this")
+    parser.add_argument("--output", help="write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = run(args.target, args.runs)
+
+    print(f"import {report['target']}: {report['import_ms']} ms "
+          f"(interpreter total {report['interpreter_ms']} ms, median of {report['runs']} runs)")
+    print(f"{'package':<24}{'self ms':>10}")
+    for package, ms in list(report["packages_ms"].items())[:args.top]:
+        print(f"{package:<24}{ms:>10.1f}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    failures = []
+    if report["eager_lazy_modules"]:
+        failures.append(f"imported eagerly: {', '.join(report['eager_lazy_modules'])}")
+    if args.budget_ms is not None and report["import_ms"] > args.budget_ms:
+        failures.append(f"import took {report['import_ms']} ms > budget {args.budget_ms} ms")
+    for failure in failures:
+        print(f"BUDGET {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
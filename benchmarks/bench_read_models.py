@@ -0,0 +1,153 @@
+"""Compare ORM entity loads with column projections on the history and auth paths.
+
+For a 100-row history page and for one authenticated request, measures CPU
+time per operation and, with tracemalloc, the peak allocation while loading
+and the memory the loaded objects keep alive. Each operation uses a fresh
+session, like a request does.
+
+Usage: python -m benchmarks.bench_read_models --iterations 2000 --page-size 100
+"""
+import argparse
+import gc
+import os
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+os.environ.setdefault("USE_SQLITE", "true")
+
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.domain.repository.transaction_repository import USER_TRANSACTIONS_PAGE_STMT  # noqa: E402
+from app.domain.repository.user_repository import (  # noqa: E402
+    AUTHENTICATED_USER_STMT,
+    FIND_SESSION_WITH_USER_STMT,
+    AuthenticatedUser,
+)
+from app.entities.entity import CurrencyConversionTransaction, User, UserSession  # noqa: E402
+from app.gateways.database.database_gateway import Base  # noqa: E402
+from app.schemas.currency_conversion_response_schema import CurrencyConversionResponse  # noqa: E402
+
+SESSION_ID = "bench-session"
+USER_ID = 1
+ENTITY_PAGE_STMT = (
+    select(CurrencyConversionTransaction)
+    .filter(CurrencyConversionTransaction.user_id == USER_ID)
+    .order_by(CurrencyConversionTransaction.timestamp.desc())
+)
+
+
+def seed(engine, rows: int):
+    Base.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{"id": USER_ID, "username": "bench", "password_hash": "x" * 60}])
+        conn.execute(UserSession.__table__.insert(), [{"session_id": SESSION_ID, "user_id": USER_ID}])
+        conn.execute(CurrencyConversionTransaction.__table__.insert(), [
+            {
+                "transaction_id": f"{i:036d}",
+                "user_id": USER_ID,
+                "from_currency": "USD",
+                "amount_from": 10.0 + i,
+                "to_currency": "BRL",
+                "amount_to": 50.0 + i,
+                "exchange_rate": 5.0,
+                "timestamp": now,
+            }
+            for i in range(rows)
+        ])
+
+
+def to_responses(transactions):
+    return [
+        CurrencyConversionResponse(
+            transaction_id=t.transaction_id,
+            user_id=t.user_id,
+            from_currency=t.from_currency,
+            amount_from=t.amount_from,
+            to_currency=t.to_currency,
+            amount_to=t.amount_to,
+            exchange_rate=t.exchange_rate,
+            timestamp=t.timestamp
+        )
+        for t in transactions
+    ]
+
+
+def scenarios(page_size: int):
+    def history_entities(session):
+        transactions = session.execute(ENTITY_PAGE_STMT.limit(page_size)).scalars().all()
+        return transactions, to_responses(transactions)
+
+    def history_projection(session):
+        rows = session.execute(
+            USER_TRANSACTIONS_PAGE_STMT, {"user_id": USER_ID, "offset": 0, "limit": page_size}
+        ).all()
+        return rows, to_responses(rows)
+
+    def auth_entities(session):
+        return session.execute(FIND_SESSION_WITH_USER_STMT, {"session_id": SESSION_ID}).first().User
+
+    def auth_projection(session):
+        row = session.execute(AUTHENTICATED_USER_STMT, {"session_id": SESSION_ID}).first()
+        return AuthenticatedUser(row.id, row.username, row.is_active, row.created_at)
+
+    return {
+        f"history_{page_size}": (history_entities, history_projection),
+        "auth": (auth_entities, auth_projection),
+    }
+
+
+def cpu_us(engine, operation, iterations: int) -> float:
+    started_at = time.process_time()
+    for _ in range(iterations):
+        with Session(engine) as session:
+            operation(session)
+    return (time.process_time() - started_at) / iterations * 1_000_000
+
+
+def memory_kib(engine, operation) -> tuple[float, float]:
+    with Session(engine) as session:
+        operation(session)  # compiled cache and connection warmed outside the measurement
+    gc.collect()
+    tracemalloc.start()
+    try:
+        with Session(engine) as session:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            result = operation(session)
+            retained, peak = tracemalloc.get_traced_memory()
+            del result
+    finally:
+        tracemalloc.stop()
+    return (peak - baseline) / 1024, (retained - baseline) / 1024
+
+
+def run(iterations: int, page_size: int):
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    seed(engine, page_size)
+    rows = []
+    for name, variants in scenarios(page_size).items():
+        for variant, operation in zip(("entities", "projection"), variants):
+            cpu_us(engine, operation, max(iterations // 10, 1))
+            peak, retained = memory_kib(engine, operation)
+            rows.append((name, variant, cpu_us(engine, operation, iterations), peak, retained))
+    engine.dispose()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<14}{'variant':<12}{'cpu us':>10}{'peak KiB':>11}{'kept KiB':>11}")
+    for name, variant, cpu, peak, retained in run(args.iterations, args.page_size):
+        print(f"{name:<14}{variant:<12}{cpu:>10.1f}{peak:>11.1f}{retained:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Conversion write throughput as transactions are spread over more shards.
+
+Each run points SHARD_URLS at N fresh SQLite files and has concurrent writers
+commit one transaction per conversion through TransactionRepository, the same
+path /exchange/convert takes. SQLite serializes writers per file, which makes
+the effect of spreading users over shards visible on one machine, given
+spare cores: on a single core the event loop, not the database, is the
+ceiling and the numbers stay flat.
+
+Usage: python -m benchmarks.bench_shard_writes --shards 1,2,4,8 --writers 32 --transactions 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+os.environ.setdefault("USE_SQLITE", "true")
+os.environ.setdefault("SLOW_QUERY_MS", "60000")  # lock waits are the point here, not worth a warning each
+
+from app.domain.repository.transaction_repository import TransactionRepository  # noqa: E402
+from app.entities.entity import CurrencyConversionTransaction  # noqa: E402
+from app.gateways.database.connector import init_shards  # noqa: E402
+from app.gateways.database.database_gateway import (  # noqa: E402
+    dispose_shard_engines,
+    set_shard_urls,
+    shard_for_user,
+)
+
+
+async def write_transactions(user_ids, transactions: int, writers: int) -> list[float]:
+    remaining = iter(range(transactions))
+    latencies = []
+
+    async def writer():
+        repo = TransactionRepository(None)
+        for _ in remaining:
+            user_id = random.choice(user_ids)
+            started_at = time.perf_counter()
+            await repo.add(CurrencyConversionTransaction(
+                transaction_id=str(uuid.uuid4()),
+                user_id=user_id,
+                from_currency="USD",
+                amount_from=10.0,
+                to_currency="BRL",
+                amount_to=50.0,
+                exchange_rate=5.0,
+                timestamp=datetime.now(timezone.utc)
+            ))
+            latencies.append(time.perf_counter() - started_at)
+
+    await asyncio.gather(*(writer() for _ in range(writers)))
+    return latencies
+
+
+async def run_one(shards: int, args) -> tuple[float, float, Counter]:
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        await set_shard_urls([f"sqlite+aiosqlite:///{directory}/shard_{index}.db" for index in range(shards)])
+        await init_shards()
+        user_ids = list(range(1, args.users + 1))
+        started_at = time.perf_counter()
+        latencies = await write_transactions(user_ids, args.transactions, args.writers)
+        elapsed = time.perf_counter() - started_at
+        spread = Counter(shard_for_user(user_id) for user_id in user_ids)
+        await dispose_shard_engines()
+    p95 = statistics.quantiles(latencies, n=20)[-1] * 1000
+    return args.transactions / elapsed, p95, spread
+
+
+async def run(args):
+    print(f"{'shards':>8}{'rows/s':>12}{'speedup':>10}{'p95 ms':>10}  users per shard")
+    baseline = None
+    for shards in (int(value) for value in args.shards.split(",")):
+        rate, p95, spread = await run_one(shards, args)
+        baseline = baseline or rate
+        users = "/".join(str(spread[index]) for index in range(shards))
+        print(f"{shards:>8}{rate:>12,.0f}{rate / baseline:>9.2f}x{p95:>10.1f}  {users}")
+    await set_shard_urls([])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", default="1,2,4,8", help="comma-separated shard counts to compare")
+    parser.add_argument("--writers", type=int, default=32, help="concurrent writers")
+    parser.add_argument("--transactions", type=int, default=5000, help="transactions written per run")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--dir", default=None, help="where to put the shard files (defaults to the temp dir)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Micro-benchmark for statement construction and compilation on the hot query paths.
+
+Usage: python -m benchmarks.bench_statements --iterations 20000
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("USE_SQLITE", "true")
+
+from sqlalchemy import create_engine, func, select  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.domain.repository.transaction_repository import (  # noqa: E402
+    USER_TRANSACTIONS_COUNT_STMT,
+    USER_TRANSACTIONS_PAGE_STMT,
+)
+from app.domain.repository.user_repository import FIND_SESSION_WITH_USER_STMT  # noqa: E402
+from app.entities.entity import CurrencyConversionTransaction, User, UserSession  # noqa: E402
+from app.gateways.database.database_gateway import Base  # noqa: E402
+
+SESSION_ID = "bench-session"
+USER_ID = 1
+
+
+def inline_auth():
+    return [
+        (select(UserSession).filter(UserSession.session_id == SESSION_ID), {}),
+        (select(User).filter(User.id == USER_ID), {}),
+    ]
+
+
+def prebuilt_auth():
+    return [(FIND_SESSION_WITH_USER_STMT, {"session_id": SESSION_ID})]
+
+
+def inline_history():
+    return [
+        (
+            select(CurrencyConversionTransaction)
+            .filter(CurrencyConversionTransaction.user_id == USER_ID)
+            .order_by(CurrencyConversionTransaction.timestamp.desc())
+            .offset(0)
+            .limit(10),
+            {}
+        ),
+        (select(func.count()).filter(CurrencyConversionTransaction.user_id == USER_ID), {}),
+    ]
+
+
+def prebuilt_history():
+    return [
+        (USER_TRANSACTIONS_PAGE_STMT, {"user_id": USER_ID, "offset": 0, "limit": 10}),
+        (USER_TRANSACTIONS_COUNT_STMT, {"user_id": USER_ID}),
+    ]
+
+
+SCENARIOS = {
+    "auth": (inline_auth, prebuilt_auth),
+    "history_page": (inline_history, prebuilt_history),
+}
+
+
+def seed(engine):
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{"id": USER_ID, "username": "bench", "password_hash": "x"}])
+        conn.execute(UserSession.__table__.insert(), [{"session_id": SESSION_ID, "user_id": USER_ID}])
+        conn.execute(CurrencyConversionTransaction.__table__.insert(), [
+            {
+                "transaction_id": f"tx-{i}",
+                "user_id": USER_ID,
+                "from_currency": "USD",
+                "amount_from": 1.0,
+                "to_currency": "BRL",
+                "amount_to": 5.0,
+                "exchange_rate": 5.0,
+                "timestamp": datetime.now(timezone.utc),
+            }
+            for i in range(20)
+        ])
+
+
+def per_request_us(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def run(iterations):
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    seed(engine)
+    dialect = engine.dialect
+    rows = []
+
+    with engine.connect() as conn:
+        for name, builders in SCENARIOS.items():
+            for variant, build in zip(("inline", "prebuilt"), builders):
+                def construct():
+                    build()
+
+                def compile_uncached():
+                    for stmt, _ in build():
+                        stmt.compile(dialect=dialect)
+
+                def execute():
+                    for stmt, params in build():
+                        conn.execute(stmt, params).all()
+
+                rows.append((
+                    name,
+                    variant,
+                    per_request_us(construct, iterations),
+                    per_request_us(compile_uncached, max(iterations // 10, 1)),
+                    per_request_us(execute, iterations),
+                ))
+
+    engine.dispose()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<14}{'variant':<10}{'build us':>12}{'compile us':>12}{'execute us':>12}")
+    for name, variant, build_us, compile_us, execute_us in run(args.iterations):
+        print(f"{name:<14}{variant:<10}{build_us:>12.1f}{compile_us:>12.1f}{execute_us:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
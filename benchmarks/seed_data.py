@@ -0,0 +1,175 @@
+"""Seed the configured database with synthetic users, sessions and transactions.
+
+Transactions are spread across users with a Zipf-like skew (a few heavy users,
+many light ones), over a time window and a weighted currency mix.
+
+Usage:
+    python -m benchmarks.seed_data --users 100000 --transactions 10000000 --skew 1.1 --days 365
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+from sqlalchemy import event, func, select
+
+from app.entities.entity import CurrencyConversionTransaction, User, UserSession
+from app.gateways.database.connector import init_db
+from app.gateways.database.database_gateway import dispose_engine, get_engine, get_session_factory
+from app.utils.password import hash_password
+
+RATES_TO_USD = {"USD": 1.0, "BRL": 0.18, "EUR": 1.08, "JPY": 0.0064, "GBP": 1.27, "CAD": 0.73}
+SEED_PASSWORD = "seed-password"
+
+
+def parse_currency_mix(value: str) -> tuple[list[str], list[float]]:
+    currencies, weights = [], []
+    for item in value.split(","):
+        code, _, weight = item.partition(":")
+        currencies.append(code.strip().upper())
+        weights.append(float(weight or 1))
+    return currencies, list(accumulate(weights))
+
+
+def user_cum_weights(count: int, skew: float) -> list[float]:
+    return list(accumulate(1 / math.pow(rank, skew) for rank in range(1, count + 1)))
+
+
+def speed_up_sqlite():
+    engine = get_engine()
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.close()
+
+
+async def next_user_id(session) -> int:
+    result = await session.execute(select(func.max(User.id)))
+    return (result.scalar() or 0) + 1
+
+
+async def seed_users(session, first_id: int, count: int, batch_size: int) -> list[int]:
+    password_hash = hash_password(SEED_PASSWORD)
+    created_at = datetime.now(timezone.utc)
+    user_ids = list(range(first_id, first_id + count))
+    for start in range(0, count, batch_size):
+        await User.bulk_insert(session, [
+            {
+                "id": user_id,
+                "username": f"seed_user_{user_id}",
+                "password_hash": password_hash,
+                "is_active": True,
+                "created_at": created_at,
+            }
+            for user_id in user_ids[start:start + batch_size]
+        ])
+    return user_ids
+
+
+async def seed_sessions(session, rng, user_ids, per_user: float, days: int, batch_size: int) -> int:
+    now = datetime.now(timezone.utc)
+    total = int(len(user_ids) * per_user)
+    inserted = 0
+    while inserted < total:
+        rows = []
+        for _ in range(min(batch_size, total - inserted)):
+            created_at = now - timedelta(seconds=rng.random() * days * 86400)
+            rows.append({
+                "session_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "user_id": rng.choice(user_ids),
+                "created_at": created_at,
+                "expires_at": created_at + timedelta(hours=1),
+            })
+        inserted += await UserSession.bulk_insert(session, rows)
+    return inserted
+
+
+def build_transactions(rng, count, user_ids, cum_user_weights, currency_mix, now, window) -> list[dict]:
+    currencies, cum_currency_weights = currency_mix
+    owners = rng.choices(user_ids, cum_weights=cum_user_weights, k=count)
+    sources = rng.choices(currencies, cum_weights=cum_currency_weights, k=count)
+    targets = rng.choices(currencies, cum_weights=cum_currency_weights, k=count)
+    rows = []
+    for user_id, from_currency, to_currency in zip(owners, sources, targets):
+        if from_currency == to_currency:
+            to_currency = currencies[(currencies.index(to_currency) + 1) % len(currencies)]
+        rate = RATES_TO_USD.get(from_currency, 1.0) / RATES_TO_USD.get(to_currency, 1.0)
+        amount = round(rng.lognormvariate(4, 1.2), 2)
+        rows.append({
+            "transaction_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "user_id": user_id,
+            "from_currency": from_currency,
+            "amount_from": amount,
+            "to_currency": to_currency,
+            "amount_to": round(amount * rate, 4),
+            "exchange_rate": rate,
+            "timestamp": datetime.fromtimestamp(now - rng.random() * window, timezone.utc),
+        })
+    return rows
+
+
+async def seed_transactions(session, rng, user_ids, total, skew, days, currency_mix, batch_size) -> int:
+    cum_user_weights = user_cum_weights(len(user_ids), skew)
+    now = datetime.now(timezone.utc).timestamp()
+    window = days * 86400
+    started_at = time.perf_counter()
+    inserted = 0
+
+    while inserted < total:
+        rows = build_transactions(
+            rng, min(batch_size, total - inserted), user_ids, cum_user_weights, currency_mix, now, window
+        )
+        inserted += await CurrencyConversionTransaction.bulk_insert(session, rows, chunk_size=batch_size)
+
+        elapsed = time.perf_counter() - started_at
+        print(f"  transactions: {inserted:,}/{total:,} ({inserted / elapsed:,.0f} rows/s)", flush=True)
+    return inserted
+
+
+async def seed(args):
+    rng = random.Random(args.seed)
+    speed_up_sqlite()
+    await init_db()
+
+    async with get_session_factory()() as session:
+        started_at = time.perf_counter()
+        first_id = await next_user_id(session)
+        user_ids = await seed_users(session, first_id, args.users, args.batch_size)
+        print(f"users: {len(user_ids):,}", flush=True)
+
+        sessions = await seed_sessions(session, rng, user_ids, args.sessions_per_user, args.days, args.batch_size)
+        print(f"sessions: {sessions:,}", flush=True)
+
+        transactions = await seed_transactions(
+            session, rng, user_ids, args.transactions, args.skew, args.days,
+            parse_currency_mix(args.currencies), args.batch_size
+        )
+        print(f"done: {transactions:,} transactions in {time.perf_counter() - started_at:.1f}s")
+
+    await dispose_engine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--transactions", type=int, default=1000000)
+    parser.add_argument("--sessions-per-user", type=float, default=3.0)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for transactions per user")
+    parser.add_argument("--days", type=int, default=365, help="spread transactions over this many days")
+    parser.add_argument("--currencies", default="USD:40,BRL:30,EUR:20,JPY:10", help="CODE:weight list")
+    parser.add_argument("--batch-size", type=int, default=50000, help="rows per committed batch")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(seed(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Local stand-in for the apilayer API used by the HTTP benchmarks.
+
+Usage: python -m benchmarks.upstream_stub --port 8099 --latency-ms 20
+"""
+import argparse
+import asyncio
+import math
+import time
+from datetime import date, timedelta
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+RATES_TO_USD = {"USD": 1.0, "BRL": 0.18, "EUR": 1.08, "JPY": 0.0064}
+LATENCY_SECONDS = 0.0
+
+
+def rate(from_currency: str, to_currency: str) -> float:
+    return RATES_TO_USD.get(from_currency, 1.0) / RATES_TO_USD.get(to_currency, 1.0)
+
+
+async def convert(request: Request):
+    if LATENCY_SECONDS:
+        await asyncio.sleep(LATENCY_SECONDS)
+    params = request.query_params
+    from_currency, to_currency = params.get("from", "USD"), params.get("to", "BRL")
+    amount = float(params.get("amount", "1"))
+    current_rate = rate(from_currency, to_currency)
+    return JSONResponse({
+        "success": True,
+        "query": {"from": from_currency, "to": to_currency, "amount": amount},
+        "info": {"timestamp": int(time.time()), "rate": current_rate},
+        "date": time.strftime("%Y-%m-%d"),
+        "result": amount * current_rate,
+    })
+
+
+async def timeseries(request: Request):
+    if LATENCY_SECONDS:
+        await asyncio.sleep(LATENCY_SECONDS)
+    params = request.query_params
+    base, symbols = params.get("base", "USD"), params.get("symbols", "BRL").split(",")
+    start_date, end_date = date.fromisoformat(params["start_date"]), date.fromisoformat(params["end_date"])
+    rates = {}
+    day = start_date
+    while day <= end_date:
+        # A gentle wave so charts have something to draw.
+        drift = 1 + 0.02 * math.sin(day.toordinal() / 15)
+        rates[day.isoformat()] = {symbol: rate(base, symbol) * drift for symbol in symbols}
+        day += timedelta(days=1)
+    return JSONResponse({
+        "success": True,
+        "timeseries": True,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "base": base,
+        "rates": rates,
+    })
+
+
+async def symbols(request: Request):
+    return JSONResponse({
+        "success": True,
+        "symbols": {code: code for code in RATES_TO_USD},
+    })
+
+
+app = Starlette(routes=[Route("/convert", convert), Route("/timeseries", timeseries), Route("/symbols", symbols)])
+
+
+def main():
+    global LATENCY_SECONDS
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    LATENCY_SECONDS = args.latency_ms / 1000
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
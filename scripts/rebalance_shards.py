@@ -0,0 +1,121 @@
+"""Move conversion transactions onto the shard that owns them.
+
+Run it after changing SHARD_URLS (or when turning sharding on) to copy every
+transaction to the shard its user maps to under the new shard list. Rows are
+read in transaction_id order, copied with ON CONFLICT DO NOTHING and only then
+deleted from the source, so an interrupted run can simply be started again.
+
+Usage:
+    python -m scripts.rebalance_shards --from-urls main --to-urls URL_0,URL_1,URL_2
+    python -m scripts.rebalance_shards --from-urls OLD_0,OLD_1 --to-urls NEW_0,NEW_1,NEW_2 --dry-run
+
+"main" stands for the application database (DB_URL). --to-urls defaults to SHARD_URLS.
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter, defaultdict
+
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.entities.entity import CurrencyConversionTransaction
+from app.gateways.database.connector import create_transactions_table
+from app.gateways.database.database_gateway import DB_URL, SHARD_URLS, parse_shard_urls, shard_for_user
+
+TRANSACTIONS = CurrencyConversionTransaction.__table__
+PAGE_STMT = select(TRANSACTIONS).order_by(TRANSACTIONS.c.transaction_id)
+
+
+def resolve_urls(value: str) -> list[str]:
+    return [DB_URL if url == "main" else url for url in parse_shard_urls(value)]
+
+
+async def rebalance_source(source_url, target_urls, targets, batch_size, dry_run) -> Counter:
+    # Keyset pagination: moved rows disappear from the source, so an OFFSET
+    # would skip rows; "transaction_id > last" doesn't.
+    moved = Counter()
+    engine = create_async_engine(source_url)
+    last_id = ""
+    try:
+        async with engine.connect() as conn:
+            tables = await conn.run_sync(lambda connection: inspect(connection).get_table_names())
+        if TRANSACTIONS.name not in tables:
+            return moved
+        async with async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)() as source:
+            while True:
+                result = await source.execute(
+                    PAGE_STMT.where(TRANSACTIONS.c.transaction_id > last_id).limit(batch_size)
+                )
+                rows = [dict(row) for row in result.mappings()]
+                if not rows:
+                    break
+                last_id = rows[-1]["transaction_id"]
+
+                by_target = defaultdict(list)
+                for row in rows:
+                    target_url = target_urls[shard_for_user(row["user_id"], len(target_urls))]
+                    if target_url != source_url:
+                        by_target[target_url].append(row)
+
+                for target_url, target_rows in by_target.items():
+                    moved[target_url] += len(target_rows)
+                    if dry_run:
+                        continue
+                    async with targets[target_url]() as target:
+                        await CurrencyConversionTransaction.upsert(
+                            target, target_rows, index_elements=["transaction_id"], update_fields=[]
+                        )
+                    await CurrencyConversionTransaction.bulk_delete(
+                        source,
+                        CurrencyConversionTransaction.transaction_id.in_([row["transaction_id"] for row in target_rows])
+                    )
+    finally:
+        await engine.dispose()
+    return moved
+
+
+async def rebalance(source_urls, target_urls, batch_size=1000, dry_run=False) -> dict[str, Counter]:
+    engines = [create_async_engine(url) for url in target_urls]
+    targets = {
+        url: async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+        for url, engine in zip(target_urls, engines)
+    }
+    try:
+        if not dry_run:
+            for engine in engines:
+                await create_transactions_table(engine)
+        return {
+            source_url: await rebalance_source(source_url, target_urls, targets, batch_size, dry_run)
+            for source_url in source_urls
+        }
+    finally:
+        for engine in engines:
+            await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from-urls", default="main", help="comma-separated source databases")
+    parser.add_argument("--to-urls", default=SHARD_URLS, help="comma-separated shard list, in order")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="only count the rows that would move")
+    args = parser.parse_args()
+
+    source_urls, target_urls = resolve_urls(args.from_urls), resolve_urls(args.to_urls)
+    if not target_urls:
+        parser.error("--to-urls (or SHARD_URLS) must list at least one database")
+
+    started_at = time.perf_counter()
+    results = asyncio.run(rebalance(source_urls, target_urls, args.batch_size, args.dry_run))
+    verb = "would move" if args.dry_run else "moved"
+    for source_url, moved in results.items():
+        for target_url, count in moved.items():
+            print(f"{source_url} -> {target_url}: {verb} {count:,} rows")
+        if not moved:
+            print(f"{source_url}: nothing to move")
+    print(f"done in {time.perf_counter() - started_at:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Print conversions from the transaction journal as JSON lines.
+
+Reads the segment files under TRANSACTION_JOURNAL_DIR (or --dir) without
+touching the database. Each line carries its journal offset; pass the last
+one plus one as --from-offset to resume.
+
+Usage:
+    python -m scripts.tail_journal --dir /var/lib/exchange/journal --from-offset 0 --follow
+"""
+import argparse
+import json
+import sys
+import time
+
+from app.gateways.journal.transaction_journal import TRANSACTION_JOURNAL_DIR, JournalReader
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=TRANSACTION_JOURNAL_DIR, help="journal directory")
+    parser.add_argument("--from-offset", type=int, default=0)
+    parser.add_argument("--follow", action="store_true", help="keep waiting for new records")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("--dir (or TRANSACTION_JOURNAL_DIR) is required")
+
+    reader = JournalReader(args.dir)
+    reader.next_offset = args.from_offset
+    try:
+        while True:
+            for record in reader.read():
+                sys.stdout.write(json.dumps(record.as_dict()) + "\n")
+            sys.stdout.flush()
+            if not args.follow:
+                break
+            time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
 from unittest.mock import AsyncMock
 from datetime import datetime
 
@@ -9,6 +10,7 @@ from app.main import app
 from app.gateways.database.connector import get_db
 from app.utils.auth_deps import get_current_user
 from app.entities.entity import User
+from app.gateways.database.database_gateway import Base
 
 
 @pytest.fixture()
@@ -34,3 +36,14 @@ async def async_client():
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
         yield client
+
+
+@pytest_asyncio.fixture()
+async def sqlite_session():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+    async with session_factory() as session:
+        yield session
+    await engine.dispose()
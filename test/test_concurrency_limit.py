@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from app.utils.config import concurrency_limit_middleware as admission
+from app.utils.config.concurrency_limit_middleware import AdaptiveLimiter
+
+
+def test_limiter_grows_while_in_use_and_shrinks_when_latency_climbs():
+    limiter = AdaptiveLimiter("test-gradient", initial=10, minimum=2, maximum=50)
+
+    for _ in range(20):
+        assert limiter.try_acquire()
+        limiter.release(0.01, failed=False, inflight_at_start=10)
+    grown = limiter.limit
+    assert grown > 10
+
+    for _ in range(20):
+        limiter.try_acquire()
+        limiter.release(0.2, failed=False, inflight_at_start=10)
+    assert limiter.limit < grown
+
+
+def test_limiter_backs_off_on_errors_and_respects_minimum():
+    limiter = AdaptiveLimiter("test-errors", initial=2, minimum=2, maximum=10)
+
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+
+    limiter.release(0.01, failed=True, inflight_at_start=2)
+    assert limiter.limit == 2
+    assert limiter.inflight == 1
+
+
+@pytest.mark.asyncio
+async def test_queued_request_gets_the_next_free_slot_or_is_shed():
+    limiter = AdaptiveLimiter("test-queue", initial=1, minimum=1, maximum=1, queue_size=1, queue_timeout=0.05)
+    assert await limiter.acquire()
+
+    waiting = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    assert not await limiter.acquire()  # queue is full
+
+    limiter.release(0.01, failed=False, inflight_at_start=1)
+    assert await waiting is True
+    assert limiter.inflight == 1
+
+    assert not await limiter.acquire()  # times out in the queue
+
+
+@pytest.mark.asyncio
+async def test_overloaded_group_is_shed_but_health_is_served(monkeypatch, async_client):
+    monkeypatch.setattr(admission, "_limiters", {})
+    limiter = admission.get_limiter("exchange")
+    limiter.limit = limiter.minimum
+    limiter.inflight = int(limiter.minimum)
+
+    response = await async_client.get("/exchange/convert/USD/BRL/10")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(admission.CONCURRENCY_RETRY_AFTER)
+
+    response = await async_client.get("/health")
+    assert response.status_code == 200
+
+
+def test_unknown_paths_share_one_group():
+    assert admission._group_for("/exchange/convert/USD/BRL/10") == "exchange"
+    assert admission._group_for("/users/1") == "users"
+    assert {admission._group_for(f"/a{i}") for i in range(100)} == {"other"}
+    assert admission._group_for("/") == "other"
@@ -0,0 +1,148 @@
+import asyncio
+import csv
+import io
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.domain.repository.job_repository import JobRepository
+from app.domain.service import conversion_job_service
+from app.domain.service.conversion_job_service import ConversionJobRunner, data_rows, parse_row
+from app.entities.entity import ConversionJob, CurrencyConversionTransaction
+from app.gateways.database.connector import get_db
+from app.main import app
+
+CSV = "from_currency,to_currency,amount\nUSD,BRL,10\n\nEUR,USD,2\nUSD,XXX,1\nUSD,BRL,-3\nusd,brl,1\n"
+
+
+@pytest.fixture()
+def jobs_db(sqlite_session, monkeypatch):
+    session_factory = async_sessionmaker(bind=sqlite_session.bind, expire_on_commit=False, class_=AsyncSession)
+    app.dependency_overrides[get_db] = lambda: sqlite_session
+    monkeypatch.setattr(conversion_job_service, "get_session_factory", lambda: session_factory)
+
+    calls = []
+
+    async def fake_fetch(from_currency, to_currency, amount):
+        calls.append((from_currency, to_currency))
+        return {"rate": {"BRL": 5.0, "USD": 1.1}[to_currency]}
+
+    monkeypatch.setattr(conversion_job_service.apilayer_gateway, "fetch_exchange_rate", fake_fetch)
+    return sqlite_session, calls
+
+
+async def _transactions(session):
+    return (await session.execute(select(func.count()).select_from(CurrencyConversionTransaction))).scalar_one()
+
+
+def test_rows_keep_their_line_numbers():
+    rows = list(data_rows(CSV))
+    assert [line for line, _ in rows] == [2, 4, 5, 6, 7]
+    assert parse_row(rows[0][1]) == ("USD", "BRL", 10.0)
+    assert parse_row(rows[2][1]) == "Invalid currency"
+    assert parse_row(rows[3][1]) == "Amount must be non-negative"
+
+
+@pytest.mark.asyncio
+async def test_upload_process_and_download(async_client, jobs_db):
+    session, calls = jobs_db
+    response = await async_client.post("/jobs/conversions", content=CSV, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "queued" and job["total_rows"] == 5
+
+    pending = await async_client.get(f"/jobs/{job['job_id']}/result")
+    assert pending.status_code == 409
+
+    runner = ConversionJobRunner(chunk_size=2)
+    assert await runner.claim_next() == job["job_id"]
+    assert await runner.claim_next() is None
+    await runner.process(job["job_id"])
+
+    status = (await async_client.get(f"/jobs/{job['job_id']}")).json()
+    assert (status["status"], status["processed_rows"], status["failed_rows"]) == ("completed", 5, 2)
+    assert await _transactions(session) == 3
+    assert len(calls) == 3  # one lookup per pair and chunk, not per row
+
+    result = await async_client.get(f"/jobs/{job['job_id']}/result")
+    rows = list(csv.DictReader(io.StringIO(result.text)))
+    assert [row["line"] for row in rows] == ["2", "4", "5", "6", "7"]
+    assert rows[0]["amount_to"] == "50.0"
+    assert rows[2]["error"] == "Invalid currency"
+
+
+@pytest.mark.asyncio
+async def test_job_resumes_from_last_committed_chunk(jobs_db):
+    session, _ = jobs_db
+    job = await JobRepository(session).create(1, CSV, 5)
+    runner = ConversionJobRunner(chunk_size=2)
+
+    # Simulate a crash after the first chunk was written but before the next.
+    first_chunk = list(data_rows(CSV))[:2]
+    await conversion_job_service.convert_chunk(session, job.job_id, 1, first_chunk, {})
+    await JobRepository(session).save_progress(job.job_id, 2, 0, "{}", 60)
+
+    await runner.process(job.job_id)
+
+    stored = (await session.execute(select(ConversionJob).where(ConversionJob.job_id == job.job_id))).scalar_one()
+    await session.refresh(stored)
+    assert (stored.status, stored.processed_rows, stored.failed_rows) == ("completed", 5, 2)
+    assert await _transactions(session) == 3
+
+
+@pytest.mark.asyncio
+async def test_upload_rejects_non_csv(async_client, jobs_db):
+    response = await async_client.post("/jobs/conversions", json={"rows": []})
+    assert response.status_code == 415
+
+
+@pytest.mark.asyncio
+async def test_transient_error_leaves_the_job_to_be_resumed(jobs_db, monkeypatch):
+    session, _ = jobs_db
+    job = await JobRepository(session).create(1, CSV, 5)
+    runner = ConversionJobRunner(chunk_size=2)
+    assert await runner.claim_next() == job.job_id
+    convert_chunk = conversion_job_service.convert_chunk
+    chunks = []
+
+    async def flaky_convert_chunk(*args):
+        chunks.append(args)
+        if len(chunks) == 2:
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+        return await convert_chunk(*args)
+
+    monkeypatch.setattr(conversion_job_service, "convert_chunk", flaky_convert_chunk)
+    await runner.process(job.job_id)
+
+    stored = await JobRepository(session).get(job.job_id)
+    await session.refresh(stored)
+    assert (stored.status, stored.processed_rows) == ("running", 2)
+
+    await runner.process(job.job_id)
+    await session.refresh(stored)
+    assert (stored.status, stored.processed_rows, stored.failed_rows) == ("completed", 5, 2)
+    assert await _transactions(session) == 3
+
+
+@pytest.mark.asyncio
+async def test_worker_survives_a_job_that_raises(monkeypatch):
+    runner = ConversionJobRunner(concurrency=1, poll_interval=0.01)
+    claims = iter(["job-1", "job-2"])
+    processed = []
+
+    async def claim_next():
+        return next(claims, None)
+
+    async def process(job_id):
+        processed.append(job_id)
+        raise OperationalError("SELECT", {}, Exception("connection reset"))
+
+    monkeypatch.setattr(runner, "claim_next", claim_next)
+    monkeypatch.setattr(runner, "process", process)
+    runner.start()
+    await asyncio.sleep(0.05)
+    await runner.stop()
+
+    assert processed == ["job-1", "job-2"]
@@ -0,0 +1,62 @@
+import pytest
+from fastapi import HTTPException
+from unittest.mock import patch
+
+from app.gateways.external_api import apilayer_gateway, currency_registry
+from app.gateways.external_api.currency_registry import (
+    CurrencyRegistry,
+    get_currency_registry,
+    refresh_currency_registry,
+)
+
+
+@pytest.fixture()
+def restore_registry():
+    registry = get_currency_registry()
+    yield
+    currency_registry.set_currency_registry(registry)
+
+
+def test_registry_validates_and_indexes_codes():
+    registry = CurrencyRegistry({"USD": "United States Dollar", "BRL": "Brazilian Real"}, "fallback")
+
+    assert "USD" in registry
+    assert registry.index_of("BRL") == 0
+    assert registry.index_of("XXX") is None
+    registry.validate("USD", "BRL")
+    with pytest.raises(HTTPException) as exc:
+        registry.validate("USD", "XXX")
+    assert exc.value.detail == "Invalid currency. Valid currencies are: BRL, USD"
+
+
+@pytest.mark.asyncio
+async def test_currencies_endpoint_supports_etag(async_client):
+    response = await async_client.get("/exchange/currencies")
+    assert response.status_code == 200
+    codes = [currency["code"] for currency in response.json()["currencies"]]
+    assert {"BRL", "USD", "EUR", "JPY"} <= set(codes)
+
+    cached = await async_client.get("/exchange/currencies", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+
+@pytest.mark.asyncio
+@patch("app.controller.exchange_controller.fetch_exchange_rate")
+async def test_refresh_loads_upstream_symbols(mock_fetch, async_client, monkeypatch, restore_registry):
+    async def fake_symbols():
+        return {"GBP": "British Pound Sterling", "USD": "United States Dollar", "bad": "ignored"}
+
+    monkeypatch.setattr(apilayer_gateway, "API_SYMBOLS_URL", "https://apilayer.test/symbols")
+    monkeypatch.setattr(apilayer_gateway, "fetch_currency_symbols", fake_symbols)
+    old_etag = get_currency_registry().etag
+
+    assert await refresh_currency_registry() == 5
+    registry = get_currency_registry()
+    assert registry.source == "upstream"
+    assert registry.etag != old_etag
+    assert "bad" not in registry
+
+    mock_fetch.return_value = {"rate": 1.25, "result": 12.5}
+    response = await async_client.get("/exchange/convert/GBP/USD/10")
+    assert response.status_code == 200
@@ -0,0 +1,152 @@
+import pytest
+from sqlalchemy import select
+
+from app.entities.entity import User
+
+
+def user_rows(count):
+    return [
+        {"id": i, "username": f"user{i}", "password_hash": "hash", "is_active": True}
+        for i in range(1, count + 1)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_and_find_many(sqlite_session):
+    inserted = await User.bulk_insert(sqlite_session, user_rows(25), chunk_size=10)
+    assert inserted == 25
+
+    users = await User.find_many(sqlite_session, [1, 5, 5, 25, 99], chunk_size=2)
+    assert sorted(user.id for user in users) == [1, 5, 25]
+
+
+@pytest.mark.asyncio
+async def test_upsert_updates_existing_rows(sqlite_session):
+    await User.bulk_insert(sqlite_session, user_rows(3))
+
+    rows = user_rows(4)
+    for row in rows:
+        row["is_active"] = False
+    affected = await User.upsert(sqlite_session, rows, update_fields=["is_active"])
+    assert affected == 4
+
+    result = await sqlite_session.execute(select(User.is_active))
+    assert result.scalars().all() == [False] * 4
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_and_delete_return_rowcounts(sqlite_session):
+    await User.bulk_insert(sqlite_session, user_rows(10))
+
+    assert await User.bulk_update(sqlite_session, User.id <= 4, is_active=False) == 4
+    assert await User.bulk_delete(sqlite_session, User.is_active.is_(False)) == 4
+
+    result = await sqlite_session.execute(select(User.id))
+    assert len(result.scalars().all()) == 6
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_requires_predicate(sqlite_session):
+    with pytest.raises(ValueError):
+        await User.bulk_delete(sqlite_session)
+
+
+@pytest.mark.asyncio
+async def test_init_db_skips_schema_checks_when_version_matches(monkeypatch):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import StaticPool
+
+    from app.gateways.database import connector
+
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    monkeypatch.setattr(connector, "get_engine", lambda: engine)
+    create_all_calls = []
+    original_create_all = connector.Base.metadata.create_all
+    monkeypatch.setattr(
+        connector.Base.metadata, "create_all",
+        lambda *args, **kwargs: create_all_calls.append(1) or original_create_all(*args, **kwargs)
+    )
+    inspected = []
+    original_inspect = connector.inspect
+    monkeypatch.setattr(connector, "inspect", lambda conn: inspected.append(1) or original_inspect(conn))
+
+    await connector.init_db()
+    await connector.init_db()
+
+    async with engine.connect() as conn:
+        stored = (await conn.execute(select(connector.schema_version_table.c.version))).scalar()
+    await engine.dispose()
+
+    assert stored == connector.schema_fingerprint()
+    assert len(create_all_calls) == 1
+    assert len(inspected) == 1
+
+
+BASELINE_SCHEMA = (
+    """CREATE TABLE users (
+        id INTEGER NOT NULL PRIMARY KEY, username VARCHAR(50) NOT NULL, password_hash VARCHAR(256) NOT NULL,
+        is_active BOOLEAN, created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL
+    )""",
+    "CREATE UNIQUE INDEX ix_users_username ON users (username)",
+    """CREATE TABLE currency_conversion_transactions (
+        transaction_id VARCHAR(36) NOT NULL PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users (id),
+        from_currency VARCHAR(3) NOT NULL, amount_from FLOAT NOT NULL, to_currency VARCHAR(3) NOT NULL,
+        amount_to FLOAT NOT NULL, exchange_rate FLOAT NOT NULL,
+        timestamp DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL
+    )""",
+    "CREATE INDEX ix_currency_conversion_transactions_user_id ON currency_conversion_transactions (user_id)",
+)
+
+
+@pytest.mark.asyncio
+async def test_init_db_migrates_a_baseline_database(monkeypatch, tmp_path):
+    from sqlalchemy import text
+    from sqlalchemy.exc import IntegrityError
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import StaticPool
+
+    from app.domain.repository.transaction_repository import TransactionRepository
+    from app.entities.entity import CurrencyConversionTransaction
+    from app.gateways.database import connector, database_gateway
+
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    shard = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'shard.db'}")
+    async with engine.begin() as conn:
+        for statement in BASELINE_SCHEMA:
+            await conn.execute(text(statement))
+        await conn.execute(text("INSERT INTO users (id, username, password_hash, is_active) VALUES (1, 'old', 'x', 1)"))
+    async with shard.begin() as conn:
+        for statement in BASELINE_SCHEMA[2:]:
+            await conn.execute(text(statement))
+    monkeypatch.setattr(connector, "get_engine", lambda: engine)
+    monkeypatch.setattr(connector, "get_shard_urls", lambda: ["shard"])
+    monkeypatch.setattr(connector, "get_shard_engine", lambda index: shard)
+    monkeypatch.setattr(database_gateway, "sharding_enabled", lambda: False)
+
+    await connector.init_db()
+
+    for target in (engine, shard):
+        async with target.connect() as conn:
+            indexes = await conn.run_sync(
+                lambda connection: {index["name"] for index in connector.inspect(connection).get_indexes(
+                    "currency_conversion_transactions"
+                )}
+            )
+        assert "uq_transactions_user_idempotency_key" in indexes
+
+    session = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)()
+    repo = TransactionRepository(session)
+
+    def conversion(transaction_id):
+        return CurrencyConversionTransaction(
+            transaction_id=transaction_id, user_id=1, from_currency="USD", amount_from=1.0, to_currency="BRL",
+            amount_to=5.0, exchange_rate=5.0, idempotency_key="retry-1"
+        )
+
+    await repo.add(conversion("tx-1"))
+    assert (await repo.find_by_idempotency_key(1, "retry-1")).transaction_id == "tx-1"
+    with pytest.raises(IntegrityError):
+        await repo.add(conversion("tx-2"))
+    await session.close()
+    await engine.dispose()
+    await shard.dispose()
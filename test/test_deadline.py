@@ -0,0 +1,98 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import HTTPException
+
+from app.gateways.external_api import apilayer_gateway
+from app.utils import deadline, password
+from app.utils.config.concurrency_limit_middleware import AdaptiveLimiter
+from app.utils.deadline import deadline_stage, request_deadline, request_timeout
+from app.utils.password import run_bcrypt
+
+
+def test_client_header_sets_the_budget_within_limits(monkeypatch):
+    monkeypatch.setattr(deadline, "REQUEST_TIMEOUT", 15.0)
+    monkeypatch.setattr(deadline, "REQUEST_TIMEOUT_MAX", 60.0)
+    assert request_timeout(None) == 15.0
+    assert request_timeout("2.5") == 2.5
+    assert request_timeout("600") == 60.0
+    assert request_timeout("soon") == request_timeout("0") == 15.0
+
+    monkeypatch.setattr(deadline, "REQUEST_TIMEOUT", 0.0)
+    assert request_timeout(None) is None
+
+
+@pytest.mark.asyncio
+async def test_slow_upstream_answers_504_within_the_budget(monkeypatch, async_client):
+    class SlowClient:
+        async def get(self, *args, **kwargs):
+            await asyncio.sleep(5)
+
+    monkeypatch.setattr(apilayer_gateway, "get_http_client", lambda: SlowClient())
+    monkeypatch.setattr(apilayer_gateway, "_shared_table", None)
+    apilayer_gateway.clear_rate_cache()
+
+    started_at = time.perf_counter()
+    response = await async_client.get("/exchange/convert/USD/BRL/10", headers={"X-Request-Timeout": "0.05"})
+
+    assert response.status_code == 504
+    assert response.json()["detail"] == "Request deadline exceeded during upstream"
+    assert time.perf_counter() - started_at < 1
+
+
+@pytest.mark.asyncio
+async def test_expired_budget_skips_the_work():
+    calls = []
+    token = request_deadline.set(time.monotonic() - 1)
+    try:
+        with pytest.raises(HTTPException) as exc:
+            await run_bcrypt(calls.append, "secret")
+        with pytest.raises(HTTPException):
+            async with deadline_stage("db"):
+                calls.append("db")
+    finally:
+        request_deadline.reset(token)
+
+    assert exc.value.status_code == 504
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_bcrypt_dequeued_after_the_deadline_is_a_504(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(password, "bcrypt_executor", executor)
+
+    @asynccontextmanager
+    async def no_timeout(stage):
+        yield  # only the check in the pool thread applies
+
+    monkeypatch.setattr(password, "deadline_stage", no_timeout)
+    executor.submit(time.sleep, 0.1)
+    calls = []
+    token = request_deadline.set(time.monotonic() + 0.02)
+    try:
+        with pytest.raises(HTTPException) as exc:
+            await run_bcrypt(calls.append, "secret")
+    finally:
+        request_deadline.reset(token)
+        executor.shutdown()
+
+    assert exc.value.status_code == 504
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_queue_wait_is_capped_by_the_budget():
+    limiter = AdaptiveLimiter("test-deadline", initial=1, minimum=1, maximum=1, queue_size=1, queue_timeout=10)
+    assert await limiter.acquire()
+
+    token = request_deadline.set(time.monotonic() + 0.05)
+    try:
+        started_at = time.perf_counter()
+        assert not await limiter.acquire()
+    finally:
+        request_deadline.reset(token)
+    assert time.perf_counter() - started_at < 1
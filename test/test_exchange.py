@@ -25,3 +25,36 @@ async def test_convert_currency_negative_amount(async_client):
     response = await async_client.get("/exchange/convert/USD/BRL/-5")
     assert response.status_code == 400
     assert "Amount must be non-negative" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_rate_cache_serves_repeated_pairs_without_upstream_call(monkeypatch):
+    import httpx
+    from app.gateways.external_api import apilayer_gateway
+
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(200, json={
+            "success": True,
+            "query": {"from": "USD", "to": "BRL", "amount": 10},
+            "info": {"rate": 5.0},
+            "result": 50.0,
+            "date": "2024-01-01"
+        })
+
+    monkeypatch.setattr(apilayer_gateway, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(apilayer_gateway, "API_URL", "https://apilayer.test/convert")
+    monkeypatch.setattr(apilayer_gateway, "RATE_CACHE_TTL", 60.0)
+    apilayer_gateway.clear_rate_cache()
+
+    first = await apilayer_gateway.fetch_exchange_rate("USD", "BRL", 10)
+    second = await apilayer_gateway.fetch_exchange_rate("USD", "BRL", 3)
+    await apilayer_gateway.close_http_client()
+    apilayer_gateway.clear_rate_cache()
+
+    assert len(calls) == 1
+    assert first["result"] == 50.0
+    assert second["rate"] == 5.0
+    assert second["result"] == 15.0
@@ -1,5 +1,7 @@
 import pytest
 
+from app.main import app
+
 
 @pytest.mark.asyncio
 async def test_health_check(async_client):
@@ -8,4 +10,13 @@ async def test_health_check(async_client):
     assert response.json() == {"message": "OK"}
 
 
+@pytest.mark.asyncio
+async def test_readiness_reports_warm_up_state(async_client):
+    app.state.ready = False
+    response = await async_client.get("/health/ready")
+    assert response.status_code == 503
 
+    app.state.ready = True
+    response = await async_client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json() == {"message": "READY"}
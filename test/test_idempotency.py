@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from unittest.mock import patch
+
+from app.entities.entity import CurrencyConversionTransaction
+from app.gateways.database.connector import get_db
+from app.main import app
+from app.utils import idempotency
+from app.utils.idempotency import IdempotencyStore
+
+
+@pytest.fixture()
+def real_db(sqlite_session, monkeypatch):
+    app.dependency_overrides[get_db] = lambda: sqlite_session
+    monkeypatch.setattr(idempotency, "idempotency_store", IdempotencyStore())
+    monkeypatch.setattr("app.controller.exchange_controller.idempotency_store", idempotency.idempotency_store)
+    return sqlite_session
+
+
+async def _count(session):
+    return (await session.execute(select(func.count()).select_from(CurrencyConversionTransaction))).scalar_one()
+
+
+@pytest.mark.asyncio
+@patch("app.controller.exchange_controller.fetch_exchange_rate")
+async def test_repeated_key_replays_first_response(mock_fetch, async_client, real_db):
+    mock_fetch.return_value = {"rate": 5.0, "result": 50.0}
+    headers = {"Idempotency-Key": "retry-1"}
+
+    first = await async_client.get("/exchange/convert/USD/BRL/10", headers=headers)
+    second = await async_client.get("/exchange/convert/USD/BRL/10", headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert mock_fetch.await_count == 1
+    assert await _count(real_db) == 1
+
+    reused = await async_client.get("/exchange/convert/USD/BRL/20", headers=headers)
+    assert reused.status_code == 422
+
+
+@pytest.mark.asyncio
+@patch("app.controller.exchange_controller.fetch_exchange_rate")
+async def test_concurrent_duplicates_wait_for_the_original(mock_fetch, async_client, real_db):
+    async def slow_fetch(*args):
+        await asyncio.sleep(0.05)
+        return {"rate": 5.0, "result": 50.0}
+
+    mock_fetch.side_effect = slow_fetch
+    headers = {"Idempotency-Key": "burst"}
+
+    responses = await asyncio.gather(
+        *(async_client.get("/exchange/convert/USD/BRL/10", headers=headers) for _ in range(3))
+    )
+
+    assert {response.json()["transaction_id"] for response in responses} == {responses[0].json()["transaction_id"]}
+    assert mock_fetch.await_count == 1
+    assert await _count(real_db) == 1
+
+
+@pytest.mark.asyncio
+@patch("app.controller.exchange_controller.fetch_exchange_rate")
+async def test_key_is_replayed_from_database_after_restart(mock_fetch, async_client, real_db, monkeypatch):
+    mock_fetch.return_value = {"rate": 5.0, "result": 50.0}
+    headers = {"Idempotency-Key": "after-restart"}
+    first = await async_client.get("/exchange/convert/USD/BRL/10", headers=headers)
+
+    monkeypatch.setattr("app.controller.exchange_controller.idempotency_store", IdempotencyStore())
+    second = await async_client.get("/exchange/convert/USD/BRL/10", headers=headers)
+
+    assert second.json()["transaction_id"] == first.json()["transaction_id"]
+    assert mock_fetch.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_waiters_see_the_original_failure():
+    store = IdempotencyStore()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise HTTPException(status_code=502, detail="upstream down")
+
+    results = await asyncio.gather(
+        store.run("key", "fp", failing), store.run("key", "fp", failing), return_exceptions=True
+    )
+
+    assert [result.status_code for result in results] == [502, 502]
+    assert len(store) == 0
@@ -0,0 +1,49 @@
+import logging
+import queue
+from datetime import datetime
+
+from app.utils.config.log import BatchingQueueListener, DailyFileHandler, DroppingQueueHandler
+
+
+def make_record(message, created=None, level=logging.INFO):
+    record = logging.LogRecord("test", level, __file__, 0, message, None, None)
+    if created is not None:
+        record.created = created.timestamp()
+    return record
+
+
+def test_daily_file_handler_rotates_at_midnight(tmp_path):
+    handler = DailyFileHandler(tmp_path)
+    handler._next_rollover = datetime(2025, 5, 10).timestamp()
+
+    handler.handle(make_record("before", datetime(2025, 5, 9, 23, 59)))
+    handler.handle(make_record("after", datetime(2025, 5, 10, 0, 1)))
+    handler.close()
+
+    assert (tmp_path / "exchange_2025-05-10.log").read_text().strip() == "after"
+
+
+def test_dropping_queue_handler_never_blocks():
+    log_queue = queue.Queue(maxsize=2)
+    handler = DroppingQueueHandler(log_queue)
+
+    for i in range(5):
+        handler.handle(make_record(f"warning {i}", level=logging.WARNING))
+
+    assert log_queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_listener_writes_records_in_batches(tmp_path):
+    log_queue = queue.Queue(maxsize=100)
+    queue_handler = DroppingQueueHandler(log_queue)
+    file_handler = DailyFileHandler(tmp_path)
+    listener = BatchingQueueListener(log_queue, [file_handler], queue_handler, batch_size=10)
+    listener.start()
+
+    for i in range(25):
+        queue_handler.handle(make_record(f"line {i}"))
+    listener.stop()
+
+    lines = file_handler._filename_for(datetime.now()).read_text().splitlines()
+    assert lines == [f"line {i}" for i in range(25)]
@@ -45,17 +45,32 @@ async def test_logout_without_session(async_client):
     assert response.status_code == 401
 
 
+@pytest.mark.asyncio
 @patch("app.domain.service.auth_service.UserRepository")
 async def test_login_invalid_password(mock_repo, async_client):
-    user = type("User", (), {"id": 1, "username": "admin", "password_hash": "hashed"})()
+    user = type("User", (), {"id": 1, "username": "admin", "password_hash": "hashed", "is_active": True})()
     instance = mock_repo.return_value
     instance.find_by_username = AsyncMock(return_value=user)
 
-    with patch("app.domain.service.auth_service.pwd_context.verify", return_value=False):
+    with patch("app.domain.service.auth_service.verify_password", return_value=False):
         response = await async_client.post("/auth/login", json={"username": "admin", "password": "wrong"})
         assert response.status_code == 401
 
 
+@pytest.mark.asyncio
+@patch("app.domain.service.auth_service.UserRepository")
+async def test_login_inactive_user(mock_repo, async_client):
+    user = type("User", (), {"id": 1, "username": "admin", "password_hash": "hashed", "is_active": False})()
+    instance = mock_repo.return_value
+    instance.find_by_username = AsyncMock(return_value=user)
+
+    with patch("app.domain.service.auth_service.verify_password", return_value=True) as verify:
+        response = await async_client.post("/auth/login", json={"username": "admin", "password": "admin"})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Invalid credentials"
+    verify.assert_not_called()
+
+
 def test_hash_password():
     hashed = hash_password("abc123")
     assert hashed.startswith("$2b$")
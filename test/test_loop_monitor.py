@@ -0,0 +1,36 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from app.utils.config.log import correlation_id, current_route
+from app.utils.config.loop_monitor import LoopMonitor, event_loop_stalls_total
+
+
+def blocking_call():
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_stall_is_logged_with_blocking_stack_and_request_context(caplog):
+    monitor = LoopMonitor(interval=0.02, threshold=0.1)
+    monitor.start()
+    stalls_before = event_loop_stalls_total.value()
+
+    async def handler():
+        correlation_id.set("blocking-request")
+        current_route.set("GET /slow")
+        blocking_call()
+
+    with caplog.at_level(logging.WARNING, logger="app.utils.config.loop_monitor"):
+        await asyncio.sleep(0.05)
+        await asyncio.create_task(handler())
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    messages = [record.getMessage() for record in caplog.records if "Event loop blocked" in record.getMessage()]
+    assert len(messages) == 1
+    assert "CID:blocking-request route:GET /slow" in messages[0]
+    assert "blocking_call" in messages[0]
+    assert event_loop_stalls_total.value() == stalls_before + 1
@@ -0,0 +1,40 @@
+import pytest
+
+from app.utils.config.metrics import MetricsRegistry, Counter, Histogram
+from app.utils.password import run_bcrypt, bcrypt_queue_seconds
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0), registry=registry)
+    Counter("hits_total", "Hits", registry=registry).inc()
+
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(2.0, "/a")
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/a"} 3' in text
+    assert "hits_total 1.0" in text
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_route_latency(async_client):
+    await async_client.get("/health")
+    response = await async_client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/health"}' in response.text
+    assert "db_pool_checked_out" in response.text
+
+
+@pytest.mark.asyncio
+async def test_run_bcrypt_records_queue_time():
+    before = bcrypt_queue_seconds.count()
+    assert await run_bcrypt(pow, 2, 3) == 8
+    assert bcrypt_queue_seconds.count() == before + 1
@@ -0,0 +1,36 @@
+import pytest
+
+from app.utils.config import profiling_middleware
+
+
+@pytest.fixture()
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling_middleware, "PROFILE_TOKEN", "secret")
+    monkeypatch.setattr(profiling_middleware, "PROFILE_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_request_with_debug_header_is_profiled(profile_dir, async_client):
+    response = await async_client.get("/health", headers={"X-Profile": "secret"})
+
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    assert (profile_dir / f"{profile_id}.prof").exists()
+    assert "GET /health -> 200" in (profile_dir / f"{profile_id}.txt").read_text()
+
+
+@pytest.mark.asyncio
+async def test_request_without_valid_header_is_not_profiled(profile_dir, async_client):
+    response = await async_client.get("/health", headers={"X-Profile": "wrong"})
+
+    assert "X-Profile-Id" not in response.headers
+    assert list(profile_dir.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_non_ascii_header_is_not_profiled(profile_dir, async_client):
+    response = await async_client.get("/health", headers={"X-Profile": "s\xe9cret".encode("latin-1")})
+
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
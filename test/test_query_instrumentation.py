@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.responses import Response
+
+from app.gateways.database import query_instrumentation
+from app.gateways.database.query_instrumentation import (
+    QueryStats,
+    install_query_instrumentation,
+    start_request_stats,
+    finish_request_stats,
+)
+
+
+@pytest.mark.asyncio
+async def test_queries_are_recorded_per_request():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    install_query_instrumentation(engine)
+    stats = start_request_stats()
+
+    async with engine.connect() as conn:
+        for _ in range(3):
+            await conn.execute(text("SELECT 1"))
+
+    await engine.dispose()
+    assert stats.count == 3
+    assert stats.total_time > 0
+    assert stats.slowest_statement == "SELECT 1"
+
+
+def test_repeated_statements_are_flagged():
+    stats = QueryStats()
+    for _ in range(4):
+        stats.record("SELECT users.id FROM users WHERE users.id = ?", 0.001)
+    stats.record("SELECT 1", 0.001)
+
+    assert stats.repeated(3) == [("SELECT users.id FROM users WHERE users.id = ?", 4)]
+
+
+def test_debug_headers(monkeypatch):
+    monkeypatch.setattr(query_instrumentation, "DEBUG", True)
+    stats = QueryStats()
+    stats.record("SELECT 1", 0.002)
+    request = type("Request", (), {"method": "GET", "url": type("URL", (), {"path": "/health"})()})()
+    response = Response()
+
+    finish_request_stats(stats, request, response)
+
+    assert response.headers["X-DB-Query-Count"] == "1"
+    assert float(response.headers["X-DB-Time-Ms"]) == pytest.approx(2.0)
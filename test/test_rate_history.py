@@ -0,0 +1,104 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.domain.service import rate_history_service
+from app.domain.service.rate_history_service import (
+    RateHistoryService,
+    auto_interval,
+    flush_rate_samples,
+    parse_interval,
+    record_rate_sample,
+    tier_for,
+)
+
+
+def test_interval_picks_coarsest_tier():
+    assert tier_for(parse_interval("15m")) == "minute"
+    assert tier_for(parse_interval("4h")) == "hour"
+    assert tier_for(parse_interval("1w")) == "day"
+    with pytest.raises(HTTPException):
+        parse_interval("10s")
+
+    end = datetime(2024, 12, 31, tzinfo=timezone.utc)
+    assert auto_interval(end - timedelta(days=365), end) == "1d"
+    assert auto_interval(end - timedelta(hours=2), end) == "1m"
+
+
+@pytest.mark.asyncio
+async def test_flush_merges_samples_into_every_tier(sqlite_session):
+    base = datetime(2024, 3, 1, 10, 0, tzinfo=timezone.utc).timestamp()
+    record_rate_sample("USD", "BRL", 5.0, base + 1)
+    record_rate_sample("USD", "BRL", 5.3, base + 20)
+    record_rate_sample("USD", "BRL", 4.9, base + 40)
+    assert await flush_rate_samples(sqlite_session) == 1
+
+    record_rate_sample("USD", "BRL", 5.1, base + 3600)
+    await flush_rate_samples(sqlite_session)
+
+    service = RateHistoryService(sqlite_session)
+    start = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    minute = await service.repo.get_bars("USD", "BRL", "minute", start, start + timedelta(days=1))
+    day = await service.repo.get_bars("USD", "BRL", "day", start, start + timedelta(days=1))
+
+    assert [bar[1:] for bar in minute] == [(5.0, 5.3, 4.9, 4.9), (5.1, 5.1, 5.1, 5.1)]
+    assert day == [(start, 5.0, 5.3, 4.9, 5.1)]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_the_samples(sqlite_session, monkeypatch):
+    base = datetime(2024, 3, 2, 10, 0, tzinfo=timezone.utc).timestamp()
+    record_rate_sample("USD", "EUR", 0.9, base + 1)
+    merge = rate_history_service.RateHistoryRepository.merge
+
+    async def failing_merge(self, rows):
+        record_rate_sample("USD", "EUR", 0.95, base + 30)  # arrives while the write is in flight
+        raise HTTPException(status_code=500, detail="database unavailable")
+
+    monkeypatch.setattr(rate_history_service.RateHistoryRepository, "merge", failing_merge)
+    with pytest.raises(HTTPException):
+        await flush_rate_samples(sqlite_session)
+
+    monkeypatch.setattr(rate_history_service.RateHistoryRepository, "merge", merge)
+    assert await flush_rate_samples(sqlite_session) == 1
+    start = datetime(2024, 3, 2, tzinfo=timezone.utc)
+    minute = await RateHistoryService(sqlite_session).repo.get_bars(
+        "USD", "EUR", "minute", start, start + timedelta(days=1)
+    )
+    assert [bar[1:] for bar in minute] == [(0.9, 0.95, 0.9, 0.95)]
+
+
+@pytest.mark.asyncio
+async def test_history_backfills_only_missing_days(sqlite_session, monkeypatch):
+    calls = []
+
+    async def fake_timeseries(from_currency, to_currency, start_date, end_date):
+        calls.append((start_date, end_date))
+        days = (end_date - start_date).days + 1
+        return {start_date + timedelta(days=i): 5.0 + i for i in range(days)}
+
+    monkeypatch.setattr(rate_history_service, "fetch_rate_timeseries", fake_timeseries)
+    service = RateHistoryService(sqlite_session)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    await service.backfill_days("USD", "BRL", date(2024, 1, 4), date(2024, 1, 5))
+    history = await service.get_history("USD", "BRL", start, start + timedelta(days=10), "1d")
+    assert calls == [(date(2024, 1, 4), date(2024, 1, 5)), (date(2024, 1, 1), date(2024, 1, 3)),
+                     (date(2024, 1, 6), date(2024, 1, 10))]
+    assert len(history["points"]) == 10
+    assert history["tier"] == "day"
+
+    weekly = await service.get_history("USD", "BRL", start, start + timedelta(days=10), "1w")
+    assert len(calls) == 3
+    assert all(point["low"] <= point["close"] <= point["high"] for point in weekly["points"])
+
+
+@pytest.mark.asyncio
+async def test_history_rejects_too_many_points(async_client):
+    response = await async_client.get("/exchange/history/USD/BRL?start=2020-01-01T00:00:00Z&interval=1m")
+    assert response.status_code == 400
+    assert "maximum" in response.json()["detail"]
+
+    response = await async_client.get("/exchange/history/USD/XXX")
+    assert response.status_code == 400
@@ -0,0 +1,63 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.utils import rate_limit as limiter_module
+from app.utils.rate_limit import InMemoryRateLimitBackend, RateLimitRule, parse_rate_limits
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("convert:30/60, history:5/1,bad") == {
+        "convert": RateLimitRule(30, 60.0),
+        "history": RateLimitRule(5, 1.0),
+    }
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_refills(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(limiter_module.time, "monotonic", lambda: now[0])
+    backend = InMemoryRateLimitBackend()
+    rule = RateLimitRule(2, 10.0)
+
+    assert (await backend.hit((1, "convert"), rule)).remaining == 1
+    assert (await backend.hit((1, "convert"), rule)).allowed
+    denied = await backend.hit((1, "convert"), rule)
+    assert not denied.allowed
+    assert denied.retry_after == pytest.approx(5.0)
+    assert (await backend.hit((2, "convert"), rule)).allowed
+
+    now[0] += 5
+    assert (await backend.hit((1, "convert"), rule)).allowed
+
+
+@pytest.mark.asyncio
+async def test_sweep_drops_refilled_buckets(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(limiter_module.time, "monotonic", lambda: now[0])
+    backend = InMemoryRateLimitBackend(sweep_every=3)
+    rule = RateLimitRule(10, 10.0)
+
+    await backend.hit((1, "convert"), rule)
+    await backend.hit((2, "convert"), rule)
+    now[0] += 2
+    await backend.hit((3, "convert"), rule)
+
+    assert len(backend) == 1
+
+
+@pytest.mark.asyncio
+@patch("app.controller.exchange_controller.fetch_exchange_rate")
+async def test_convert_returns_429_with_rate_limit_headers(mock_fetch, monkeypatch, async_client):
+    mock_fetch.return_value = {"rate": 5.0, "result": 50.0}
+    monkeypatch.setattr(limiter_module, "_rules", {"convert": RateLimitRule(1, 60.0)})
+    monkeypatch.setattr(limiter_module, "_backend", InMemoryRateLimitBackend())
+
+    response = await async_client.get("/exchange/convert/USD/BRL/10")
+    assert response.status_code == 200
+    assert response.headers["RateLimit-Remaining"] == "0"
+
+    response = await async_client.get("/exchange/convert/USD/BRL/10")
+    assert response.status_code == 429
+    assert response.headers["RateLimit-Limit"] == "1"
+    assert int(response.headers["Retry-After"]) >= 1
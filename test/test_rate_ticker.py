@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from app.domain.service import rate_ticker_service
+from app.domain.service.rate_ticker_service import RateTicker, event_stream, parse_pairs
+
+
+def test_parse_pairs_normalises_and_dedupes():
+    assert parse_pairs("usd:brl, USD:BRL,EUR:USD,,JPY") == [("USD", "BRL"), ("EUR", "USD")]
+
+
+@pytest.mark.asyncio
+async def test_poller_fetches_each_pair_once_for_all_clients(monkeypatch):
+    calls = []
+
+    async def fake_fetch(from_currency, to_currency, amount):
+        calls.append((from_currency, to_currency))
+        return {"rate": 5.0, "info": {"timestamp": 1700000000}}
+
+    monkeypatch.setattr(rate_ticker_service.apilayer_gateway, "fetch_exchange_rate", fake_fetch)
+    ticker = RateTicker(interval=60)
+    subscriptions = [ticker.subscribe([("USD", "BRL")]) for _ in range(100)]
+    await asyncio.sleep(0.05)
+
+    assert calls == [("USD", "BRL")]
+    for subscription in subscriptions:
+        assert await subscription.next_ticks(0.1) == [
+            {"from": "USD", "to": "BRL", "rate": 5.0, "timestamp": 1700000000}
+        ]
+
+    for subscription in subscriptions:
+        ticker.unsubscribe(subscription)
+    assert ticker.clients == 0
+    await ticker.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_client_only_gets_latest_tick():
+    ticker = RateTicker(interval=60)
+    ticker._task = asyncio.create_task(asyncio.sleep(60))  # keep the real poller out of the way
+    slow = ticker.subscribe([("USD", "BRL"), ("EUR", "USD")])
+
+    for rate in (5.0, 5.1, 5.2):
+        ticker.publish("USD", "BRL", rate, 1)
+    ticker.publish("EUR", "USD", 1.1, 1)
+
+    ticks = await slow.next_ticks(0.1)
+    assert [(tick["to"], tick["rate"]) for tick in ticks] == [("BRL", 5.2), ("USD", 1.1)]
+    assert await slow.next_ticks(0.01) == []
+    await ticker.close()
+
+
+@pytest.mark.asyncio
+async def test_event_stream_formats_ticks_and_unsubscribes():
+    ticker = RateTicker(interval=60)
+    ticker.publish("USD", "BRL", 5.0, 1)
+    ticker._task = asyncio.create_task(asyncio.sleep(60))
+
+    stream = event_stream(ticker, [("USD", "BRL")], heartbeat=0.01)
+    assert await stream.__anext__() == "retry: 3000\n\n"
+    assert await stream.__anext__() == 'event: rate\ndata: {"from": "USD", "to": "BRL", "rate": 5.0, "timestamp": 1}\n\n'
+    assert await stream.__anext__() == ": keepalive\n\n"
+    await stream.aclose()
+
+    assert ticker.clients == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_rejects_unknown_currency(async_client):
+    response = await async_client.get("/exchange/stream?pairs=USD:XXX")
+    assert response.status_code == 400
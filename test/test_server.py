@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+from app.server import server_settings
+
+
+def test_server_settings_come_from_environment(monkeypatch):
+    monkeypatch.setenv("HOST", "127.0.0.1")
+    monkeypatch.setenv("PORT", "9000")
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    monkeypatch.setenv("KEEP_ALIVE_TIMEOUT", "30")
+
+    settings = server_settings()
+
+    assert settings["app"] == "app.main:app"
+    assert settings["host"] == "127.0.0.1"
+    assert settings["port"] == 9000
+    assert settings["workers"] == 4
+    assert settings["timeout_keep_alive"] == 30
+    assert settings["reload"] is False
+
+
+def test_reload_runs_a_single_worker_in_development(monkeypatch):
+    monkeypatch.setenv("RELOAD", "true")
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    monkeypatch.delenv("APP_ENV", raising=False)
+
+    settings = server_settings()
+
+    assert settings["reload"] is True
+    assert settings["workers"] == 1
+
+
+def test_reload_is_ignored_in_production(monkeypatch):
+    monkeypatch.setenv("RELOAD", "true")
+    monkeypatch.setenv("APP_ENV", "production")
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+
+    settings = server_settings()
+
+    assert settings["reload"] is False
+    assert settings["workers"] == 3
+
+
+def test_importing_the_app_does_not_load_lazy_dependencies():
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('aiosqlite', 'asyncpg', 'passlib', 'httpx', 'cProfile') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        env={**os.environ, "USE_SQLITE": "true"}
+    )
+    assert result.stdout.strip() == ""
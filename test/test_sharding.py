@@ -0,0 +1,95 @@
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.domain.repository.transaction_repository import TransactionRepository
+from app.entities.entity import CurrencyConversionTransaction
+from app.gateways.database.connector import get_db, init_shards
+from app.gateways.database.database_gateway import jump_hash, set_shard_urls, shard_for_user
+from app.main import app
+from scripts.rebalance_shards import rebalance
+
+
+def _transaction(index: int, user_id: int) -> CurrencyConversionTransaction:
+    return CurrencyConversionTransaction(
+        transaction_id=f"tx-{index:04d}", user_id=user_id, from_currency="USD", amount_from=1.0,
+        to_currency="BRL", amount_to=5.0, exchange_rate=5.0
+    )
+
+
+async def _user_ids(url: str) -> set[int]:
+    engine = create_async_engine(url)
+    async with engine.connect() as conn:
+        result = await conn.execute(select(CurrencyConversionTransaction.user_id))
+        user_ids = set(result.scalars().all())
+    await engine.dispose()
+    return user_ids
+
+
+@pytest_asyncio.fixture()
+async def shards(tmp_path):
+    urls = [f"sqlite+aiosqlite:///{tmp_path}/shard_{index}.db" for index in range(2)]
+    await set_shard_urls(urls)
+    await init_shards()
+    yield urls
+    await set_shard_urls([])
+
+
+def test_adding_a_shard_only_moves_keys_onto_it():
+    before = [jump_hash(key, 4) for key in range(2000)]
+    after = [jump_hash(key, 5) for key in range(2000)]
+
+    moved = [new for old, new in zip(before, after) if old != new]
+    assert set(moved) == {4}
+    assert 0.15 < len(moved) / 2000 < 0.25
+    assert [jump_hash(key, 4) for key in range(2000)] == before
+    assert all(shard_for_user(user_id, 1) == 0 for user_id in range(100))
+
+
+@pytest.mark.asyncio
+async def test_transactions_are_written_to_and_read_from_their_shard(shards):
+    repo = TransactionRepository(None)
+    for index, user_id in enumerate(range(1, 21)):
+        await repo.add(_transaction(index, user_id))
+
+    for shard, url in enumerate(shards):
+        assert await _user_ids(url) == {user_id for user_id in range(1, 21) if shard_for_user(user_id) == shard}
+
+    transactions, total = await repo.get_user_transactions(7)
+    assert total == 1 and transactions[0].transaction_id == "tx-0006"
+    elsewhere = next(user_id for user_id in range(1, 21) if shard_for_user(user_id) != shard_for_user(7))
+    found = await repo.find_many(7, ["tx-0006", f"tx-{elsewhere - 1:04d}"])
+    assert [transaction.transaction_id for transaction in found] == ["tx-0006"]
+
+
+@pytest.mark.asyncio
+@patch("app.controller.exchange_controller.fetch_exchange_rate")
+async def test_conversion_is_stored_on_the_user_shard(mock_fetch, async_client, sqlite_session, shards):
+    mock_fetch.return_value = {"rate": 5.0, "result": 50.0}
+    app.dependency_overrides[get_db] = lambda: sqlite_session
+
+    response = await async_client.get("/exchange/convert/USD/BRL/10")
+
+    assert response.status_code == 200
+    assert await _user_ids(shards[shard_for_user(1)]) == {1}
+    main_count = await sqlite_session.execute(select(func.count()).select_from(CurrencyConversionTransaction))
+    assert main_count.scalar_one() == 0
+
+
+@pytest.mark.asyncio
+async def test_rebalance_moves_rows_to_the_new_layout_and_can_rerun(shards, tmp_path):
+    repo = TransactionRepository(None)
+    for index, user_id in enumerate(range(1, 41)):
+        await repo.add(_transaction(index, user_id))
+    new_urls = shards + [f"sqlite+aiosqlite:///{tmp_path}/shard_2.db"]
+
+    moved = await rebalance(shards, new_urls, batch_size=7)
+
+    assert sum(sum(counts.values()) for counts in moved.values()) > 0
+    for shard, url in enumerate(new_urls):
+        assert await _user_ids(url) == {user_id for user_id in range(1, 41) if shard_for_user(user_id, 3) == shard}
+    rerun = await rebalance(shards, new_urls, batch_size=7)
+    assert all(not counts for counts in rerun.values())
@@ -0,0 +1,122 @@
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.gateways.external_api import apilayer_gateway
+from app.gateways.external_api.shared_rate_table import SEQUENCE, SharedRateTable
+
+CURRENCIES = ("BRL", "USD", "EUR", "JPY")
+
+
+@pytest.fixture()
+def table_path(tmp_path):
+    return str(tmp_path / "rates.bin")
+
+
+def test_only_one_writer_and_readers_see_its_rates(table_path):
+    writer = SharedRateTable(table_path, CURRENCIES)
+    reader = SharedRateTable(table_path, CURRENCIES)
+    try:
+        assert writer.try_become_writer() is True
+        assert reader.try_become_writer() is False
+
+        writer.write("USD", "BRL", 5.25, updated_at=1000.0)
+
+        assert reader.read("USD", "BRL") == (5.25, 1000.0)
+        assert reader.read("BRL", "USD") is None
+        assert reader.read("USD", "XXX") is None
+        with pytest.raises(RuntimeError):
+            reader.write("USD", "BRL", 1.0)
+    finally:
+        writer.close()
+
+    try:
+        assert reader.try_become_writer() is True
+        assert reader.read("USD", "BRL") == (5.25, 1000.0)
+    finally:
+        reader.close()
+
+
+def test_read_ignores_slot_being_written(table_path):
+    table = SharedRateTable(table_path, CURRENCIES)
+    try:
+        table.try_become_writer()
+        table.write("USD", "EUR", 0.9, updated_at=1000.0)
+        offset = table._offset("USD", "EUR")
+        sequence = SEQUENCE.unpack_from(table._mm, offset)[0]
+        SEQUENCE.pack_into(table._mm, offset, sequence + 1)
+
+        assert table.read("USD", "EUR") is None
+
+        table.write("USD", "EUR", 0.95, updated_at=1001.0)
+        assert table.read("USD", "EUR") == (0.95, 1001.0)
+    finally:
+        table.close()
+
+
+def test_new_writer_resets_table_with_another_currency_list(table_path):
+    old = SharedRateTable(table_path, ("USD", "BRL"))
+    old.try_become_writer()
+    old.write("USD", "BRL", 5.0, updated_at=1000.0)
+    old.close()
+
+    table = SharedRateTable(table_path, CURRENCIES)
+    try:
+        assert table.read("BRL", "USD") is None
+        table.try_become_writer()
+        assert table.read("BRL", "USD") is None
+        assert table.read("USD", "BRL") is None
+    finally:
+        table.close()
+
+
+@pytest.mark.asyncio
+async def test_refresh_and_fetch_use_the_shared_table(monkeypatch, table_path):
+    table = SharedRateTable(table_path, ("USD", "BRL"))
+    table.try_become_writer()
+    request_rate = AsyncMock(side_effect=lambda f, t, amount: {"rate": 5.0 if f == "USD" else 0.2})
+    monkeypatch.setattr(apilayer_gateway, "_request_rate", request_rate)
+    monkeypatch.setattr(apilayer_gateway, "_shared_table", table)
+    try:
+        assert await apilayer_gateway.refresh_shared_rates(table) == 0  # nobody asked for a rate yet
+        assert request_rate.await_count == 0
+
+        table.mark_requested("USD", "BRL")
+        table.mark_requested("BRL", "USD")
+        assert await apilayer_gateway.refresh_shared_rates(table) == 2
+        assert request_rate.await_count == 2
+
+        result = await apilayer_gateway.fetch_exchange_rate("USD", "BRL", 10)
+        assert result["rate"] == 5.0
+        assert result["result"] == 50.0
+        assert request_rate.await_count == 2
+
+        table.write("USD", "BRL", 5.0, updated_at=time.time() - apilayer_gateway.SHARED_RATE_MAX_AGE - 1)
+        monkeypatch.setattr(apilayer_gateway, "RATE_CACHE_TTL", 0)
+        await apilayer_gateway.fetch_exchange_rate("USD", "BRL", 10)
+        assert request_rate.await_count == 3
+    finally:
+        table.close()
+
+
+@pytest.mark.asyncio
+async def test_refresh_covers_only_pairs_looked_up_recently(monkeypatch, table_path):
+    table = SharedRateTable(table_path, CURRENCIES)
+    table.try_become_writer()
+    reader = SharedRateTable(table_path, CURRENCIES)
+    request_rate = AsyncMock(return_value={"rate": 5.0})
+    monkeypatch.setattr(apilayer_gateway, "_request_rate", request_rate)
+    monkeypatch.setattr(apilayer_gateway, "_shared_table", reader)
+    monkeypatch.setattr(apilayer_gateway, "RATE_CACHE_TTL", 0)
+    try:
+        await apilayer_gateway.fetch_exchange_rate("USD", "BRL", 1)  # another worker's lookup
+        table.mark_requested("EUR", "JPY", at=time.time() - 3600)
+        request_rate.reset_mock()
+
+        assert await apilayer_gateway.refresh_shared_rates(table, demand_window=60) == 1
+        request_rate.assert_awaited_once_with("USD", "BRL", 1)
+        assert reader.read("USD", "BRL")[0] == 5.0
+    finally:
+        reader.close()
+        table.close()
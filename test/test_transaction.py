@@ -7,6 +7,7 @@ from fastapi import HTTPException
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.domain.repository.transaction_repository import TransactionRepository
+from app.entities.entity import CurrencyConversionTransaction
 
 
 @pytest.mark.asyncio
@@ -55,3 +56,29 @@ async def test_get_user_transactions_db_error(mock_db_session):
     with pytest.raises(HTTPException) as exc:
         await repo.get_user_transactions(user_id=1)
     assert exc.value.status_code == 500
+
+
+@pytest.mark.asyncio
+async def test_get_user_transactions_pages_newest_first(sqlite_session):
+    await CurrencyConversionTransaction.bulk_insert(sqlite_session, [
+        {
+            "transaction_id": f"tx-{i}",
+            "user_id": 1,
+            "from_currency": "USD",
+            "amount_from": 10.0,
+            "to_currency": "BRL",
+            "amount_to": 50.0,
+            "exchange_rate": 5.0,
+            "timestamp": datetime(2025, 5, 1 + i)
+        }
+        for i in range(5)
+    ])
+    repo = TransactionRepository(sqlite_session)
+
+    transactions, total = await repo.get_user_transactions(user_id=1, page=2, page_size=2)
+
+    assert total == 5
+    assert [t.transaction_id for t in transactions] == ["tx-2", "tx-1"]
+    # Column rows, not ORM instances: nothing lands in the identity map.
+    assert not isinstance(transactions[0], CurrencyConversionTransaction)
+    assert len(sqlite_session.identity_map) == 0
@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from app.gateways.database.connector import get_db
+from app.gateways.journal import transaction_journal
+from app.gateways.journal.transaction_journal import RECORD_SIZE, JournalReader, TransactionJournal
+from app.main import app
+
+NOW = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+def _records(count, start=0):
+    return [(NOW, i, f"tx-{i}", "USD", "BRL", float(i), i * 5.0, 5.0) for i in range(start, start + count)]
+
+
+def test_records_round_trip_across_segments(tmp_path):
+    journal = TransactionJournal(str(tmp_path), segment_records=4)
+    assert journal.append(_records(6)) == 0
+    assert journal.append(_records(3, start=6)) == 6
+
+    reader = JournalReader(str(tmp_path))
+    records = list(reader.read())
+    assert [record.offset for record in records] == list(range(9))
+    assert records[7].as_dict() == {
+        "offset": 7, "timestamp": NOW.timestamp(), "user_id": 7, "transaction_id": "tx-7",
+        "from_currency": "USD", "to_currency": "BRL", "amount_from": 7.0, "amount_to": 35.0, "exchange_rate": 5.0,
+    }
+    assert len(records[0].view) == RECORD_SIZE and records[0].view.readonly
+    assert len(list(tmp_path.glob("*.seg"))) == 3
+    reader.close()
+    journal.close()
+
+
+def test_reader_resumes_and_a_second_writer_continues_the_sequence(tmp_path):
+    first = TransactionJournal(str(tmp_path), segment_records=4)
+    first.append(_records(3))
+    reader = JournalReader(str(tmp_path))
+    assert [record.user_id for record in reader.read(limit=2)] == [0, 1]
+    assert reader.next_offset == 2
+
+    # Another worker appends to the same directory.
+    second = TransactionJournal(str(tmp_path), segment_records=4)
+    second.append(_records(3, start=3))
+    first.append(_records(1, start=6))
+
+    assert [record.user_id for record in reader.read()] == [2, 3, 4, 5, 6]
+    assert list(reader.read()) == []
+    assert [record.offset for record in JournalReader(str(tmp_path)).read(from_offset=5)] == [5, 6]
+    first.close()
+    second.close()
+
+
+def test_old_segments_are_pruned(tmp_path):
+    journal = TransactionJournal(str(tmp_path), segment_records=2, max_segments=2)
+    journal.append(_records(7))
+
+    assert [record.offset for record in JournalReader(str(tmp_path)).read(from_offset=0)] == [4, 5, 6]
+    journal.close()
+
+
+@pytest.mark.asyncio
+@patch("app.controller.exchange_controller.fetch_exchange_rate")
+async def test_committed_conversions_are_journaled(mock_fetch, async_client, sqlite_session, tmp_path, monkeypatch):
+    mock_fetch.return_value = {"rate": 5.0, "result": 50.0}
+    app.dependency_overrides[get_db] = lambda: sqlite_session
+    journal = TransactionJournal(str(tmp_path))
+    monkeypatch.setattr(transaction_journal, "_journal", journal)
+
+    response = await async_client.get("/exchange/convert/USD/BRL/10")
+
+    (record,) = JournalReader(str(tmp_path)).read()
+    assert record.transaction_id == response.json()["transaction_id"]
+    assert (record.user_id, record.amount_from, record.amount_to) == (1, 10.0, 50.0)
+    journal.close()
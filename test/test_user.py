@@ -1,9 +1,15 @@
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from unittest.mock import patch, AsyncMock
 
 from fastapi import HTTPException
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.domain.repository.user_repository import AuthenticatedUser, UserRepository
+from app.entities.entity import User, UserSession
+from app.utils.auth_deps import get_current_user
+
 
 @pytest.mark.asyncio
 @patch("app.domain.repository.user_repository.UserRepository.create")
@@ -143,4 +149,39 @@ async def test_delete_user_db_error(mock_delete, async_client):
 async def test_find_by_session_expired(mock_find_by_session, async_client):
     mock_find_by_session.return_value = None
     result = await mock_find_by_session("expired-session-id")
-    assert result is None
\ No newline at end of file
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_find_by_session_resolves_user_in_one_query(sqlite_session):
+    sqlite_session.add(User(id=7, username="session_user", password_hash="hash"))
+    sqlite_session.add(UserSession(
+        session_id="live-session",
+        user_id=7,
+        expires_at=datetime.now(timezone.utc) + timedelta(hours=1)
+    ))
+    await sqlite_session.commit()
+
+    user = await UserRepository(sqlite_session).find_by_session("live-session")
+
+    assert user.username == "session_user"
+    assert await UserRepository(sqlite_session).find_by_session("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_current_user_is_loaded_without_password_hash(sqlite_session):
+    sqlite_session.add(User(id=7, username="projected", password_hash="secret-hash"))
+    sqlite_session.add(UserSession(session_id="projection-session", user_id=7))
+    await sqlite_session.commit()
+    sqlite_session.expunge_all()
+
+    user = await get_current_user(session_id="projection-session", db=sqlite_session)
+
+    assert isinstance(user, AuthenticatedUser)
+    assert (user.id, user.username, user.is_active) == (7, "projected", True)
+    assert not hasattr(user, "password_hash")
+    assert len(sqlite_session.identity_map) == 0
+
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user(session_id="unknown", db=sqlite_session)
+    assert exc.value.status_code == 401
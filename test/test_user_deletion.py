@@ -0,0 +1,120 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.domain.repository.user_repository import UserRepository
+from app.domain.service import user_deletion_service
+from app.entities.entity import ConversionJob, CurrencyConversionTransaction, User, UserSession
+from app.gateways.database.connector import get_db
+from app.gateways.database.database_gateway import Base, enable_sqlite_foreign_keys
+from app.main import app
+
+
+@pytest_asyncio.fixture()
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    enable_sqlite_foreign_keys(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+    await engine.dispose()
+
+
+async def _seed(session, user_id, transactions):
+    session.add(User(id=user_id, username=f"user{user_id}", password_hash="hash"))
+    await session.flush()
+    session.add(UserSession(session_id=f"session-{user_id}", user_id=user_id))
+    session.add(ConversionJob(user_id=user_id, input="USD,BRL,1", total_rows=1))
+    await session.commit()
+    await CurrencyConversionTransaction.bulk_insert(session, [
+        {
+            "transaction_id": f"tx-{user_id}-{i}", "user_id": user_id, "from_currency": "USD", "amount_from": 1.0,
+            "to_currency": "BRL", "amount_to": 5.0, "exchange_rate": 5.0, "timestamp": datetime.now(timezone.utc),
+        }
+        for i in range(transactions)
+    ])
+    session.expunge_all()
+
+
+async def _count(session, entity, user_id):
+    result = await session.execute(select(func.count()).select_from(entity).where(entity.user_id == user_id))
+    return result.scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_delete_removes_history_sessions_and_jobs_without_loading_them(session_factory):
+    async with session_factory() as session:
+        await _seed(session, 5, 12)
+        await _seed(session, 6, 1)
+
+        await UserRepository(session).delete(5)
+
+        assert len(session.identity_map) == 0
+        for entity in (CurrencyConversionTransaction, UserSession, ConversionJob):
+            assert await _count(session, entity, 5) == 0
+            assert await _count(session, entity, 6) == 1
+        assert await session.get(User, 5) is None
+
+
+@pytest.mark.asyncio
+async def test_batched_delete_goes_through_every_batch(session_factory):
+    async with session_factory() as session:
+        await _seed(session, 5, 12)
+
+        deleted = await CurrencyConversionTransaction.bulk_delete(
+            session, CurrencyConversionTransaction.user_id == 5, batch_size=5
+        )
+
+        assert deleted == 12
+        assert await _count(session, CurrencyConversionTransaction, 5) == 0
+
+
+@pytest.mark.asyncio
+async def test_background_delete_locks_the_account_and_returns_202(async_client, session_factory, monkeypatch):
+    async with session_factory() as session:
+        await _seed(session, 1, 3)
+    monkeypatch.setattr(user_deletion_service, "get_session_factory", lambda: session_factory)
+    request_session = session_factory()
+    app.dependency_overrides[get_db] = lambda: request_session
+
+    response = await async_client.delete("/users/1?background=true")
+
+    assert response.status_code == 202
+    async with session_factory() as session:
+        assert await session.get(User, 1) is None
+        assert await _count(session, CurrencyConversionTransaction, 1) == 0
+    await request_session.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_background_delete_is_finished_by_the_sweep(session_factory, monkeypatch):
+    async with session_factory() as session:
+        await _seed(session, 1, 3)
+        await _seed(session, 2, 1)
+        await UserRepository(session).deactivate(1)
+        await User.bulk_update(session, User.id == 2, is_active=False)  # disabled, but not asked to be deleted
+    monkeypatch.setattr(user_deletion_service, "get_session_factory", lambda: session_factory)
+    monkeypatch.setattr(user_deletion_service, "USER_DELETION_RETRY_DELAY", 0)
+
+    async def failing_delete(self, id):
+        raise HTTPException(status_code=500, detail="database unavailable")
+
+    with patch.object(UserRepository, "delete", failing_delete):
+        assert not await user_deletion_service.delete_user(1, retries=2)
+
+    async with session_factory() as session:
+        assert await UserRepository(session).pending_deletions() == [1]
+    assert await user_deletion_service.delete_pending_users() == 1
+
+    async with session_factory() as session:
+        assert await session.get(User, 1) is None
+        assert await _count(session, CurrencyConversionTransaction, 1) == 0
+        assert await session.get(User, 2) is not None
+        assert await _count(session, CurrencyConversionTransaction, 2) == 1
+        assert await UserRepository(session).pending_deletions() == []
@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.utils.config import warmup
+from app.utils.config.warmup import parse_rate_pairs, warm_up
+
+
+def test_parse_rate_pairs_skips_malformed_items():
+    assert parse_rate_pairs("usd:brl, EUR:USD,,JPY") == [("USD", "BRL"), ("EUR", "USD")]
+
+
+@pytest.mark.asyncio
+async def test_warm_up_runs_every_step_and_marks_ready(monkeypatch, sqlite_session):
+    init_db = AsyncMock()
+    warm_pool = AsyncMock(return_value=5)
+    prime = AsyncMock(return_value=1)
+    monkeypatch.setattr(warmup, "init_db", init_db)
+    monkeypatch.setattr(warmup, "warm_pool", warm_pool)
+    monkeypatch.setattr(warmup, "prime_rate_cache", prime)
+    monkeypatch.setattr(warmup, "WARMUP_RATE_PAIRS", "USD:BRL")
+    session_factory = async_sessionmaker(bind=sqlite_session.bind, class_=AsyncSession)
+    monkeypatch.setattr(warmup, "get_session_factory", lambda: session_factory)
+    app = SimpleNamespace(state=SimpleNamespace(ready=False))
+
+    await warm_up(app)
+
+    init_db.assert_awaited_once()
+    warm_pool.assert_awaited_once_with(warmup.WARMUP_DB_CONNECTIONS)
+    prime.assert_awaited_once_with([("USD", "BRL")])
+    assert app.state.ready is True
+
+
+@pytest.mark.asyncio
+async def test_failed_optional_step_does_not_block_readiness(monkeypatch):
+    monkeypatch.setattr(warmup, "init_db", AsyncMock())
+    monkeypatch.setattr(warmup, "warm_pool", AsyncMock(side_effect=OSError("connection refused")))
+    monkeypatch.setattr(warmup, "warm_statements", AsyncMock(return_value=0))
+    monkeypatch.setattr(warmup, "WARMUP_RATE_PAIRS", "")
+    app = SimpleNamespace(state=SimpleNamespace(ready=False))
+
+    await warm_up(app)
+
+    assert app.state.ready is True